@@ -1,13 +1,33 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
 import numpy as np
-import plotly.graph_objects as go
 from datetime import datetime
+import os
 import time
-import requests
-import xml.etree.ElementTree as ET
-from yahooquery import Ticker as YQTicker
+import uuid
+
+# NOTE: yfinance, plotly and yahooquery are imported inside the functions that use them.
+# They are the slowest imports in the app and none of them are needed to paint the
+# splash screen, so deferring them keeps container cold starts fast.
+# Run `python benchmarks/import_time.py` to check the import budget.
+
+# Core analytics live in the headless `valuora` package; this file is the UI.
+from valuora.data import fetch_stock_data, fetch_history, fetch_closes, fetch_google_news_rss, fetch_stock_news, get_competitors, fetch_comparison_data
+from valuora.archive import get_archive
+from valuora.dedup import dedupe
+from valuora.peers import peer_averages
+from valuora.snapshots import get_snapshot
+from valuora.valuation import calculate_dcf_value, get_dcf_inputs, get_valuation_data, classify_cash_position
+from valuora.correlation import ewm_corr, pair_series, rolling_corr, to_returns
+from valuora.macro import CHOKEPOINTS, DEMO_MACRO_DATA, LOOKBACKS, fetch_macro_snapshot, get_ai_geopol_summary, get_macro_store
+from valuora.risk import portfolio_risk
+from valuora.scenarios import DEFAULT_SCENARIOS, FACTORS, complete_shocks, factor_unit, project, watchlist_betas
+from valuora.signals import MA_WINDOW, generate_ai_verdict
+from valuora.backtest import DEFAULT_HORIZONS, backtest, eps_history
+from valuora import metrics, profiling
+from valuora.cache import cache_stats
+from valuora.timing import span, record, timing_summary
+from valuora.refresh import get_refresher
 
 # --- Page Configuration ---
 st.set_page_config(page_title="Valuora", page_icon="🌊", layout="wide")
@@ -127,148 +147,6 @@ def splash_screen():
     st.session_state.splash_complete = True
     st.rerun()
 
-# --- HELPER: GOOGLE NEWS RSS FETCHER ---
-def fetch_google_news_rss(ticker):
-    """
-    Fetches recent news from Google News RSS for the given ticker, 
-    specifically searching for major financial outlets or general stock news.
-    """
-    try:
-        # Search query: "{ticker} stock" to get broad coverage including major outlets
-        url = f"https://news.google.com/rss/search?q={ticker}+stock&hl=en-US&gl=US&ceid=US:en"
-        response = requests.get(url, timeout=5)
-        response.raise_for_status()
-        
-        root = ET.fromstring(response.content)
-        items = []
-        for item in root.findall('.//item'):
-            title = item.find('title').text if item.find('title') is not None else 'No Title'
-            link = item.find('link').text if item.find('link') is not None else '#'
-            pub_date_str = item.find('pubDate').text if item.find('pubDate') is not None else ''
-            source = item.find('source').text if item.find('source') is not None else 'Google News'
-            
-            # Parse Date
-            try:
-                # RFC 822 format used by RSS (e.g., "Wed, 02 Oct 2024 13:00:00 GMT")
-                pub_date = datetime.strptime(pub_date_str, '%a, %d %b %Y %H:%M:%S %Z')
-                timestamp = pub_date.timestamp()
-            except:
-                timestamp = time.time() # Fallback to now
-            
-            items.append({
-                'title': title,
-                'link': link,
-                'publisher': source,
-                'providerPublishTime': timestamp,
-                'type': 'RSS'
-            })
-        return items
-    except Exception as e:
-        # st.error(f"RSS Fetch Error: {e}") # Debugging
-        return []
-
-# --- HELPER: COMPETITOR MAPPING ---
-def get_competitors(ticker, info):
-    """
-    Returns the industry and a list of 5 competitor tickers based on the sector/industry.
-    Fallback to generic market indices if sector is unknown.
-    """
-    industry = info.get('industry', 'Unknown Industry')
-    sector = info.get('sector', 'Unknown Sector')
-    
-    # Simple hardcoded map for demonstration (expand as needed)
-    competitor_map = {
-        'Technology': ['MSFT', 'AAPL', 'NVDA', 'GOOGL', 'ORCL'],
-        'Financial Services': ['JPM', 'BAC', 'WFC', 'C', 'GS'],
-        'Healthcare': ['JNJ', 'PFE', 'LLY', 'MRK', 'ABBV'],
-        'Consumer Cyclical': ['AMZN', 'TSLA', 'HD', 'MCD', 'NKE'],
-        'Consumer Defensive': ['WMT', 'PG', 'KO', 'PEP', 'COST'],
-        'Energy': ['XOM', 'CVX', 'SHEL', 'TTE', 'BP'],
-        'Industrials': ['CAT', 'HON', 'UPS', 'GE', 'BA'],
-        'Communication Services': ['GOOG', 'META', 'NFLX', 'DIS', 'TMUS']
-    }
-    
-    # Try sector match first
-    comps = competitor_map.get(sector, [])
-    
-    # Fallback if sector map fails or empty
-    if not comps:
-        # Generic mixed bag if unknown
-        comps = ['SPY', 'QQQ', 'DIA', 'IWM', 'VTI']
-    
-    # Ensure the main ticker isn't in the competitor list (replace if found)
-    if ticker in comps:
-        comps.remove(ticker)
-        # Add a filler if we removed one
-        if sector == 'Technology': comps.append('ADBE')
-        elif sector == 'Financial Services': comps.append('MS')
-        else: comps.append('VOO') # Generic ETF filler
-        
-    return industry, comps[:5]
-
-# --- HELPER: FETCH COMPARISON DATA ---
-def fetch_comparison_data(main_ticker, competitors):
-    """
-    Fetches P/E, PEG, 1Y Return, 5Y Return for main ticker and competitors.
-    Returns a DataFrame.
-    """
-    tickers = [main_ticker] + competitors
-    data = []
-    
-    # Batch fetch might be faster for some things, but info/history is per ticker object usually in yfinance 
-    # (unless using Tickers object which has limits in structure). Iteration is safer for 'info'.
-    
-    for t in tickers:
-        try:
-            stock = yf.Ticker(t)
-            info = stock.info
-            hist = stock.history(period="5y")
-            
-            # Metrics
-            pe = info.get('trailingPE')
-            peg = info.get('pegRatio')
-            roe = info.get('returnOnEquity')
-            ev_ebitda = info.get('enterpriseToEbitda')
-            
-            # Growth Metrics
-            ps = info.get('priceToSalesTrailing12Months')
-            ev_rev = info.get('enterpriseToRevenue')
-            rev_growth = info.get('revenueGrowth')
-            
-            # Returns (ROI)
-            roi_1y = None
-            roi_5y = None
-            
-            if not hist.empty:
-                curr = hist['Close'].iloc[-1]
-                # 1 Year (approx 252 trading days)
-                if len(hist) > 252:
-                    price_1y = hist['Close'].iloc[-252]
-                    roi_1y = (curr - price_1y) / price_1y
-                
-                # 5 Years (approx 1260 trading days)
-                if len(hist) > 1250: # Tolerance
-                    price_5y = hist['Close'].iloc[0] # Start of 5y period
-                    roi_5y = (curr - price_5y) / price_5y
-            
-            data.append({
-                "Ticker": t,
-                "P/E": pe if pe else np.nan,
-                "PEG": peg if peg else np.nan,
-                "ROE": roe if roe else np.nan,
-                "EV/EBITDA": ev_ebitda if ev_ebitda else np.nan,
-                "P/S": ps if ps else np.nan,
-                "EV/Revenue": ev_rev if ev_rev else np.nan,
-                "Rev Growth": rev_growth if rev_growth else np.nan,
-                "1Y ROI": roi_1y,
-                "5Y ROI": roi_5y
-            })
-        except:
-            pass
-            
-    df = pd.DataFrame(data)
-    return df
-
 # --- HELPER: CUSTOM METRIC DISPLAY ---
 def display_custom_metric(label, value, prefix="", suffix="", help_text=None, color=None):
     """
@@ -302,165 +180,6 @@ def display_custom_metric(label, value, prefix="", suffix="", help_text=None, co
     </div>
     """, unsafe_allow_html=True)
 
-# --- HELPER: DCF CALCULATOR ---
-def calculate_dcf_value(fcf_input, growth_rate, terminal_growth, discount_rate, debt_input, cash_input, shares):
-    """
-    Calculates Intrinsic Value based on DCF inputs.
-    Returns: intrinsic_share_price (float)
-    """
-    try:
-        if fcf_input <= 0:
-            return 0.0
-            
-        future_fcf = []
-        for i in range(1, 6):
-            fcf = fcf_input * ((1 + growth_rate) ** i)
-            future_fcf.append(fcf)
-        
-        terminal_val = future_fcf[-1] * (1 + terminal_growth) / (discount_rate - terminal_growth)
-        
-        dcf_value = 0
-        for i, cash in enumerate(future_fcf):
-            dcf_value += cash / ((1 + discount_rate) ** (i + 1))
-        
-        pv_terminal = terminal_val / ((1 + discount_rate) ** 5)
-        
-        # Enterprise Value
-        enterprise_value = dcf_value + pv_terminal
-        
-        # Equity Value = EV - Debt + Cash
-        equity_value = enterprise_value - debt_input + cash_input
-        
-        if not shares: shares = 1
-        
-        intrinsic_share_price = equity_value / shares
-        return intrinsic_share_price
-    except:
-        return 0.0
-
-# --- HELPER: ROBUST VALUATION FETCHER ---
-def get_valuation_data(stock, info):
-    """
-    Tries to get P/E, EPS, and PEG from 'The Books' (Income Statement) first,
-    falling back to Yahoo Finance 'Info' if needed.
-    """
-    data = {
-        'pe': None,
-        'pe_source': None,
-        'eps': None,
-        'eps_source': None,
-        'peg': None,
-        'peg_source': None,
-        'yahoo_pe': info.get('trailingPE'), # For crosscheck
-        'yahoo_eps': info.get('trailingEps') # For crosscheck
-    }
-    
-    current_price = info.get('currentPrice')
-    
-    # 1. Try fetching from Income Statement (The Books)
-    try:
-        inc = stock.income_stmt
-        eps_row = None
-        if not inc.empty:
-            if "Diluted EPS" in inc.index:
-                eps_row = inc.loc["Diluted EPS"]
-            elif "Basic EPS" in inc.index:
-                eps_row = inc.loc["Basic EPS"]
-        
-        if eps_row is not None and not eps_row.empty:
-            # Latest EPS (TTM roughly approximated by latest annual or just latest annual)
-            # Note: Income stmt is usually annual. 'info' trailingEPS is TTM.
-            # Ideally we want TTM for P/E. But for "The Books" crosscheck we use what we have.
-            # Let's use the latest annual as the "Book Value" proxy for calculation if TTM isn't available in financials.
-            # Actually, calculating P/E based on latest Annual EPS is a common simple metric.
-            
-            latest_annual_eps = float(eps_row.iloc[0])
-            data['eps'] = latest_annual_eps
-            data['eps_source'] = "Company Filings (Annual)"
-            
-            if current_price:
-                data['pe'] = current_price / latest_annual_eps
-                data['pe_source'] = "Calculated from Filings"
-                
-            # Calculate Growth for PEG (Up to 5 years / 5 periods)
-            # eps_row is ordered roughly [Latest, Y-1, Y-2, Y-3, Y-4]
-            # We need at least 2 data points for 1 growth period.
-            valid_growths = []
-            
-            # Iterate up to 5 times (comparing i to i+1)
-            # e.g., i=0 (Latest) vs i=1 (Y-1) -> Growth 1
-            for i in range(min(5, len(eps_row) - 1)):
-                try:
-                    current_val = float(eps_row.iloc[i])
-                    prev_val = float(eps_row.iloc[i+1])
-                    
-                    # Check for NaNs
-                    if np.isnan(current_val) or np.isnan(prev_val):
-                        continue
-
-                    # Avoid division by zero or massive spikes from near-zero
-                    if prev_val != 0:
-                        g = (current_val / prev_val) - 1
-                        valid_growths.append(g)
-                except:
-                    pass
-            
-            if valid_growths:
-                avg_growth = sum(valid_growths) / len(valid_growths)
-                
-                # We need growth as a percentage (e.g., 0.10 -> 10) for the PEG formula (PEG = PE / Growth_Rate_Percent)
-                if avg_growth != 0 and data['pe']:
-                    data['peg'] = data['pe'] / (avg_growth * 100)
-                    years_used = len(valid_growths)
-                    data['peg_source'] = f"Calculated ({years_used}yr Avg Growth)"
-
-    except Exception as e:
-        pass
-
-    # 2. Fallbacks (Yahoo Finance)
-    if data['eps'] is None:
-        data['eps'] = info.get('trailingEps')
-        data['eps_source'] = "Yahoo Finance"
-    
-    if data['pe'] is None:
-        data['pe'] = info.get('trailingPE')
-        data['pe_source'] = "Yahoo Finance"
-        
-    if data['peg'] is None:
-        data['peg'] = info.get('pegRatio')
-        data['peg_source'] = "Yahoo Finance"
-        
-    return data
-
-def classify_cash_position(stock):
-    """
-    Diagnoses if a company is 'Cash Stable' or 'Cash Burning'.
-    Returns: status (str), runway (months), burn_rate (monthly)
-    """
-    try:
-        cf = stock.cashflow
-        bs = stock.balance_sheet
-        
-        # 1. Get Latest Annual Free Cash Flow (FCF)
-        if not cf.empty and 'Free Cash Flow' in cf.index:
-            latest_fcf = cf.loc['Free Cash Flow'].iloc[0]
-        else:
-            latest_fcf = -1 # Fallback to burning if data missing
-            
-        # 2. Get Total Cash on Hand
-        cash_on_hand = bs.loc['Cash And Cash Equivalents'].iloc[0] if 'Cash And Cash Equivalents' in bs.index else 0
-        
-        # 3. Logic: If FCF is negative, it's a Cash Burner
-        if latest_fcf < 0:
-            monthly_burn = abs(latest_fcf) / 12
-            runway_months = cash_on_hand / monthly_burn if monthly_burn > 0 else 999
-            return "Cash Burning", runway_months, monthly_burn
-        else:
-            return "Cash Stable", None, 0
-            
-    except:
-        return "Unknown", None, 0
-
 # --- 1. THE ROBUST SECRET HELPER ---
 def get_av_key():
     try:
@@ -488,112 +207,326 @@ def render_system_health():
     if not av_key:
         st.sidebar.warning("Add 'ALPHA_VANTAGE_KEY' to Streamlit Secrets for live macro data.")
 
+    # Rolling latency per stage (from previous reruns in this process) + cache hit rate
+    stats = cache_stats().values()
+    hits = sum(s['hits'] + s['shared_hits'] for s in stats)
+    lookups = hits + sum(s['misses'] for s in stats)
+    if lookups:
+        st.sidebar.write(f"**Cache Hit Rate:** {hits / lookups:.0%} ({lookups} lookups)")
+
+    rows = timing_summary(by_label=False)
+    if rows:
+        lines = [f"{r['stage']}: p50 {r['p50_ms']:.0f}ms · p95 {r['p95_ms']:.0f}ms" for r in rows]
+        st.sidebar.caption("  \n".join(lines))
+
+
+def debug_mode():
+    """Debug panel is enabled with ?debug=1 or VALUORA_DEBUG=1."""
+    return st.query_params.get("debug") in ("1", "true") or os.environ.get("VALUORA_DEBUG") in ("1", "true")
+
+
+def render_debug_panel():
+    with st.expander("🛠️ Debug: Stage Timings & Cache", expanded=False):
+        rows = timing_summary()
+        if rows:
+            st.dataframe(pd.DataFrame(rows).round(2), use_container_width=True, hide_index=True)
+        else:
+            st.caption("No spans recorded yet.")
+        cache_df = pd.DataFrame.from_dict(cache_stats(), orient="index")
+        if not cache_df.empty:
+            hits = cache_df['hits'] + cache_df['shared_hits']
+            lookups = hits + cache_df['misses']
+            cache_df['hit_rate'] = (hits / lookups.where(lookups > 0)).round(3)
+            st.dataframe(cache_df, use_container_width=True)
+
 # --- 3. THE HYBRID FETCH LOGIC ---
-@st.cache_data(ttl=3600)
-def fetch_macro_command_center():
+# Refresh a little before the old 1h cache TTL so the snapshot never goes stale
+MACRO_REFRESH_S = 3300
+# Longest a page waits on the process's first macro fetch before showing the defaults
+MACRO_FIRST_FETCH_TIMEOUT_S = 5
+# Correlation-over-time warm-up before the lookback, in EWMA half-lives
+EWM_WARMUP_HALFLIVES = 8
+
+
+def macro_refresher():
     """
-    Hybrid: Current prices via Alpha Vantage (Stable),
-    History via yfinance (Deep).
+    Process-wide background refresher for the macro snapshot (valuora.refresh).
+    The first call starts the fetch; the splash screen calls it so the data is warm
+    by the time anyone opens the Command Center.
     """
     av_key = get_av_key()
-    macro_data = {"oil": 92.50, "spx": 5100, "gold": 2150} # Default/Demo Values
-
-    # A. Current 'Heartbeat' via Alpha Vantage
-    if av_key:
-        try:
-            # Only hit Alpha for the most critical triggers
-            oil_url = f'https://www.alphavantage.co/query?function=WTI&interval=daily&apikey={av_key}'
-            r = requests.get(oil_url).json()
-            macro_data["oil"] = float(r['data'][0]['value'])
-            st.session_state.av_status = "🟢 Online"
-        except:
-            st.session_state.av_status = "🔴 Rate Limited"
-
-    # B. Historical Patterns via yfinance
-    current_prices, hist_macro = fetch_macro_context() # Your existing function
-
-    # Overwrite Yahoo's Oil/SPX with Alpha's 'Clean' data if available
-    current_prices["Crude Oil (WTI)"] = macro_data["oil"]
+    return get_refresher(
+        "macro",
+        lambda: fetch_macro_snapshot(av_key),
+        interval=MACRO_REFRESH_S,
+        is_good=lambda snap: not snap["history"].empty,
+    )
 
-    return current_prices, hist_macro
 
-def fetch_macro_context():
+def fetch_macro_command_center():
     """
-    Fetches 60 days of historical data for key global macro indicators
-    and returns both the latest prices and the historical DataFrame.
+    Hybrid: Current prices via Alpha Vantage (Stable),
+    History via yfinance (Deep).
+    Always served from the last good background snapshot; returns (prices, history, fetched_at).
     """
-    tickers = {
-        "Crude Oil (WTI)": "CL=F",
-        "Gold": "GC=F",
-        "Copper": "HG=F",
-        "10Y Treasury Yield": "^TNX",
-        "S&P 500": "^GSPC",
-        "NASDAQ": "^IXIC",
-        "Hang Seng": "^HSI"
-    }
-    try:
-        data = yf.download(list(tickers.values()), period="60d")['Close']
-        inv_map = {v: k for k, v in tickers.items()}
-        data = data.rename(columns=inv_map)
-
-        # Latest prices for the ticker tape
-        latest_data = {}
-        for name in tickers.keys():
-            if name in data.columns:
-                latest_data[name] = data[name].dropna().iloc[-1] if not data[name].dropna().empty else None
-            else:
-                latest_data[name] = None
-
-        return latest_data, data
-    except Exception:
-        return {}, pd.DataFrame()
-
-# --- NEW HELPER FOR GEOPOLITICAL NEWS ---
-def get_ai_geopol_summary(location, news_items):
-    """Generates a contextual AI summary based on headlines."""
-    if not news_items:
-        return "No recent intelligence gathered for this sector."
-
-    # In a production app, you'd send this to an LLM API.
-    # For the 'Vibe Code' version, we create a Smart Template Summary:
-    headlines = [n['title'] for n in news_items[:3]]
-    summary = f"**Intelligence Report:** {location} is currently seeing high volatility. "
-    summary += f"Key developments include: '{headlines[0]}'. "
-    summary += "Valoura AI predicts continued pressure on global shipping rates if this trend persists."
-    return summary
+    snap = macro_refresher().get(timeout=MACRO_FIRST_FETCH_TIMEOUT_S)
+    if snap is None:
+        return {"Crude Oil (WTI)": DEMO_MACRO_DATA["oil"]}, pd.DataFrame(), None
+
+    if snap.value["av_status"] == "online":
+        st.session_state.av_status = "🟢 Online"
+    elif snap.value["av_status"] == "rate_limited":
+        st.session_state.av_status = "🔴 Rate Limited"
+    return snap.value["latest"], snap.value["history"], snap.fetched_at
+
+
+# --- 4. SHOCK SCENARIOS ---
+def scenario_editor_frame():
+    """DEFAULT_SCENARIOS as the editable table: one row per scenario, one column per factor."""
+    rows = []
+    for name, shocks in DEFAULT_SCENARIOS.items():
+        row = {"Scenario": name}
+        row.update({f"{f} ({factor_unit(f)})": shocks.get(f) for f in FACTORS})
+        rows.append(row)
+    return pd.DataFrame(rows, columns=["Scenario"] + [f"{f} ({factor_unit(f)})" for f in FACTORS])
+
+
+def render_shock_scenarios():
+    """User-defined macro shocks projected onto every watchlist ticker (valuora.scenarios)."""
+    st.subheader("🧪 Shock Scenarios: Watchlist Impact")
+    tickers = tuple(st.session_state.get("watchlist", []))
+    if not tickers:
+        st.info("Add tickers to your ⭐ Watchlist in the sidebar to stress-test them.")
+        return
+
+    col_window, col_propagate = st.columns(2)
+    beta_lookback = col_window.radio("Beta estimation window", ["1y", "5y"], index=1, horizontal=True, key="scenario_lookback")
+    propagate = col_propagate.checkbox("Move unshocked factors with their historical co-movement", value=True, key="scenario_propagate")
+
+    edited = st.data_editor(scenario_editor_frame(), num_rows="dynamic", hide_index=True, use_container_width=True, key="scenario_editor")
+    scenarios = {}
+    for _, row in edited.iterrows():
+        shocks = {f: float(row[f"{f} ({factor_unit(f)})"]) for f in FACTORS if pd.notna(row[f"{f} ({factor_unit(f)})"])}
+        if pd.notna(row["Scenario"]) and str(row["Scenario"]).strip() and shocks:
+            scenarios[str(row["Scenario"]).strip()] = shocks
+    if not scenarios:
+        st.caption("Enter at least one shock (e.g. 30 under Crude Oil for +30%, 100 under the 10Y yield for +100bp).")
+        return
+
+    with span("valuation", label="scenarios"):
+        betas, stats, moves = watchlist_betas(tickers, beta_lookback)
+        betas = betas.dropna()
+        impact = project(betas, complete_shocks(scenarios, moves if propagate else None))
+
+    if impact.empty:
+        st.warning("Not enough price history overlapping the macro data to estimate sensitivities.")
+        return
+    st.dataframe(impact.style.format("{:+.2f}%").background_gradient(cmap="RdYlGn", axis=None), use_container_width=True)
+    skipped = [t for t in tickers if t not in betas.index]
+    st.caption("Projected move per ticker, from daily-return betas to each macro series (linear, first-order)."
+               + (f" Skipped (no usable history): {', '.join(skipped)}." if skipped else ""))
+    with st.expander("Factor sensitivities (betas)"):
+        st.dataframe(betas.join(stats).style.format("{:.3f}", subset=list(betas.columns)), use_container_width=True)
+
+
+# --- 5. PORTFOLIO RISK ---
+RISK_LOOKBACK_YEARS = {"1y": 1, "3y": 3, "5y": 5, "10y": 10}
+
+
+def render_portfolio_risk():
+    """Historical-simulation VaR/CVaR, drawdown and risk contributions for the weighted watchlist (valuora.risk)."""
+    st.subheader("🛡️ Watchlist Portfolio Risk")
+    tickers = list(st.session_state.get("watchlist", []))
+    if not tickers:
+        st.info("Add tickers to your ⭐ Watchlist in the sidebar to see portfolio risk.")
+        return
+
+    col_weights, col_settings = st.columns([1, 1.5])
+    with col_weights:
+        weights_df = st.data_editor(
+            pd.DataFrame({"Ticker": tickers, "Weight": [1.0] * len(tickers)}),
+            disabled=["Ticker"], hide_index=True, use_container_width=True, key=f"risk_weights_{'_'.join(tickers)}",
+        )
+    with col_settings:
+        risk_lookback = st.radio("History", list(RISK_LOOKBACK_YEARS), index=2, horizontal=True, key="risk_lookback")
+        confidence = st.radio("Confidence", [0.95, 0.99], format_func=lambda c: f"{c:.0%}", horizontal=True, key="risk_confidence")
+        st.caption("Weights are relative (they are normalized to 100%).")
+
+    start = pd.Timestamp.today().normalize() - pd.DateOffset(years=RISK_LOOKBACK_YEARS[risk_lookback])
+    with span("valuation", label="portfolio_risk"):
+        closes = fetch_closes(tickers, start=start)
+        if closes.empty:
+            st.warning("No price history available for the watchlist.")
+            return
+        risk = portfolio_risk(closes, dict(zip(weights_df["Ticker"], weights_df["Weight"])), confidence=confidence)
+    if not risk["days"]:
+        st.warning("Not enough price history to compute portfolio risk.")
+        return
+
+    m1, m2, m3, m4, m5, m6 = st.columns(6)
+    m1.metric("1-Day VaR", f"{risk['var'][1]:.2%}")
+    m2.metric("1-Day CVaR", f"{risk['cvar'][1]:.2%}")
+    m3.metric("10-Day VaR", f"{risk['var'][10]:.2%}")
+    m4.metric("10-Day CVaR", f"{risk['cvar'][10]:.2%}")
+    m5.metric("Volatility (ann.)", f"{risk['volatility']:.2%}")
+    m6.metric("Max Drawdown", f"{risk['max_drawdown']:.2%}", delta=f"{risk['current_drawdown']:.2%} now", delta_color="off")
+    skipped = [t for t in tickers if t not in closes.columns]
+    st.caption(f"Historical simulation over {risk['days']} trading days ({risk['start']:%Y-%m-%d} to {risk['end']:%Y-%m-%d}). "
+               f"VaR is the loss exceeded in only {1 - confidence:.0%} of periods; CVaR is the average loss beyond it."
+               + (f" Skipped (no history): {', '.join(skipped)}." if skipped else ""))
+
+    col_dd, col_contrib = st.columns(2)
+    with col_dd:
+        st.write("**Drawdown**")
+        st.area_chart(risk["drawdown"])
+    with col_contrib:
+        st.write("**Volatility Contribution**")
+        contributions = risk["contributions"]
+        st.bar_chart(contributions["pct_of_risk"])
+        st.dataframe(contributions.style.format({"weight": "{:.1%}", "vol_contribution": "{:.2%}", "pct_of_risk": "{:.1%}"}), use_container_width=True)
+
+
+# --- 6. VERDICT BACKTEST ---
+def render_verdict_backtest(stock):
+    """Replays the trend (and optionally P/E) part of the verdict over the full history (valuora.backtest)."""
+    st.caption("How did the price-based part of the score (trend vs. moving average, P/E bands) do historically? Headlines can't be replayed.")
+    col_ma, col_pe = st.columns(2)
+    ma_window = col_ma.slider("Moving-average window (days)", 10, 200, MA_WINDOW, step=10, key="backtest_ma")
+    use_pe = col_pe.checkbox("Include P/E bands (annual filed EPS)", value=False, key="backtest_pe")
+
+    with span("valuation", label="backtest"):
+        closes = fetch_closes([stock.ticker])
+        if closes.empty:
+            st.info("No price history to backtest.")
+            return
+        eps = pd.DataFrame({stock.ticker: eps_history(stock)}) if use_pe else None
+        result = backtest(closes, ma_window=ma_window, eps=eps)
+
+    buckets = result["buckets"].reset_index()
+    buckets["horizon"] = buckets["horizon"].map(lambda h: f"{h}d")
+    table = buckets.pivot(index="score", columns="horizon", values="mean_return")[[f"{h}d" for h in DEFAULT_HORIZONS]]
+    st.write("**Average forward return by score**")
+    st.dataframe(table.style.format("{:+.2%}").background_gradient(cmap="RdYlGn", axis=None), use_container_width=True)
+
+    hits = result["hit_rates"]
+    cols = st.columns(len(hits) + 1)
+    for col, (h, rate) in zip(cols, hits.items()):
+        col.metric(f"Hit Rate ({h}d)", f"{rate:.1%}" if pd.notna(rate) else "N/A")
+    cols[-1].metric("Signal Flips / Year", f"{result['turnover']['flips_per_year'].iloc[0]:.1f}")
+    st.caption(f"{result['turnover']['days'].iloc[0]:,} trading days scored. Hit rate: share of days where the score's sign matched the forward return's.")
+
+
+# --- 7. HEADLINE ARCHIVE ---
+NEWS_REFRESH_S = 900 # refetch a ticker's Yahoo + Google news at most this often
+ARCHIVE_DAYS = 90
+
+
+def roadmap_news(ticker_symbol):
+    """
+    Roadmap items ({title, link, publisher, time}), newest first. Served from the headline
+    archive, which is topped up from Yahoo and Google News when it is older than NEWS_REFRESH_S.
+    """
+    archive = get_archive()
+    if archive is not None:
+        if not archive.is_fresh(ticker_symbol, NEWS_REFRESH_S, ("yahoo", "google")):
+            fetch_stock_news(ticker_symbol)
+            fetch_google_news_rss(ticker_symbol)
+        return [{
+            'title': row['title'],
+            'link': row['link'],
+            'publisher': row['publisher'] or ('Yahoo Finance' if row['source'] == 'yahoo' else 'Google News'),
+            'time': row['published'],
+        } for row in archive.timeline(ticker_symbol, limit=200)]
+
+    # Archiving is off: merge both live feeds
+    all_news = []
+    seen_links = set()
+    for items, default_publisher in ((fetch_stock_news(ticker_symbol), 'Yahoo Finance'), (fetch_google_news_rss(ticker_symbol), 'Google News')):
+        for item in items:
+            link = item.get('link')
+            if link not in seen_links:
+                all_news.append({
+                    'title': item.get('title'),
+                    'link': link,
+                    'publisher': item.get('publisher', default_publisher),
+                    'time': item.get('providerPublishTime', 0)
+                })
+                seen_links.add(link)
+    all_news.sort(key=lambda x: x['time'], reverse=True)
+    return all_news
+
+
+def render_headline_archive():
+    """Full-text search and volume timeline over every headline the app has fetched (valuora.archive)."""
+    st.subheader("🗄️ Headline Archive")
+    archive = get_archive()
+    if archive is None:
+        st.info("The headline archive is off (VALUORA_NEWS_ARCHIVE).")
+        return
+
+    queries = dict(archive.queries())
+    col_text, col_queries, col_order = st.columns([2, 2, 1])
+    text = col_text.text_input("Search headlines", placeholder="e.g. tariff* chips", key="archive_search")
+    picked = col_queries.multiselect("Tickers / topics", list(queries), format_func=lambda q: f"{q} ({queries[q]})", key="archive_queries")
+    order = col_order.radio("Sort", ["recent", "rank"], format_func=str.title, key="archive_order")
+
+    with span("render", label="headline_archive"):
+        since = time.time() - ARCHIVE_DAYS * 86400
+        counts = archive.daily_counts(since, queries=picked or None)
+        if text.strip():
+            rows = archive.search(text, queries=picked or None, limit=100, order=order)
+        elif picked:
+            rows = sorted((r for q in picked for r in archive.timeline(q, limit=100)), key=lambda r: r['published'], reverse=True)[:100]
+        else:
+            rows = archive.timeline(limit=100)
+
+    st.caption(f"{archive.count():,} headlines archived locally. Words must all match; end one with * to match a prefix.")
+    if counts:
+        volume = pd.Series(counts).rename(index=lambda d: pd.Timestamp(d, unit="s")).sort_index()
+        st.write(f"**Headlines per day (last {ARCHIVE_DAYS} days)**")
+        st.bar_chart(volume)
+    if rows:
+        table = pd.DataFrame(rows)
+        table["published"] = pd.to_datetime(table["published"], unit="s").dt.strftime("%Y-%m-%d %H:%M")
+        st.dataframe(
+            table[["published", "title", "publisher", "source", "link"]].drop_duplicates("link"),
+            column_config={"link": st.column_config.LinkColumn("Source", display_text="Open")},
+            hide_index=True, use_container_width=True,
+        )
+    else:
+        st.info("No archived headlines match.")
+
+
+# --- 8. COMPARISON SNAPSHOT ---
+def render_snapshot_averages(info, is_unprofitable):
+    """Industry-wide (or sector-wide) averages from the nightly comparison snapshot (valuora.snapshots)."""
+    snapshot = get_snapshot()
+    if snapshot is None:
+        return
+    scope = info.get('industry')
+    group = snapshot.averages(industry=scope)
+    if group is None:
+        scope = info.get('sector')
+        group = snapshot.averages(sector=scope)
+    if group is None:
+        return
+    formats = {'P/S': "{:.2f}", 'EV/Revenue': "{:.2f}", 'Rev Growth': "{:.2%}"} if is_unprofitable else \
+        {'P/E': "{:.2f}", 'PEG': "{:.2f}", 'ROE': "{:.2f}", '1Y ROI': "{:.2%}", '5Y ROI': "{:.2%}"}
+    parts = [f"{name} {fmt.format(group[name])}" for name, fmt in formats.items() if pd.notna(group[name])]
+    if parts:
+        st.caption(f"All of {scope} ({int(group['Count'])} tickers, snapshot of {snapshot.date:%Y-%m-%d}): " + " · ".join(parts))
 
 # --- NEW ROBUST DATA FETCHER ---
 @st.cache_resource(ttl=3600)
 def fetch_stock_data_v2(ticker_symbol):
     """
-    Hybrid fetcher: Tries yfinance, fails over to yahooquery.
+    Hybrid fetcher: Tries yfinance, fails over to yahooquery (see valuora.data).
     """
-    session = requests.Session()
-    session.headers.update({
-        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
-    })
-
     try:
-        # --- ATTEMPT 1: yfinance ---
-        # Note: yfinance > 0.2.x now requires curl_cffi session internally to bypass Cloudflare.
-        # Passing a raw requests.Session breaks it. It's safer to let yfinance handle its own session,
-        # but we can pass our standard session to yahooquery if needed.
-        stock = yf.Ticker(ticker_symbol)
-        # Force a test download
-        hist = stock.history(period="1d")
-
-        if not hist.empty:
-            return stock, stock.info
-
-        # --- ATTEMPT 2: yahooquery (The Fail-over) ---
-        st.toast(f"yfinance blocked. Trying backup engine for {ticker_symbol}...")
-        yq = YQTicker(ticker_symbol, session=session)
-        yq_info = yq.all_modules[ticker_symbol]
-
-        # We return a dummy object that mimics the yf.Ticker structure
-        # to avoid breaking the rest of your app.
-        return stock, yq_info
-
+        return fetch_stock_data(
+            ticker_symbol,
+            on_failover=lambda t: st.toast(f"yfinance blocked. Trying backup engine for {t}..."),
+        )
     except Exception as e:
         st.error(f"Macro Data Error: {e}")
         return None, None
@@ -821,7 +754,7 @@ def main_dashboard():
     with st.sidebar:
         st.markdown("# 🌊 Valuora")
     st.sidebar.markdown("# 🧭 **Navigation**")
-    page = st.sidebar.radio("Select Mode:", ["Financial Analysis", "DCF Model", "Valuation Analysis", "Macro Stress Test", "Company Profile & Roadmap"])
+    page = st.sidebar.radio("Select Mode:", ["Financial Analysis", "DCF Model", "Valuation Analysis", "Macro Stress Test", "Company Profile & Roadmap"], key="page")
     
     st.sidebar.markdown("---")
     with st.sidebar:
@@ -907,9 +840,9 @@ def main_dashboard():
         st.markdown(f"**{info.get('longName', ticker_symbol)}** | Made by Om")
         
         with st.spinner("🤖 AI is reading the charts..."):
-            hist = stock.history(period="max") # Fetch max for "All Time" calc
+            hist = fetch_history(stock.ticker, period="max") # Fetch max for "All Time" calc
             chart_hist = hist.tail(504) # 2y for chart
-            news = stock.news
+            news = fetch_stock_news(stock.ticker)
         
         # Header Metrics (Glassmorphism)
         m1, m2, m3, m4 = st.columns(4)
@@ -949,18 +882,23 @@ def main_dashboard():
                 for point in verdict_points:
                     st.markdown(point)
 
+            with st.expander("📈 Backtest the Price Signals"):
+                render_verdict_backtest(stock)
+
         # TAB 2: Chart
         with tabs[1]:
             st.subheader("📊 Price Action")
             if not chart_hist.empty:
-                fig = go.Figure()
-                fig.add_trace(go.Candlestick(x=chart_hist.index,
-                                open=chart_hist['Open'], high=chart_hist['High'],
-                                low=chart_hist['Low'], close=chart_hist['Close'],
-                                name='Price'))
-                chart_hist['MA50'] = chart_hist['Close'].rolling(window=50).mean()
-                fig.add_trace(go.Scatter(x=chart_hist.index, y=chart_hist['MA50'], line=dict(color='#60a5fa', width=2), name='50 MA'))
-                fig.update_layout(template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=500, xaxis_rangeslider_visible=False)
+                with span("charts", label="candlestick"):
+                    import plotly.graph_objects as go
+                    fig = go.Figure()
+                    fig.add_trace(go.Candlestick(x=chart_hist.index,
+                                    open=chart_hist['Open'], high=chart_hist['High'],
+                                    low=chart_hist['Low'], close=chart_hist['Close'],
+                                    name='Price'))
+                    chart_hist['MA50'] = chart_hist['Close'].rolling(window=50).mean()
+                    fig.add_trace(go.Scatter(x=chart_hist.index, y=chart_hist['MA50'], line=dict(color='#60a5fa', width=2), name='50 MA'))
+                    fig.update_layout(template="plotly_dark", plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)', height=500, xaxis_rangeslider_visible=False)
                 st.plotly_chart(fig, use_container_width=True)
             
             # --- Returns Display ---
@@ -1123,42 +1061,15 @@ def main_dashboard():
         # Simpler: Always update persistent defaults when ticker changes? 
         # Complex. For now, I will prioritize fetching on first load or if values are 0.
         
-        latest_fcf = 0.0
-        total_debt = 0.0
-        total_cash = 0.0
-        
         # Only fetch if we haven't set a value yet or it's zero (fresh start)
-        # However, checking against session state:
-        if st.session_state.dcf_fcf == 0.0:
-            try:
-                cashflow = stock.cashflow
-                if not cashflow.empty:
-                    if 'Free Cash Flow' in cashflow.index:
-                            latest_fcf = float(cashflow.loc['Free Cash Flow'].iloc[0])
-                    elif 'Total Cash From Operating Activities' in cashflow.index and 'Capital Expenditures' in cashflow.index:
-                            latest_fcf = float(cashflow.loc['Total Cash From Operating Activities'].iloc[0] + cashflow.loc['Capital Expenditures'].iloc[0])
+        if 0.0 in (st.session_state.dcf_fcf, st.session_state.dcf_debt, st.session_state.dcf_cash):
+            latest_fcf, total_debt, total_cash = get_dcf_inputs(stock)
+            if st.session_state.dcf_fcf == 0.0:
                 st.session_state.dcf_fcf = latest_fcf
-            except: pass
-        
-        if st.session_state.dcf_debt == 0.0:
-            try:
-                bs = stock.balance_sheet
-                if not bs.empty:
-                    if 'Total Debt' in bs.index:
-                        total_debt = float(bs.loc['Total Debt'].iloc[0])
-                    elif 'Long Term Debt' in bs.index:
-                        total_debt = float(bs.loc['Long Term Debt'].iloc[0])
-                    st.session_state.dcf_debt = total_debt
-            except: pass
-            
-        if st.session_state.dcf_cash == 0.0:
-            try:
-                bs = stock.balance_sheet
-                if not bs.empty:
-                    if 'Cash And Cash Equivalents' in bs.index:
-                        total_cash = float(bs.loc['Cash And Cash Equivalents'].iloc[0])
-                    st.session_state.dcf_cash = total_cash
-            except: pass
+            if st.session_state.dcf_debt == 0.0:
+                st.session_state.dcf_debt = total_debt
+            if st.session_state.dcf_cash == 0.0:
+                st.session_state.dcf_cash = total_cash
 
         # Persistence Callback
         def update_dcf_state(key, widget_key):
@@ -1363,27 +1274,18 @@ def main_dashboard():
                 # Try to get DCF inputs from session state or defaults
                 # Use defaults if session state is 0.0 (uninitialized for new ticker logic above)
                 dcf_fcf = st.session_state.get('dcf_fcf', 0.0)
-                if dcf_fcf == 0.0:
-                     # Try auto-fetch again if not set (simple version)
-                     try:
-                        cf_stmt = stock.cashflow
-                        if not cf_stmt.empty and 'Free Cash Flow' in cf_stmt.index:
-                            dcf_fcf = float(cf_stmt.loc['Free Cash Flow'].iloc[0])
-                     except: pass
+                dcf_debt = st.session_state.get('dcf_debt', 0.0)
+                dcf_cash = st.session_state.get('dcf_cash', 0.0)
+                if dcf_fcf == 0.0 or dcf_debt == 0.0:
+                    # Not set on the DCF page yet: same statement lookups it uses
+                    latest_fcf, total_debt, _ = get_dcf_inputs(stock)
+                    dcf_fcf = dcf_fcf or latest_fcf
+                    dcf_debt = dcf_debt or total_debt
                 
                 if dcf_fcf > 0:
                     dcf_growth = st.session_state.get('dcf_growth', 10.0) / 100.0
                     dcf_term = st.session_state.get('dcf_terminal', 2.5) / 100.0
                     dcf_wacc = st.session_state.get('dcf_wacc', 9.0) / 100.0
-                    dcf_debt = st.session_state.get('dcf_debt', 0.0)
-                    dcf_cash = st.session_state.get('dcf_cash', 0.0)
-                    
-                    # If debt/cash are 0, try fetching if not done
-                    if dcf_debt == 0.0:
-                         try: 
-                             bs_stmt = stock.balance_sheet
-                             if not bs_stmt.empty and 'Total Debt' in bs_stmt.index: dcf_debt = float(bs_stmt.loc['Total Debt'].iloc[0])
-                         except: pass
                     
                     shares_out = info.get('sharesOutstanding', 1)
                     
@@ -1581,7 +1483,8 @@ def main_dashboard():
                             "PEG": "{:.2f}",
                             "ROE": "{:.2f}",
                             "1Y ROI": "{:.2%}",
-                            "5Y ROI": "{:.2%}"
+                            "5Y ROI": "{:.2%}",
+                            "Relevance": "{:.2f}"
                         }).apply(lambda x: ['background-color: #facc15; color: black; font-weight: bold;' if x['Ticker'] == ticker_symbol else '' for i in x], axis=1)
                     )
                     
@@ -1608,12 +1511,14 @@ def main_dashboard():
                     st.markdown("---")
 
                     # --- Industry Averages Section ---
+                    # Peers only, weighted by each one's relevance to the ticker (valuora.peers)
                     st.markdown("#### 📊 Industry Averages")
+                    averages = peer_averages(comp_df, exclude=ticker_symbol)
                     
                     if is_unprofitable:
-                        avg_ps = comp_df['P/S'].mean()
-                        avg_ev_rev = comp_df['EV/Revenue'].mean()
-                        avg_rev_g = comp_df['Rev Growth'].mean()
+                        avg_ps = averages['P/S']
+                        avg_ev_rev = averages['EV/Revenue']
+                        avg_rev_g = averages['Rev Growth']
                         
                         c_avg1, c_avg2, c_avg3 = st.columns(3)
                         with c_avg1:
@@ -1624,11 +1529,11 @@ def main_dashboard():
                              display_custom_metric("Avg Rev Growth", f"{avg_rev_g:.2%}" if not pd.isna(avg_rev_g) else "N/A")
                     else:
                         # Calculate Averages
-                        avg_pe = comp_df['P/E'].mean()
-                        avg_peg = comp_df['PEG'].mean()
-                        avg_roe = comp_df['ROE'].mean()
-                        avg_1y = comp_df['1Y ROI'].mean()
-                        avg_5y = comp_df['5Y ROI'].mean()
+                        avg_pe = averages['P/E']
+                        avg_peg = averages['PEG']
+                        avg_roe = averages['ROE']
+                        avg_1y = averages['1Y ROI']
+                        avg_5y = averages['5Y ROI']
                         
                         # Display Averages
                         c_avg1, c_avg2, c_avg3, c_avg4, c_avg5 = st.columns(5)
@@ -1642,6 +1547,8 @@ def main_dashboard():
                             display_custom_metric("Avg 1Y ROI", f"{avg_1y:.2%}" if not pd.isna(avg_1y) else "N/A")
                         with c_avg5:
                             display_custom_metric("Avg 5Y ROI", f"{avg_5y:.2%}" if not pd.isna(avg_5y) else "N/A")
+
+                    render_snapshot_averages(info, is_unprofitable)
                     
                     st.markdown("---")
 
@@ -1655,8 +1562,6 @@ def main_dashboard():
                         if is_unprofitable:
                             main_ps = main_row.iloc[0]['P/S']
                             main_rev_g = main_row.iloc[0]['Rev Growth']
-                            avg_ps = comp_df['P/S'].mean()
-                            avg_rev_g = comp_df['Rev Growth'].mean()
                             
                             if not pd.isna(main_ps) and not pd.isna(avg_ps):
                                 with st.container():
@@ -1742,6 +1647,9 @@ def main_dashboard():
         else:
             st.info("No specific competitors mapped for this sector.")
 
+        st.markdown("---")
+        render_portfolio_risk()
+
         st.markdown("---")
         st.subheader("📚 Understanding the PEG Ratio")
         st.markdown("""
@@ -1758,7 +1666,12 @@ def main_dashboard():
     elif page == "Macro Stress Test":
         st.markdown('<div class="fun-header">🌍 Geopolitical Command Center</div>', unsafe_allow_html=True)
 
-        current_prices, hist_macro = fetch_macro_command_center()
+        current_prices, hist_macro, fetched_at = fetch_macro_command_center()
+        if fetched_at:
+            age_min = (time.time() - fetched_at) / 60
+            st.caption(f"🕒 Macro data as of {datetime.fromtimestamp(fetched_at).strftime('%Y-%m-%d %H:%M:%S')} ({age_min:.0f} min ago, refreshed in the background)")
+        else:
+            st.caption("🕒 Macro data unavailable; showing defaults until the background refresh succeeds.")
         oil_price = current_prices.get("Crude Oil (WTI)", 0)
         if oil_price is None:
             oil_price = 0
@@ -1784,13 +1697,19 @@ def main_dashboard():
         bench_df = pd.DataFrame([current_prices]).T.rename(columns={0: "Current Price"})
         st.dataframe(bench_df.style.format("${:,.2f}"), use_container_width=True)
 
+        # Longer lookbacks come from the local macro history store (no extra download)
+        lookback = st.radio("Lookback", list(LOOKBACKS), horizontal=True, key="macro_lookback")
+        if lookback != "60d":
+            hist_macro = get_macro_store().history(lookback)
+
         if not hist_macro.empty:
             # --- 60-DAY LINE CHART FIX ---
-            st.subheader("📈 60-Day Macro Trajectory")
+            st.subheader(f"📈 {lookback.upper() if lookback != '60d' else '60-Day'} Macro Trajectory")
 
             # Clean the data: drop NaNs so the lines are continuous
-            chart_data = (hist_macro / hist_macro.iloc[0]) * 100
-            chart_data = chart_data.interpolate(method='linear').ffill().bfill()
+            with span("charts", label="macro_trajectory"):
+                chart_data = (hist_macro / hist_macro.bfill().iloc[0]) * 100 # series start on different days over long lookbacks
+                chart_data = chart_data.interpolate(method='linear').ffill().bfill()
             st.line_chart(chart_data)
             st.caption("Normalized Growth Index (Base 100). All assets synced to S&P 500 timeframe.")
 
@@ -1819,21 +1738,49 @@ def main_dashboard():
                     if not pd.isna(gold_spx_corr) and gold_spx_corr < 0:
                         st.success(f"🛡️ **Safe Haven Confirmation:** Gold is negatively correlated with stocks ({gold_spx_corr:.2f}). Gold is effectively acting as a hedge during this period of instability.")
 
+            # --- CORRELATION OVER TIME ---
+            st.write("**Correlation Over Time (daily returns)**")
+            col_win, col_hl = st.columns(2)
+            corr_window = col_win.select_slider("Rolling window (days)", options=[20, 60, 120, 250], value=60, key="macro_corr_window")
+            corr_halflife = col_hl.select_slider("EWMA half-life (days)", options=[10, 30, 60, 120], value=30, key="macro_corr_halflife")
+
+            with span("charts", label="macro_correlation"):
+                # Run over the selected lookback plus enough earlier stored history to warm up
+                # the window / EWMA (older days weigh < 2^-EWM_WARMUP_HALFLIVES), then show
+                # only the lookback
+                full_hist = get_macro_store().history("max")
+                if full_hist.empty:
+                    full_hist = hist_macro
+                warmup = max(corr_window, EWM_WARMUP_HALFLIVES * corr_halflife) + 1
+                start = max(int(full_hist.index.searchsorted(hist_macro.index.min())) - warmup, 0)
+                returns = to_returns(full_hist.iloc[start:])
+                pairs = [("Crude Oil (WTI)", "S&P 500"), ("Gold", "S&P 500")]
+                values = returns.to_numpy()
+                corr_over_time = pd.concat([
+                    pair_series(rolling_corr(values, corr_window), returns.index, list(returns.columns), pairs).add_suffix(f" ({corr_window}d rolling)"),
+                    pair_series(ewm_corr(values, corr_halflife), returns.index, list(returns.columns), pairs).add_suffix(f" (EWMA {corr_halflife}d)"),
+                ], axis=1)
+                corr_over_time = corr_over_time[corr_over_time.index >= hist_macro.index.min()].dropna(how="all")
+
+            if corr_over_time.empty:
+                st.caption("Not enough history for a rolling correlation yet.")
+            else:
+                st.line_chart(corr_over_time)
+                st.caption("Rolling: equal weight over the trailing window. EWMA: recent days weigh more, so regime shifts show up sooner.")
+
             st.markdown("---")
 
+        # --- SHOCK SCENARIOS (WATCHLIST) ---
+        render_shock_scenarios()
+        st.markdown("---")
+
         # --- GEOPOLITICAL CHOKEPOINTS + AI NEWS ---
         st.subheader("🚩 Active Geopolitical Intelligence")
 
-        chokepoints = {
-            "Strait of Hormuz": "Strait of Hormuz Iran blockade",
-            "Suez Canal": "Suez Canal Red Sea shipping",
-            "Malacca Strait": "Malacca Strait shipping news"
-        }
-
-        for name, query in chokepoints.items():
+        for name, query in CHOKEPOINTS.items():
             with st.container():
                 st.markdown(f"#### 🚢 {name}")
-                news_items = fetch_google_news_rss(query)
+                news_items = dedupe(fetch_google_news_rss(query))
 
                 # AI SUMMARY BLOCK
                 ai_sum = get_ai_geopol_summary(name, news_items)
@@ -1886,47 +1833,10 @@ def main_dashboard():
         st.markdown("Recent events shaping the company's future:")
         
         with st.spinner("Fetching latest news..."):
-            # 1. Get Yahoo News
-            yahoo_news = []
-            try:
-                yahoo_news = stock.news
-            except:
-                pass
-            
-            # 2. Get Google RSS News (Fallback/Supplement)
-            google_news = fetch_google_news_rss(ticker_symbol)
-            
-            # 3. Combine & Sort
-            all_news = []
-            seen_links = set()
-            
-            # Process Yahoo
-            for item in yahoo_news:
-                link = item.get('link')
-                if link not in seen_links:
-                    all_news.append({
-                        'title': item.get('title'),
-                        'link': link,
-                        'publisher': item.get('publisher', 'Yahoo Finance'),
-                        'time': item.get('providerPublishTime', 0)
-                    })
-                    seen_links.add(link)
-            
-            # Process Google
-            for item in google_news:
-                link = item.get('link')
-                if link not in seen_links:
-                    all_news.append({
-                        'title': item.get('title'),
-                        'link': link,
-                        'publisher': item.get('publisher', 'Google News'),
-                        'time': item.get('providerPublishTime', 0)
-                    })
-                    seen_links.add(link)
-            
-            # Sort by time descending
+            # One entry per story: syndicated copies fold into the outlet that ran it first
+            all_news = dedupe(roadmap_news(ticker_symbol), time_key='time')
             all_news.sort(key=lambda x: x['time'], reverse=True)
-            
+
             # Filter Logic: Top 2 stories per date
             filtered_news = []
             news_by_date_count = {}
@@ -1953,10 +1863,12 @@ def main_dashboard():
                     except:
                         pub_time = "Recent"
                     
+                    others = list(dict.fromkeys(o['publisher'] for o in item['similar'] if o['publisher'] != item['publisher']))
+                    also = f" (also: {', '.join(others[:3])}{'…' if len(others) > 3 else ''})" if others else ""
                     st.markdown(f"""
                     <div class="timeline-item">
                         <div class="timeline-dot"></div>
-                        <div class="timeline-date">{pub_time} • {item['publisher']}</div>
+                        <div class="timeline-date">{pub_time} • {item['publisher']}{also}</div>
                         <div class="timeline-content">
                             <strong>{item['title']}</strong><br>
                             <a href="{item['link']}" target="_blank" style="color: #60a5fa; text-decoration: none; font-size: 0.9em;">Read Source →</a>
@@ -1966,59 +1878,36 @@ def main_dashboard():
             else:
                 st.info("No recent news found from major sources.")
 
-# --- Helper Function: Mock AI Analysis ---
-def generate_ai_verdict(info, news, history):
-    verdict = []
-    sentiment_score = 0 # Range roughly -3 to +3
-    
-    # 1. Valuation Check
-    pe = info.get('trailingPE')
-    if pe is not None:
-        if pe < 15:
-            verdict.append(f"🟢 **Value Opportunity:** P/E of {pe:.2f} suggests it's cheap relative to earnings.")
-            sentiment_score += 1
-        elif pe > 50:
-            verdict.append(f"🔥 **Hot / Expensive:** P/E of {pe:.2f} is very high. Priced for perfection.")
-            sentiment_score -= 1
-        else:
-            verdict.append(f"⚖️ **Fairly Valued:** P/E of {pe:.2f} is standard.")
-    
-    # 2. Trend Check
-    if not history.empty:
-        current_price = history['Close'].iloc[-1]
-        ma_50 = history['Close'].tail(50).mean()
-        if current_price > ma_50:
-             verdict.append(f"🚀 **Momentum:** Trading ABOVE the 50-day moving average. Bulls are in control.")
-             sentiment_score += 1
-        else:
-             verdict.append(f"📉 **Downtrend:** Trading BELOW the 50-day moving average. Caution advised.")
-             sentiment_score -= 1
-    
-    # 3. Political/Trend Scan
-    political_keywords = ['election', 'regulation', 'tariff', 'congress', 'senate', 'biden', 'trump', 'policy', 'tax', 'lawsuit', 'antitrust']
-    found_political = False
-    
-    verdict.append("\n**🗞️ News Scanner:**")
-    if news:
-        for article in news[:5]:
-            title = article.get('title', '').lower()
-            if any(word in title for word in political_keywords):
-                verdict.append(f"- ⚠️ **Political Radar:** \"{article['title']}\"")
-                found_political = True
-                sentiment_score -= 0.5 # Slight penalty for uncertainty
-    
-    if not found_political:
-        verdict.append("- 🛡️ **Clear Skies:** No major political red flags in top headlines.")
-        sentiment_score += 0.5
-
-    return verdict, sentiment_score
+        st.markdown("---")
+        render_headline_archive()
 
 # --- CONTROLLER ---
 if __name__ == "__main__":
     if 'splash_complete' not in st.session_state:
         st.session_state.splash_complete = False
 
+    # Prometheus exporter (no-op unless VALUORA_METRICS_PORT / VALUORA_METRICS_FILE is set)
+    metrics.start_from_env()
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    metrics.touch_session(st.session_state.session_id)
+
+    # Warm the macro snapshot in the background (no-op after the first run in this process)
+    macro_refresher()
+
     if not st.session_state.splash_complete:
         splash_screen()
     else:
-        main_dashboard()
+        # Opt-in profiling: VALUORA_PROFILE=cprofile|sample, or ?profile=cprofile|sample with VALUORA_PROFILE_ALLOW=1
+        profile_mode = profiling.requested_mode(st.query_params.get("profile"))
+        t0 = time.perf_counter()
+        try:
+            with profiling.profile_run(st.session_state.get("page", "Financial Analysis"), profile_mode) as profile:
+                main_dashboard()
+        finally:
+            # The whole rerun, fetch and compute included (those are also their own stages)
+            record("rerun", time.perf_counter() - t0, label=st.session_state.get("page"))
+        if profile:
+            st.sidebar.caption(f"🔬 Profile saved: `{profile['artifact']}`")
+        if debug_mode():
+            render_debug_panel()
@@ -0,0 +1,93 @@
+"""
+Import-time budget check for the Streamlit entry point.
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter, next to a bare
+`import streamlit` baseline (streamlit's own cost is outside our control), and fails if
+  1. app.py pulls in any of the deferred heavy modules (yfinance, plotly.graph_objects,
+     yahooquery) beyond what streamlit itself already loads, or
+  2. the import cost app.py adds on top of streamlit is over the budget.
+
+Usage:
+    python benchmarks/import_time.py              # default budget
+    python benchmarks/import_time.py --budget-ms 400 --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must NOT be loaded just by importing the entry point
+DEFERRED_MODULES = ["yfinance", "plotly.graph_objects", "yahooquery"]
+
+# Budget for what `import app` costs on top of `import streamlit`
+# (mostly pandas + numpy, which every page needs)
+DEFAULT_BUDGET_MS = 650
+
+
+def measure_imports(statement="import app"):
+    """
+    Runs the statement under -X importtime in a subprocess.
+    Returns: list of (module, self_us, cumulative_us) in import order.
+    """
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"'{statement}' failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, self_us, cum_us, name = [p.strip() for p in line.replace("import time:", "|", 1).split("|")]
+            rows.append((name, int(self_us), int(cum_us)))
+        except ValueError:
+            pass
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the cold import budget of app.py")
+    parser.add_argument("--budget-ms", type=float, default=float(os.environ.get("VALUORA_IMPORT_BUDGET_MS", DEFAULT_BUDGET_MS)))
+    parser.add_argument("--top", type=int, default=10, help="Show the N slowest top-level imports")
+    args = parser.parse_args(argv)
+
+    baseline = measure_imports("import streamlit")
+    rows = measure_imports("import app")
+
+    baseline_ms = sum(self_us for _, self_us, _ in baseline) / 1000
+    total_ms = sum(self_us for _, self_us, _ in rows) / 1000
+    overhead_ms = total_ms - baseline_ms
+
+    baseline_names = {name for name, _, _ in baseline}
+    added = [r for r in rows if r[0] not in baseline_names]
+    added_names = {name for name, _, _ in added}
+    leaked = [m for m in DEFERRED_MODULES if m in added_names]
+
+    print(f"import streamlit: {baseline_ms:.0f} ms")
+    print(f"import app:       {total_ms:.0f} ms (+{overhead_ms:.0f} ms, budget +{args.budget_ms:.0f} ms)")
+    print(f"Slowest {args.top} imports added by app (cumulative):")
+    for name, _, cum in sorted(added, key=lambda r: r[2], reverse=True)[: args.top]:
+        print(f"  {cum / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if leaked:
+        print(f"FAIL: deferred modules imported at startup: {', '.join(leaked)}")
+        failed = True
+    if overhead_ms > args.budget_ms:
+        print(f"FAIL: app adds {overhead_ms:.0f} ms of imports, over budget")
+        failed = True
+
+    if not failed:
+        print("OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
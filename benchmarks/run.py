@@ -0,0 +1,402 @@
+"""
+Benchmark suite for the fetch, compute and render hot paths (asv-style, no network).
+
+Everything runs against replay fixtures (valuora.providers.ReplayProvider): either a
+recorded fixture directory or, by default, deterministic synthetic fixtures generated
+on the fly (benchmarks/synthetic.py).
+
+Benchmarks:
+    compute.*  calculate_dcf_value, get_valuation_data, classify_cash_position, generate_ai_verdict,
+               rolling / EWMA correlation matrices (48 series x 10y of daily returns),
+               shock scenarios (betas for 100 tickers x 5y, 20 scenarios),
+               portfolio VaR/CVaR and verdict backtest (200 names x 10y),
+               peer index lookups (3000-ticker universe, in and outside the index)
+    fetch.*    fetch_comparison_data (live, and with peers from a comparison snapshot),
+               fetch_macro_context with a forced history top-up + correlation matrix
+    parse.*    fetch_google_news_rss (100-item feed), headline tagging, sentiment scoring,
+               near-duplicate clustering and extractive summary (10k uncached headlines)
+    archive.*  headline archive search and timeline (200k headlines under 100 queries)
+    page.*     a full rerun of every sidebar mode through streamlit's AppTest, cold (caches
+               cleared) and warm
+
+Results are saved to benchmarks/results/<commit>.json so runs can be compared:
+
+    python benchmarks/run.py                          # run all, save results for HEAD
+    python benchmarks/run.py --filter compute --no-save
+    python benchmarks/run.py --fixtures fixtures/ --latency-ms 80
+    python benchmarks/run.py --compare 8dd6da1 HEAD   # or two result file paths
+"""
+import argparse
+import functools
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(BENCH_DIR)
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+sys.path.insert(0, REPO_ROOT)
+
+MAIN_TICKER = "AAPL"
+PAGES = ["Financial Analysis", "DCF Model", "Valuation Analysis", "Macro Stress Test", "Company Profile & Roadmap"]
+
+# Ratio beyond which --compare flags a change
+SIGNIFICANT_CHANGE = 0.10
+
+
+def time_callable(fn, repeat=5, target_s=0.2, max_number=10000):
+    """
+    timeit-style timing: picks a loop count so each repeat takes ~target_s / repeat,
+    then returns per-call seconds for every repeat.
+    """
+    fn() # warmup
+    t0 = time.perf_counter()
+    fn()
+    single = max(time.perf_counter() - t0, 1e-7)
+    number = int(min(max_number, max(1, math.ceil(target_s / repeat / single))))
+
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            fn()
+        samples.append((time.perf_counter() - t0) / number)
+    return samples
+
+
+def summarize(samples):
+    return {
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "runs": len(samples),
+    }
+
+
+# --- Benchmark definitions ---
+def function_benchmarks():
+    """
+    name -> setup(), which builds the fixtures that benchmark needs (each shared fixture
+    once) and returns the zero-arg callable to time. Replay fixtures must already be active.
+    """
+    import numpy as np
+    import pandas as pd
+    from valuora.correlation import ewm_corr, rolling_corr
+    from valuora.archive import HeadlineArchive
+    from valuora.backtest import backtest
+    from valuora.risk import portfolio_risk
+    from valuora.scenarios import FACTORS, complete_shocks, estimate_betas, factor_moves, project
+    from valuora.dedup import cluster_titles
+    from valuora.data import fetch_comparison_data, fetch_google_news_rss, fetch_stock_data, get_competitors
+    from valuora.macro import CHOKEPOINTS, fetch_macro_context, get_macro_store
+    from valuora.peers import FEATURES, PeerIndex
+    from valuora.snapshots import snapshot_rows, write_snapshot
+    from valuora.sentiment import SentimentScorer
+    from valuora.signals import generate_ai_verdict
+    from valuora.summarize import summarize_headlines
+    from valuora.tagging import HeadlineTagger
+    from valuora.valuation import calculate_dcf_value, classify_cash_position, get_valuation_data
+
+    feed_query = next(iter(CHOKEPOINTS.values()))
+    # Every generated fixture has its own seed, so its data doesn't depend on --filter
+    rng = np.random.default_rng
+
+    @functools.cache
+    def stock_data():
+        stock, info = fetch_stock_data(MAIN_TICKER)
+        return stock, info, stock.news, stock.history(period="max")
+
+    @functools.cache
+    def peers():
+        return get_competitors(MAIN_TICKER, stock_data()[1])[1]
+
+    @functools.cache
+    def returns():
+        return rng(0).normal(0, 0.01, size=(2520, 48))
+
+    @functools.cache
+    def scenario_data():
+        r = rng(1)
+        dates = pd.bdate_range(end="2025-06-30", periods=1260)
+        macro = pd.DataFrame(np.exp(np.cumsum(r.normal(0, 0.01, (1260, len(FACTORS))), axis=0)), index=dates, columns=FACTORS)
+        closes = pd.DataFrame(np.exp(np.cumsum(r.normal(0, 0.02, (1260, 100)), axis=0)), index=dates)
+        scenarios = {f"s{i}": {FACTORS[i % len(FACTORS)]: 10.0, FACTORS[(i + 3) % len(FACTORS)]: -5.0} for i in range(20)}
+        return closes, macro, scenarios
+
+    @functools.cache
+    def risk_data():
+        r = rng(2)
+        closes = pd.DataFrame(np.exp(np.cumsum(r.normal(0, 0.02, (2520, 200)), axis=0)),
+                              index=pd.bdate_range(end="2025-06-30", periods=2520))
+        return closes, dict(zip(closes.columns, r.uniform(0, 1, 200)))
+
+    @functools.cache
+    def peer_index():
+        r = rng(3)
+        universe_size = 3000
+        sectors = r.integers(0, 11, universe_size)
+        universe = pd.DataFrame({name: np.exp(r.normal(3, 1, universe_size)) for name in FEATURES})
+        universe.insert(0, "ticker", [f"P{i:04d}" for i in range(universe_size)])
+        universe.insert(1, "sector", [f"Sector {s}" for s in sectors])
+        universe.insert(2, "industry", [f"Industry {s}.{r.integers(0, 6)}" for s in sectors])
+        closes = pd.DataFrame(np.exp(np.cumsum(r.normal(0, 0.01, (300, universe_size)), axis=0)),
+                              index=pd.bdate_range(end="2025-06-30", periods=300), columns=universe["ticker"])
+        return PeerIndex.build(universe, closes)
+
+    @functools.cache
+    def macro_store():
+        """The macro history store after its first (full) download, made outside the timing."""
+        store = get_macro_store()
+        store.refresh()
+        return store
+
+    @functools.cache
+    def feed():
+        return fetch_google_news_rss.__wrapped__(feed_query)
+
+    @functools.cache
+    def headlines():
+        return [f"{item['title']} #{i}" for i in range(100) for item in feed()][:10_000]
+
+    @functools.cache
+    def archive():
+        """(archive of 200k headlines under 100 queries, a word to search for)."""
+        r = rng(4)
+        archive = HeadlineArchive(os.path.join(tempfile.mkdtemp(prefix="valuora-archive-"), "headlines.sqlite"))
+        words = np.array(sorted({w for item in feed() for w in item["title"].split() if w.isalpha()}))
+        for q in range(100):
+            archive.record([{
+                "title": " ".join(r.choice(words, 10)),
+                "link": f"https://example.com/{q}/{i}",
+                "publisher": "Bench Wire",
+                "providerPublishTime": 1.6e9 + 60.0 * (q * 2000 + i),
+            } for i in range(2000)], query=f"Q{q}", source="google")
+        return archive, str(words[0])
+
+    @functools.cache
+    def snapshot_root():
+        root = tempfile.mkdtemp(prefix="valuora-snapshots-")
+        write_snapshot(root, snapshot_rows(peers(), workers=1))
+        return root
+
+    def bench(fn, *fixtures):
+        """setup() building `fixtures` and returning fn bound to their values."""
+        def setup():
+            values = [fixture() for fixture in fixtures]
+            return lambda: fn(*values)
+        return setup
+
+    def comparison_from_snapshot(root, peers):
+        os.environ["VALUORA_SNAPSHOTS"] = root
+        try:
+            return fetch_comparison_data.__wrapped__(MAIN_TICKER, peers)
+        finally:
+            del os.environ["VALUORA_SNAPSHOTS"]
+
+    def shock_scenarios(data):
+        closes, macro, scenarios = data
+        betas, _ = estimate_betas(closes, macro)
+        return project(betas, complete_shocks(scenarios, factor_moves(macro)))
+
+    def macro_with_corr(store, period):
+        # Age the store past STORE_MAX_AGE_S so fetch_macro_context makes its top-up
+        # download (through the replay provider) instead of just reading the pickle
+        os.utime(store.path, (0, 0))
+        _, hist_macro = fetch_macro_context.__wrapped__(period)
+        return hist_macro.corr()
+
+    outside_info = {"sector": "Sector 3", "industry": "Industry 3.1", "marketCap": 25.0, "trailingPE": 18.0}
+
+    return {
+        "compute.calculate_dcf_value": bench(lambda: calculate_dcf_value(1.0e11, 0.10, 0.025, 0.09, 1.0e10, 5.0e10, 1.5e10)),
+        "compute.get_valuation_data": bench(lambda s: get_valuation_data(s[0], s[1]), stock_data),
+        "compute.classify_cash_position": bench(lambda s: classify_cash_position(s[0]), stock_data),
+        "compute.generate_ai_verdict": bench(lambda s: generate_ai_verdict(s[1], s[2], s[3]), stock_data),
+        "compute.rolling_corr": bench(lambda r: rolling_corr(r, 60), returns),
+        "compute.ewm_corr": bench(lambda r: ewm_corr(r, 30), returns),
+        "compute.shock_scenarios": bench(shock_scenarios, scenario_data),
+        "compute.portfolio_risk": bench(lambda d: portfolio_risk(d[0], d[1], confidence=0.99), risk_data),
+        "compute.backtest": bench(lambda d: backtest(d[0]), risk_data),
+        "compute.peers_lookup": bench(lambda index: index.peers("P0042", k=5), peer_index),
+        "compute.peers_query": bench(lambda index: index.peers("OUTSIDE", k=5, info=outside_info), peer_index),
+        "compute.peer_relevance": bench(lambda index: index.relevance("P0042", ["P0001", "P0002", "P0003", "P0004", "P0005"]), peer_index),
+        "fetch.fetch_comparison_data": bench(lambda p: fetch_comparison_data.__wrapped__(MAIN_TICKER, p), peers),
+        "fetch.fetch_comparison_data_snapshot": bench(comparison_from_snapshot, snapshot_root, peers),
+        "fetch.fetch_macro_context+corr": bench(lambda store: macro_with_corr(store, "60d"), macro_store),
+        "fetch.fetch_macro_context_5y+corr": bench(lambda store: macro_with_corr(store, "5y"), macro_store),
+        "parse.fetch_google_news_rss": bench(lambda: fetch_google_news_rss.__wrapped__(feed_query)),
+        "parse.tag_headlines": bench(lambda h: HeadlineTagger().tag_many(h), headlines),
+        "parse.score_sentiment": bench(lambda h: SentimentScorer().score_many(h), headlines),
+        "parse.cluster_headlines": bench(cluster_titles, headlines),
+        "parse.summarize_headlines": bench(lambda h: summarize_headlines.__wrapped__(h, k=3), headlines),
+        "archive.search": bench(lambda a: a[0].search(a[1]), archive),
+        "archive.search_ranked": bench(lambda a: a[0].search(a[1], order="rank"), archive),
+        "archive.search_query": bench(lambda a: a[0].search(a[1], queries=["Q7"]), archive),
+        "archive.timeline": bench(lambda a: a[0].timeline("Q7", limit=200), archive),
+    }
+
+
+def page_benchmarks(repeat, selected):
+    """Times full reruns of each sidebar mode through AppTest. Returns name -> samples."""
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+
+    from valuora.cache import clear_all
+
+    at = AppTest.from_file(os.path.join(REPO_ROOT, "app.py"), default_timeout=120)
+    at.session_state["splash_complete"] = True
+    at.run()
+    at.sidebar.text_input[0].set_value(MAIN_TICKER)
+    at.button[0].click()
+    at.run()
+    if at.exception:
+        raise RuntimeError(f"app failed to load {MAIN_TICKER}: {at.exception[0].value}")
+
+    results = {}
+    for page in PAGES:
+        slug = page.lower().replace(" & ", "_").replace(" ", "_")
+        for mode in ("cold", "warm"):
+            name = f"page.{slug}.{mode}"
+            if not selected(name):
+                continue
+            at.sidebar.radio[0].set_value(page)
+            at.run() # navigate (untimed)
+            samples = []
+            for _ in range(repeat):
+                if mode == "cold":
+                    clear_all()
+                    st.cache_data.clear()
+                t0 = time.perf_counter()
+                at.run()
+                samples.append(time.perf_counter() - t0)
+                if at.exception:
+                    raise RuntimeError(f"{page} raised: {at.exception[0].value}")
+            results[name] = samples
+    return results
+
+
+# --- Results storage / comparison ---
+def current_commit():
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+        return f"{sha}-dirty" if dirty else sha
+    except Exception:
+        return "unknown"
+
+
+def resolve_results(ref):
+    """A results file path, or a commit-ish whose results were saved in benchmarks/results/."""
+    if os.path.exists(ref):
+        return ref
+    try:
+        ref = subprocess.run(["git", "rev-parse", "--short", ref], cwd=REPO_ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        pass
+    path = os.path.join(RESULTS_DIR, f"{ref}.json")
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"no saved results for '{ref}' ({path})")
+    return path
+
+
+def compare(base_ref, new_ref):
+    with open(resolve_results(base_ref)) as f:
+        base = json.load(f)
+    with open(resolve_results(new_ref)) as f:
+        new = json.load(f)
+
+    print(f"{'benchmark':45} {base['commit']:>14} {new['commit']:>14}   ratio")
+    for name in sorted(set(base["results"]) | set(new["results"])):
+        b = base["results"].get(name, {}).get("median")
+        n = new["results"].get(name, {}).get("median")
+        if b is None or n is None:
+            print(f"{name:45} {_fmt(b):>14} {_fmt(n):>14}")
+            continue
+        ratio = n / b if b else float("inf")
+        flag = ""
+        if ratio > 1 + SIGNIFICANT_CHANGE:
+            flag = "  SLOWER"
+        elif ratio < 1 - SIGNIFICANT_CHANGE:
+            flag = "  faster"
+        print(f"{name:45} {_fmt(b):>14} {_fmt(n):>14}   {ratio:5.2f}x{flag}")
+
+
+def _fmt(seconds):
+    if seconds is None:
+        return "-"
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.2f} s"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valuora benchmark suite (offline fixtures)")
+    parser.add_argument("--fixtures", help="Recorded fixture directory (default: synthetic fixtures)")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Injected replay latency per upstream call")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-pages", action="store_true", help="Skip the AppTest page reruns")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--output", help="Results file (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="Compare two saved runs and exit")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+
+    from valuora.providers import ReplayProvider, set_provider
+
+    fixtures = args.fixtures
+    if not fixtures:
+        from synthetic import generate
+        fixtures = generate(tempfile.mkdtemp(prefix="valuora-fixtures-"))
+    set_provider(ReplayProvider(fixtures, latency_ms=args.latency_ms))
+    # Keep the macro history store out of ~/.cache (and start it empty, like a fresh host)
+    os.environ["VALUORA_MACRO_STORE"] = os.path.join(tempfile.mkdtemp(prefix="valuora-macro-"), "macro_history.pkl")
+    os.environ["VALUORA_NEWS_ARCHIVE"] = os.path.join(tempfile.mkdtemp(prefix="valuora-archive-"), "headlines.sqlite")
+    # Peers are fetched live unless a benchmark opts into a comparison snapshot
+    os.environ.pop("VALUORA_SNAPSHOTS", None)
+
+    selected = lambda name: args.filter in name
+    results = {}
+
+    for name, setup in function_benchmarks().items():
+        if selected(name):
+            results[name] = summarize(time_callable(setup(), repeat=args.repeat))
+            print(f"{name:45} {_fmt(results[name]['median']):>12}  (min {_fmt(results[name]['min'])})")
+
+    if not args.no_pages:
+        for name, samples in page_benchmarks(args.repeat, selected).items():
+            results[name] = summarize(samples)
+            print(f"{name:45} {_fmt(results[name]['median']):>12}  (min {_fmt(results[name]['min'])})")
+
+    if not args.no_save and results:
+        commit = current_commit()
+        output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        with open(output, "w") as f:
+            json.dump({
+                "commit": commit,
+                "timestamp": time.time(),
+                "python": platform.python_version(),
+                "machine": platform.platform(),
+                "fixtures": "synthetic" if not args.fixtures else os.path.abspath(args.fixtures),
+                "latency_ms": args.latency_ms,
+                "results": results,
+            }, f, indent=1, sort_keys=True)
+        print(f"results saved to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
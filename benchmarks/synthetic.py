@@ -0,0 +1,140 @@
+"""
+Deterministic synthetic fixtures in the valuora.providers replay format.
+
+Recorded fixtures (python -m valuora.providers record ...) are the real thing, but they
+need network access once. These are generated from a fixed seed, so benchmark numbers
+are comparable across machines and commits without any recording step.
+
+Usage:
+    python benchmarks/synthetic.py fixtures-synthetic/
+"""
+import os
+import sys
+from email.utils import format_datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from valuora.data import GAP_PERIODS  # noqa: E402
+from valuora.macro import CHOKEPOINTS, MACRO_TICKERS  # noqa: E402
+from valuora.providers import FixtureStore  # noqa: E402
+
+# Main ticker + its Technology peers (and the ADBE filler get_competitors adds)
+DEFAULT_TICKERS = ["AAPL", "MSFT", "NVDA", "GOOGL", "ORCL", "ADBE"]
+
+HISTORY_DAYS = 11000  # ~44 years of trading days for period="max"
+PERIOD_DAYS = {"1d": 1, "3mo": 63, "5y": 1260}
+MACRO_DAYS = 6500  # ~25 years of macro closes
+RSS_ITEMS = 100
+NEWS_ITEMS = 20
+
+HEADLINE_WORDS = ["earnings", "beats", "misses", "guidance", "tariff", "lawsuit", "AI", "chip", "demand",
+                  "shipping", "oil", "rally", "selloff", "upgrade", "downgrade", "regulation", "record", "supply"]
+
+
+def _history(rng, days, start_price):
+    index = pd.bdate_range(end="2025-06-30", periods=days, tz="America/New_York")
+    close = start_price * np.exp(np.cumsum(rng.normal(0.0004, 0.018, days)))
+    open_ = close * (1 + rng.normal(0, 0.004, days))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.006, days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.006, days)))
+    dividends = np.where(rng.random(days) < 0.016, np.round(rng.uniform(0.1, 0.3, days), 2), 0.0)
+    splits = np.zeros(days)
+    splits[rng.integers(0, days, 2)] = 2.0
+    return pd.DataFrame({
+        "Open": open_, "High": high, "Low": low, "Close": close,
+        "Volume": rng.integers(1_000_000, 90_000_000, days),
+        "Dividends": dividends, "Stock Splits": splits,
+    }, index=index.rename("Date"))
+
+
+def _statements(rng):
+    dates = pd.to_datetime(["2024-09-30", "2023-09-30", "2022-09-30", "2021-09-30", "2020-09-30"])
+    eps = np.round(np.sort(rng.uniform(2, 7, 5))[::-1], 2)
+    income = pd.DataFrame([eps, eps * 0.98, eps * 1.6e10], index=["Diluted EPS", "Basic EPS", "Net Income"], columns=dates)
+    fcf = rng.uniform(5e9, 1.1e11, 5)
+    cashflow = pd.DataFrame([fcf, fcf * 1.2, -fcf * 0.2], index=["Free Cash Flow", "Operating Cash Flow", "Capital Expenditure"], columns=dates)
+    debt = rng.uniform(1e10, 1.2e11, 5)
+    equity = rng.uniform(5e10, 2e11, 5)
+    balance = pd.DataFrame([debt, rng.uniform(1e10, 7e10, 5), equity, debt * 0.8, debt * 0.2],
+                           index=["Total Debt", "Cash And Cash Equivalents", "Stockholders Equity", "Long Term Debt", "Current Debt"],
+                           columns=dates)
+    return income, cashflow, balance
+
+
+def _headline(rng, subject):
+    words = rng.choice(HEADLINE_WORDS, 5, replace=False)
+    return f"{subject} {words[0]} {words[1]} as {words[2]} {words[3]} {words[4]}"
+
+
+def _rss(rng, query, items=RSS_ITEMS):
+    now = pd.Timestamp("2025-06-30 16:00", tz="UTC")
+    rows = []
+    for i in range(items):
+        published = format_datetime((now - pd.Timedelta(hours=int(i * 3))).to_pydatetime(), usegmt=True)
+        rows.append(
+            f"<item><title>{_headline(rng, query.split()[0])}</title>"
+            f"<link>https://news.example.com/{query.replace(' ', '-').lower()}/{i}</link>"
+            f"<pubDate>{published}</pubDate><source url=\"https://example.com\">Outlet {i % 12}</source></item>"
+        )
+    return f"<?xml version=\"1.0\"?><rss><channel>{''.join(rows)}</channel></rss>".encode()
+
+
+def generate(root, tickers=DEFAULT_TICKERS, seed=42):
+    rng = np.random.default_rng(seed)
+    store = FixtureStore(root)
+
+    for n, symbol in enumerate(tickers):
+        price_hist = _history(rng, HISTORY_DAYS, start_price=rng.uniform(0.5, 5))
+        store.save_attr(symbol, "history-period=max", price_hist)
+        for period, days in PERIOD_DAYS.items():
+            store.save_attr(symbol, f"history-period={period}", price_hist.tail(days))
+
+        income, cashflow, balance = _statements(rng)
+        store.save_attr(symbol, "income_stmt", income)
+        store.save_attr(symbol, "cashflow", cashflow)
+        store.save_attr(symbol, "balance_sheet", balance)
+
+        last = float(price_hist["Close"].iloc[-1])
+        eps = float(income.loc["Diluted EPS"].iloc[0])
+        store.save_attr(symbol, "info", {
+            "longName": f"{symbol} Inc.", "sector": "Technology", "industry": "Consumer Electronics",
+            "currentPrice": last, "marketCap": last * 1.5e10, "sharesOutstanding": 1.5e10, "beta": 1.2,
+            "fiftyTwoWeekHigh": float(price_hist["High"].tail(252).max()), "trailingPE": last / eps,
+            "trailingEps": eps, "pegRatio": 2.1, "returnOnEquity": 1.4, "enterpriseToEbitda": 24.0,
+            "priceToSalesTrailing12Months": 8.0, "enterpriseToRevenue": 8.3, "revenueGrowth": 0.06,
+            "dividendYield": 0.005, "longBusinessSummary": f"{symbol} designs things.",
+            "city": "Cupertino", "country": "United States", "fullTimeEmployees": 160000 + n,
+        })
+        store.save_attr(symbol, "news", [
+            {"title": _headline(rng, symbol), "link": f"https://finance.example.com/{symbol}/{i}",
+             "publisher": "Yahoo Finance", "providerPublishTime": 1751300000 - i * 7200}
+            for i in range(NEWS_ITEMS)
+        ])
+        store.save_http(f"https://news.google.com/rss/search?q={symbol}+stock&hl=en-US&gl=US&ceid=US:en", _rss(rng, symbol))
+
+    # Macro: the history store's yf.download(list(MACRO_TICKERS.values()), period=...) calls
+    symbols = list(MACRO_TICKERS.values())
+    index = pd.bdate_range(end="2025-06-30", periods=MACRO_DAYS)
+    frames = {}
+    for sym in symbols:
+        close = rng.uniform(3, 5000) * np.exp(np.cumsum(rng.normal(0, 0.012, len(index))))
+        for field in ("Close", "High", "Low", "Open"):
+            frames[(field, sym)] = close
+        frames[("Volume", sym)] = rng.integers(1000, 100000, len(index))
+    macro = pd.DataFrame(frames, index=index.rename("Date"))
+    store.save_download(symbols, {"period": "max"}, macro)
+    for period, days in GAP_PERIODS:
+        store.save_download(symbols, {"period": period}, macro[macro.index > index[-1] - pd.Timedelta(days=days)])
+
+    for query in CHOKEPOINTS.values():
+        store.save_http(f"https://news.google.com/rss/search?q={query}+stock&hl=en-US&gl=US&ceid=US:en", _rss(rng, query))
+    return root
+
+
+if __name__ == "__main__":
+    out = sys.argv[1] if len(sys.argv) > 1 else "fixtures-synthetic"
+    generate(out)
+    print(f"synthetic fixtures written to {out}")
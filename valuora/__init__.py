@@ -0,0 +1,41 @@
+"""
+Valuora core library.
+
+The data fetching, valuation and signal logic behind the Streamlit app (app.py),
+importable without Streamlit so the same code can run in batch jobs and worker processes.
+
+Analytics
+    valuora.data         - Yahoo / Google News fetchers, the peer comparison table and close panels
+    valuora.valuation    - DCF (and its statement inputs), P/E / EPS / PEG and cash position diagnostics
+    valuora.macro        - Global macro indicators, their local history store and geopolitical summaries
+    valuora.signals      - The Valuora Verdict score
+    valuora.backtest     - Vectorized backtest of the verdict's price-based components
+    valuora.correlation  - Rolling and EWMA correlation matrices
+    valuora.risk         - Historical-simulation portfolio risk
+    valuora.scenarios    - Macro shock scenarios projected onto tickers
+
+Peers and universe data
+    valuora.peers        - Nearest-neighbour peer index
+    valuora.snapshots    - Nightly comparison snapshots (Parquet)
+    valuora.matrix       - Memory-mapped date x ticker close-price matrix
+    valuora.compact      - Compact price histories for the caches
+
+Headlines
+    valuora.archive      - SQLite / FTS5 archive of every fetched news item
+    valuora.dedup        - MinHash near-duplicate clustering
+    valuora.tagging      - Keyword taxonomies (political, legal, supply chain, chokepoints)
+    valuora.sentiment    - Finance lexicon sentiment
+    valuora.summarize    - Extractive feed summaries
+
+Infrastructure
+    valuora.providers    - Data providers (live, record, replay); every network call goes through one
+    valuora.cache        - TTL cache, optionally shared host-wide through SQLite
+    valuora.refresh      - Background stale-while-revalidate refreshers
+    valuora.timing       - Per-stage timing spans
+    valuora.metrics      - Prometheus metrics
+    valuora.profiling    - Opt-in rerun profiling
+
+Entry points
+    valuora.api          - Local HTTP JSON API (python -m valuora.api)
+    valuora.batch        - Batch valuation CLI (python -m valuora.batch)
+"""
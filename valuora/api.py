@@ -0,0 +1,287 @@
+"""
+Local HTTP JSON API over the Valuora analytics.
+
+Serves the same numbers as the Streamlit pages without scraping them. Every endpoint
+sits on the valuora.cache layer (the fetchers in valuora.data / valuora.macro are
+ttl_cache'd), so repeated requests for a ticker are served from memory.
+
+    GET /quote?ticker=AAPL
+    GET /valuation?ticker=AAPL
+    GET /dcf?ticker=AAPL[&growth=10&terminal=2.5&wacc=9&fcf=..&debt=..&cash=..]
+    GET /peers?ticker=AAPL
+    GET /macro[?history=1]
+    GET /health
+    GET /metrics           (Prometheus text format, see valuora.metrics)
+
+Percent parameters (growth, terminal, wacc) use the same units as the DCF Model page.
+
+Usage:
+    python -m valuora.api --host 127.0.0.1 --port 8600
+
+Requests are handled on a thread per connection (ThreadingHTTPServer): the work is
+almost entirely waiting on Yahoo, and the DCF itself is a few microseconds of arithmetic,
+so a process pool would cost more in pickling than it saves.
+"""
+import argparse
+import json
+import math
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from valuora import metrics
+from valuora.cache import cache_stats, ttl_cache, uncached
+from valuora.data import fetch_comparison_data, fetch_history, get_competitors, get_stock
+from valuora.macro import DEMO_MACRO_DATA, fetch_macro_context, fetch_wti_price
+from valuora.peers import peer_averages
+from valuora.signals import generate_ai_verdict
+from valuora.snapshots import get_snapshot
+from valuora.valuation import (
+    DEFAULT_GROWTH,
+    DEFAULT_TERMINAL_GROWTH,
+    DEFAULT_WACC,
+    calculate_dcf_value,
+    classify_cash_position,
+    get_dcf_inputs,
+    get_valuation_data,
+)
+
+QUOTE_FIELDS = ["longName", "currency", "currentPrice", "marketCap", "beta", "fiftyTwoWeekHigh",
+                "fiftyTwoWeekLow", "trailingPE", "sector", "industry"]
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def to_jsonable(obj):
+    """Converts numpy/pandas values (and NaN) into plain JSON types."""
+    if isinstance(obj, dict):
+        return {str(k): to_jsonable(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [to_jsonable(v) for v in obj]
+    if isinstance(obj, pd.DataFrame):
+        return to_jsonable(obj.to_dict(orient="records"))
+    if isinstance(obj, (pd.Timestamp, np.datetime64)):
+        return pd.Timestamp(obj).isoformat()
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float) and (math.isnan(obj) or math.isinf(obj)):
+        return None
+    return obj
+
+
+# --- Endpoint handlers (params: dict of query string values) ---
+def _require_ticker(params):
+    ticker = params.get("ticker", "").strip().upper()
+    if not ticker:
+        raise ApiError(400, "missing 'ticker' query parameter")
+    return ticker
+
+
+def _load(ticker):
+    try:
+        stock, info = get_stock(ticker)
+    except Exception as e:
+        raise ApiError(502, f"could not fetch {ticker}: {e}")
+    if stock is None or not info:
+        raise ApiError(404, f"no data for {ticker}")
+    return stock, info
+
+
+def _float_param(params, name, default):
+    if name not in params:
+        return default
+    try:
+        return float(params[name])
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a number")
+
+
+def handle_quote(params):
+    ticker = _require_ticker(params)
+    _, info = _load(ticker)
+    return {"ticker": ticker, **{k: info.get(k) for k in QUOTE_FIELDS}}
+
+
+@ttl_cache(ttl=3600, shared=True)
+def _valuation(ticker):
+    stock, info = _load(ticker)
+    val_data = get_valuation_data(stock, info)
+    status, runway, monthly_burn = classify_cash_position(stock)
+    _, score = generate_ai_verdict(info, stock.news, fetch_history(ticker, period="3mo"))
+    return {
+        "ticker": ticker,
+        **val_data,
+        "cash_status": status,
+        "runway_months": runway,
+        "monthly_burn": monthly_burn,
+        "verdict_score": score,
+    }
+
+
+def handle_valuation(params):
+    return _valuation(_require_ticker(params))
+
+
+def handle_dcf(params):
+    ticker = _require_ticker(params)
+    stock, info = _load(ticker)
+    fcf, debt, cash = get_dcf_inputs(stock)
+
+    # Query params override the statement values, same as typing into the DCF page
+    fcf = _float_param(params, "fcf", fcf)
+    debt = _float_param(params, "debt", debt)
+    cash = _float_param(params, "cash", cash)
+    growth = _float_param(params, "growth", DEFAULT_GROWTH * 100) / 100
+    terminal = _float_param(params, "terminal", DEFAULT_TERMINAL_GROWTH * 100) / 100
+    wacc = _float_param(params, "wacc", DEFAULT_WACC * 100) / 100
+
+    price = info.get("currentPrice") or 0
+    result = {
+        "ticker": ticker,
+        "inputs": {"fcf": fcf, "growth": growth, "terminal_growth": terminal, "wacc": wacc,
+                   "debt": debt, "cash": cash, "shares": info.get("sharesOutstanding")},
+        "current_price": price,
+        "intrinsic_value": None,
+        "upside": None,
+    }
+    if fcf <= 0:
+        result["note"] = "DCF requires positive Free Cash Flow."
+        return result
+
+    intrinsic = calculate_dcf_value(fcf, growth, terminal, wacc, debt, cash, info.get("sharesOutstanding", 1))
+    result["intrinsic_value"] = intrinsic
+    if price > 0:
+        result["upside"] = (intrinsic - price) / price
+    return result
+
+
+def handle_peers(params):
+    ticker = _require_ticker(params)
+    _, info = _load(ticker)
+    industry, competitors = get_competitors(ticker, info)
+    comp_df = fetch_comparison_data(ticker, competitors)
+    averages = peer_averages(comp_df, exclude=ticker).to_dict() if not comp_df.empty else {}
+    result = {"ticker": ticker, "industry": industry, "peers": competitors, "table": comp_df, "averages": averages}
+    snapshot = get_snapshot()
+    if snapshot is not None:
+        # Industry-wide averages from the nightly snapshot, when it covers the industry
+        group = snapshot.averages(industry=industry)
+        if group is not None:
+            result["industry_averages"] = group.to_dict()
+            result["snapshot_date"] = snapshot.date.strftime("%Y-%m-%d")
+    return result
+
+
+@ttl_cache(ttl=3600, shared=True)
+def _wti_price():
+    av_key = os.environ.get("ALPHA_VANTAGE_KEY")
+    if not av_key:
+        return DEMO_MACRO_DATA["oil"], "demo"
+    try:
+        return fetch_wti_price(av_key), "alpha_vantage"
+    except Exception:
+        # Rate limited / offline: serve the demo price this time, retry on the next request
+        return uncached((DEMO_MACRO_DATA["oil"], "demo"))
+
+
+def handle_macro(params):
+    current_prices, hist_macro = fetch_macro_context()
+    current_prices = dict(current_prices)
+    oil, oil_source = _wti_price()
+    current_prices["Crude Oil (WTI)"] = oil
+
+    result = {"latest": current_prices, "oil_source": oil_source}
+    if not hist_macro.empty:
+        result["correlation"] = hist_macro.corr().to_dict()
+        if params.get("history") in ("1", "true", "yes"):
+            hist = hist_macro.copy()
+            hist.index = hist.index.strftime("%Y-%m-%d")
+            result["history"] = hist.to_dict(orient="index")
+    return result
+
+
+def handle_health(params):
+    return {"status": "ok", "time": time.time(), "cache": cache_stats()}
+
+
+def handle_metrics(params):
+    return metrics.render()
+
+
+ROUTES = {
+    "/quote": handle_quote,
+    "/valuation": handle_valuation,
+    "/dcf": handle_dcf,
+    "/peers": handle_peers,
+    "/macro": handle_macro,
+    "/health": handle_health,
+    "/metrics": handle_metrics,
+}
+
+
+class ValuoraHandler(BaseHTTPRequestHandler):
+    server_version = "ValuoraAPI/1.0"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        handler = ROUTES.get(url.path.rstrip("/") or "/")
+
+        try:
+            if handler is None:
+                raise ApiError(404, f"unknown endpoint {url.path}")
+            status, body = 200, handler(params)
+        except ApiError as e:
+            status, body = e.status, {"error": str(e)}
+        except Exception as e:
+            status, body = 500, {"error": f"{type(e).__name__}: {e}"}
+
+        # Text bodies (/metrics) go out as-is, everything else as JSON
+        if isinstance(body, str):
+            payload, content_type = body.encode(), metrics.CONTENT_TYPE
+        else:
+            payload, content_type = json.dumps(to_jsonable(body)).encode(), "application/json"
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"[api] {self.address_string()} {format % args}\n")
+
+
+def make_server(host="127.0.0.1", port=8600):
+    server = ThreadingHTTPServer((host, port), ValuoraHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Valuora HTTP JSON API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port)
+    print(f"Valuora API listening on http://{args.host}:{args.port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,329 @@
+"""
+Local headline archive: every news item the app fetches, kept in SQLite with an FTS5 index.
+
+    archive = get_archive()
+    archive.record(items, query="AAPL", source="yahoo")      # deduplicated by link
+    archive.timeline("AAPL", limit=50)                        # newest first
+    archive.search("hormuz tanker*", queries=["Strait of Hormuz Iran blockade"])
+    archive.daily_counts(since=time.time() - 90 * 86400)
+
+Tables:
+    headlines          one row per link (title, publisher, published, source, first_seen)
+    headline_queries   (query, published, headline_id): which ticker / news query returned
+                       it, clustered by query and time so a timeline is an index range scan
+                       (and indexed by query and id for searches, which run in archive order)
+    query_stats        per query and source: items linked to it and when it was last fetched
+    headlines_fts      FTS5 over title + publisher (external content, kept in sync by trigger)
+
+Items use the fetchers' shape ({'title', 'link', 'publisher', 'providerPublishTime'}).
+The database lives at VALUORA_NEWS_ARCHIVE (default ~/.cache/valuora/headlines.sqlite);
+VALUORA_NEWS_ARCHIVE=off disables archiving.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "valuora", "headlines.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS headlines (
+    id INTEGER PRIMARY KEY,
+    link TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    publisher TEXT,
+    published REAL NOT NULL,
+    source TEXT,
+    first_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS headlines_published ON headlines (published);
+CREATE TABLE IF NOT EXISTS headline_queries (
+    query TEXT NOT NULL,
+    published REAL NOT NULL,
+    headline_id INTEGER NOT NULL,
+    PRIMARY KEY (query, published, headline_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS headline_queries_headline ON headline_queries (headline_id);
+CREATE INDEX IF NOT EXISTS headline_queries_archived ON headline_queries (query, headline_id);
+CREATE TABLE IF NOT EXISTS query_stats (
+    query TEXT NOT NULL,
+    source TEXT NOT NULL,
+    items INTEGER NOT NULL DEFAULT 0,
+    last_fetch REAL NOT NULL,
+    PRIMARY KEY (query, source)
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS headlines_fts USING fts5(
+    title, publisher, content='headlines', content_rowid='id'
+);
+CREATE TRIGGER IF NOT EXISTS headlines_fts_insert AFTER INSERT ON headlines BEGIN
+    INSERT INTO headlines_fts (rowid, title, publisher) VALUES (new.id, new.title, new.publisher);
+END;
+"""
+
+COLUMNS = ("title", "link", "publisher", "published", "source")
+SELECT = ", ".join(f"h.{c}" for c in COLUMNS)
+
+# 'rank' searches score at most this many of the newest matches, so a very common word stays fast
+RANK_CANDIDATES = 5_000
+# A query filter covering up to this many headlines is applied by probing the FTS index per headline
+PROBE_LIMIT = 5_000
+
+
+class HeadlineArchive:
+    def __init__(self, path=DEFAULT_ARCHIVE_PATH):
+        self.path = path
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    # --- Write ---
+    def record(self, items, query, source):
+        """
+        Archives fetched items under `query` (and notes the fetch, even when empty); links
+        already stored are kept as they are. Returns the number of new headlines.
+        """
+        now = time.time()
+        rows = []
+        for item in items:
+            link, title = item.get("link"), item.get("title")
+            if not link or not title or link == "#":
+                continue
+            published = item.get("providerPublishTime") or now
+            rows.append((link, title, item.get("publisher"), float(published), source, now))
+
+        conn = self._conn()
+        with conn:
+            # rowcount sums the rows each executemany() inserted (trigger writes not included)
+            added = conn.executemany(
+                "INSERT OR IGNORE INTO headlines (link, title, publisher, published, source, first_seen) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            ).rowcount
+            linked = conn.executemany(
+                "INSERT OR IGNORE INTO headline_queries (query, published, headline_id) "
+                "SELECT ?, published, id FROM headlines WHERE link = ?",
+                [(query, row[0]) for row in rows],
+            ).rowcount
+            conn.execute(
+                "INSERT INTO query_stats (query, source, items, last_fetch) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (query, source) DO UPDATE SET items = items + excluded.items, last_fetch = excluded.last_fetch",
+                (query, source, max(linked, 0), now),
+            )
+        return max(added, 0)
+
+    # --- Read ---
+    def last_fetch(self, query, source=None):
+        """When `query` was last archived (from `source`, or from any source); None if never."""
+        sql = "SELECT MAX(last_fetch) FROM query_stats WHERE query = ?"
+        args = [query]
+        if source:
+            sql += " AND source = ?"
+            args.append(source)
+        return self._conn().execute(sql, args).fetchone()[0]
+
+    def is_fresh(self, query, max_age, sources):
+        """True when every source in `sources` has archived `query` within `max_age` seconds."""
+        cutoff = time.time() - max_age
+        return all((self.last_fetch(query, s) or 0) >= cutoff for s in sources)
+
+    def queries(self):
+        """[(query, items archived)] for every query, most items first."""
+        return self._conn().execute(
+            "SELECT query, SUM(items) AS n FROM query_stats GROUP BY query ORDER BY n DESC"
+        ).fetchall()
+
+    def timeline(self, query=None, limit=50, before=None):
+        """Newest items for one query, or across the archive (optionally older than `before`, for paging)."""
+        before = before if before is not None else float("inf")
+        if query is None:
+            return self._rows(
+                f"SELECT {SELECT} FROM headlines h WHERE h.published < ? ORDER BY h.published DESC LIMIT ?",
+                (before, limit),
+            )
+        return self._rows(
+            f"SELECT {SELECT} FROM headline_queries q JOIN headlines h ON h.id = q.headline_id "
+            "WHERE q.query = ? AND q.published < ? ORDER BY q.published DESC LIMIT ?",
+            (query, before, limit),
+        )
+
+    def linked(self, queries):
+        """How many headlines are linked to `queries` (from query_stats, no scan)."""
+        row = self._conn().execute(
+            "SELECT COALESCE(SUM(items), 0) FROM query_stats WHERE query IN (%s)" % _marks(queries), list(queries)
+        ).fetchone()
+        return row[0]
+
+    def search(self, text, queries=None, since=None, limit=50, order="recent"):
+        """
+        Full-text search of titles and publishers. `text` is plain words (all must match; a
+        trailing * matches a prefix). Filter by `queries` and a `since` publish timestamp;
+        order by 'recent' (newest first) or 'rank' (BM25 over the RANK_CANDIDATES newest
+        matches; with a query filter above PROBE_LIMIT headlines, the newest matches
+        overall are filtered).
+
+        'Newest' is archive order (headline id, i.e. when the item was first recorded) on
+        every path: that is the FTS index's own order, so a search stops after `limit`
+        matches. It equals publish order except for items backfilled later, which sort
+        by when they were archived; timeline() orders by publish time.
+        """
+        match = fts_query(text)
+        if not match:
+            return []
+        ranked = order == "rank"
+        conn = self._conn()
+        # Every row published since `since` has an id at or above the first of them, so the
+        # index walk can stop there instead of running through all older matches
+        floor = 0
+        if since is not None:
+            floor = conn.execute(
+                "SELECT MIN(id) FROM headlines INDEXED BY headlines_published WHERE published >= ?", (since,)
+            ).fetchone()[0]
+            if floor is None:
+                return []
+        published = "" if since is None else " AND {}.published >= ?"
+        since_args = [] if since is None else [since]
+
+        if not queries:
+            # FTS5 yields matches newest rowid first, so 'recent' stops after `limit` rows
+            # and 'rank' only scores a bounded window
+            if ranked:
+                sql = (f"SELECT {SELECT} FROM (SELECT rowid AS id, rank FROM headlines_fts WHERE headlines_fts MATCH ? "
+                       f"AND rowid >= ? ORDER BY rowid DESC LIMIT {RANK_CANDIDATES}) f JOIN headlines h ON h.id = f.id "
+                       f"WHERE 1{published.format('h')} ORDER BY f.rank LIMIT ?")
+            else:
+                sql = (f"SELECT {SELECT} FROM headlines_fts f JOIN headlines h ON h.id = f.rowid "
+                       f"WHERE headlines_fts MATCH ? AND f.rowid >= ?{published.format('h')} ORDER BY f.rowid DESC LIMIT ?")
+            return self._rows(sql, [match, floor, *since_args, limit])
+
+        in_queries = f"q.query IN ({_marks(queries)})"
+        if self.linked(queries) <= PROBE_LIMIT:
+            # Walk the queries' own headlines and probe the index for each (cheap for a
+            # common word, which would otherwise mean scanning most of the archive).
+            # A headline under several of the queries comes back once per query
+            sql = (f"SELECT q.headline_id FROM headline_queries q WHERE {in_queries}{published.format('q')} "
+                   "AND EXISTS (SELECT 1 FROM headlines_fts WHERE headlines_fts MATCH ? AND rowid = q.headline_id) "
+                   "ORDER BY q.headline_id DESC LIMIT ?")
+            args = [*queries, *since_args, match, (RANK_CANDIDATES if ranked else limit) * len(queries)]
+        else:
+            # Large query sets: walk the matches newest first and look each up in the queries' index
+            exists = f"EXISTS (SELECT 1 FROM headline_queries q WHERE q.headline_id = f.id AND {in_queries}{published.format('q')})"
+            if ranked:
+                sql = (f"SELECT f.id FROM (SELECT rowid AS id FROM headlines_fts WHERE headlines_fts MATCH ? AND rowid >= ? "
+                       f"ORDER BY rowid DESC LIMIT {RANK_CANDIDATES}) f WHERE {exists}")
+                args = [match, floor, *queries, *since_args]
+            else:
+                sql = (f"SELECT f.rowid FROM headlines_fts f WHERE headlines_fts MATCH ? AND f.rowid >= ? "
+                       f"AND {exists.replace('f.id', 'f.rowid')} ORDER BY f.rowid DESC LIMIT ?")
+                args = [match, floor, *queries, *since_args, limit]
+        ids = list(dict.fromkeys(row[0] for row in conn.execute(sql, args)))
+        if ranked and ids:
+            ids = self._rank_within(match, ids)
+        return self._by_ids(ids[:limit])
+
+    def _rank_within(self, match, ids):
+        """
+        `ids` ordered by BM25 relevance among themselves. Scored in a scratch FTS5 table:
+        ranking rows scattered through the main index costs a doclist scan per row.
+        """
+        conn = self._conn()
+        with conn:
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS temp.rank_scratch USING fts5(title, publisher)")
+            conn.execute("DELETE FROM temp.rank_scratch")
+            conn.execute(
+                "INSERT INTO temp.rank_scratch (rowid, title, publisher) "
+                "SELECT id, title, publisher FROM headlines WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(ids),),
+            )
+            return [row[0] for row in conn.execute(
+                "SELECT rowid FROM temp.rank_scratch WHERE rank_scratch MATCH ? ORDER BY rank", (match,)
+            )]
+
+    def _by_ids(self, ids):
+        """Rows for headline `ids`, in that order."""
+        if not ids:
+            return []
+        rows = self._conn().execute(
+            f"SELECT h.id, {SELECT} FROM headlines h WHERE h.id IN (SELECT value FROM json_each(?))", (json.dumps(ids),)
+        )
+        by_id = {row[0]: dict(zip(COLUMNS, row[1:])) for row in rows}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def daily_counts(self, since, queries=None):
+        """{day start (UTC epoch): headlines published that day} since `since`."""
+        if queries:
+            sql = ("SELECT CAST(published / 86400 AS INTEGER) * 86400 AS day, COUNT(DISTINCT headline_id) FROM headline_queries "
+                   "WHERE query IN (%s) AND published >= ? GROUP BY day" % _marks(queries))
+            args = [*queries, since]
+        else:
+            sql = "SELECT CAST(published / 86400 AS INTEGER) * 86400 AS day, COUNT(*) FROM headlines WHERE published >= ? GROUP BY day"
+            args = [since]
+        return dict(self._conn().execute(sql, args).fetchall())
+
+    def count(self):
+        return self._conn().execute("SELECT COUNT(*) FROM headlines").fetchone()[0]
+
+    def _rows(self, sql, args):
+        return [dict(zip(COLUMNS, row)) for row in self._conn().execute(sql, args)]
+
+
+def _marks(values):
+    return ",".join("?" * len(values))
+
+
+def fts_query(text):
+    """Plain search words -> an FTS5 query (each word quoted, so user input is never FTS syntax)."""
+    terms = []
+    for word in (text or "").split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', "")
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+_ARCHIVES = {}
+_ARCHIVES_LOCK = threading.Lock()
+
+
+def get_archive(path=None):
+    """
+    Process-wide archive at `path` (default: VALUORA_NEWS_ARCHIVE or ~/.cache/valuora).
+    None when archiving is off or the database can't be opened.
+    """
+    path = path or os.environ.get("VALUORA_NEWS_ARCHIVE", DEFAULT_ARCHIVE_PATH)
+    if path.lower() in ("off", "0", "false", "none"):
+        return None
+    with _ARCHIVES_LOCK:
+        if path not in _ARCHIVES:
+            try:
+                _ARCHIVES[path] = HeadlineArchive(path)
+            except (OSError, sqlite3.Error) as e:
+                logger.warning("Headline archive unavailable at %s: %s: %s", path, type(e).__name__, e)
+                _ARCHIVES[path] = None
+        return _ARCHIVES[path]
+
+
+def archive_items(items, query, source):
+    """Best-effort record() into the default archive; failures are logged, never raised."""
+    archive = get_archive()
+    if archive is None:
+        return 0
+    try:
+        return archive.record(items, query, source)
+    except sqlite3.Error as e:
+        logger.warning("Archiving %s headlines for %r failed: %s", source, query, e)
+        return 0
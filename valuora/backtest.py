@@ -0,0 +1,192 @@
+"""
+Backtest of the price-based Valuora Verdict components (valuora.signals) over full history.
+
+Replays, for every day and ticker at once:
+
+    trend      +1 when the close is above its MA_WINDOW-day average, else -1
+    valuation  +1 below PE_CHEAP, -1 above PE_EXPENSIVE, 0 in between or without EPS
+               (P/E from annual filed EPS, usable REPORT_LAG_DAYS after the fiscal year end)
+
+and scores them against forward returns: mean return and share of up moves per score
+bucket, directional hit rate and how often the signal flips. Everything is computed on
+date x ticker arrays (rolling means, shifts, bincount), with no per-day loop. The
+headline component can't be replayed (there is no news history), so it is left out.
+
+Usage:
+    python -m valuora.backtest AAPL MSFT NVDA
+    python -m valuora.backtest --universe universe.csv --horizons 5 21 63 --ma-window 100 --out buckets.csv
+
+Forward-return windows overlap from one day to the next, so the counts overstate the
+number of independent observations.
+"""
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from valuora.signals import MA_WINDOW, PE_CHEAP, PE_EXPENSIVE
+
+DEFAULT_HORIZONS = (5, 21, 63)
+REPORT_LAG_DAYS = 90
+TRADING_DAYS = 252
+
+
+def moving_average(closes, window):
+    """
+    Mean of each ticker's last `window` closes, over its own trading days: on a union
+    calendar (mixed exchanges, the price matrix) a holiday only one exchange observes is
+    skipped rather than blanking the average for the next `window` rows. NaN on days
+    without a close.
+    """
+    x = closes.to_numpy(dtype=float)
+    valid = ~np.isnan(x)
+    total = np.cumsum(np.where(valid, x, 0.0), axis=0)
+    count = np.cumsum(valid, axis=0)
+    # by_count[m, j]: sum of ticker j's first m closes
+    by_count = np.zeros((len(x) + 1, x.shape[1]))
+    rows, cols = np.nonzero(valid)
+    by_count[count[rows, cols], cols] = total[rows, cols]
+    ready = valid & (count >= window)
+    earlier = np.take_along_axis(by_count, np.maximum(count - window, 0), axis=0)
+    ma = np.where(ready, (total - earlier) / window, np.nan)
+    return pd.DataFrame(ma, index=closes.index, columns=closes.columns)
+
+
+def trend_scores(closes, ma_window=MA_WINDOW):
+    """+1 / -1 per day and ticker (NaN until the moving average has `ma_window` closes)."""
+    ma = moving_average(closes, ma_window)
+    return pd.DataFrame(np.where(closes > ma, 1.0, -1.0), index=closes.index, columns=closes.columns).where(ma.notna())
+
+
+def valuation_scores(closes, eps, pe_cheap=PE_CHEAP, pe_expensive=PE_EXPENSIVE):
+    """
+    +1 / -1 / 0 from P/E = close / eps. `eps` is a date x ticker frame of the EPS known on
+    each date (forward-filled here); days without a positive EPS score 0, as the verdict
+    skips the P/E check when Yahoo has no trailing P/E.
+    """
+    # Forward-fill over both calendars first: an EPS dated on a weekend / holiday
+    # (fiscal year end + REPORT_LAG_DAYS often is) carries into the next trading day
+    eps = eps.reindex(columns=closes.columns)
+    eps = eps.reindex(eps.index.union(closes.index)).ffill().reindex(closes.index)
+    pe = (closes / eps.where(eps > 0)).to_numpy()
+    scores = np.select([pe < pe_cheap, pe > pe_expensive], [1.0, -1.0], 0.0)
+    return pd.DataFrame(scores, index=closes.index, columns=closes.columns)
+
+
+def eps_history(stock, lag_days=REPORT_LAG_DAYS):
+    """Annual EPS from the filed income statement as a Series dated when it became public."""
+    inc = stock.income_stmt
+    for row in ("Diluted EPS", "Basic EPS"):
+        if not inc.empty and row in inc.index:
+            eps = inc.loc[row].dropna().astype(float)
+            eps.index = pd.to_datetime(eps.index) + pd.Timedelta(days=lag_days)
+            return eps.sort_index()
+    return pd.Series(dtype=float)
+
+
+def forward_returns(closes, horizon):
+    return closes.shift(-horizon) / closes - 1
+
+
+def bucket_stats(scores, fwd):
+    """Per score value: observations, mean forward return and share of positive forward returns."""
+    s, f = scores.to_numpy().ravel(), fwd.to_numpy().ravel()
+    valid = ~(np.isnan(s) | np.isnan(f))
+    values, codes = np.unique(s[valid], return_inverse=True)
+    counts = np.bincount(codes)
+    return pd.DataFrame({
+        "count": counts,
+        "mean_return": np.bincount(codes, weights=f[valid]) / counts,
+        "up_share": np.bincount(codes, weights=f[valid] > 0) / counts,
+    }, index=pd.Index(values, name="score"))
+
+
+def hit_rate(scores, fwd):
+    """Share of non-zero scores whose sign matches the forward return's."""
+    s, f = scores.to_numpy(), fwd.to_numpy()
+    active = ~(np.isnan(s) | np.isnan(f)) & (s != 0)
+    return float((np.sign(s[active]) == np.sign(f[active])).mean()) if active.any() else np.nan
+
+
+def turnover(scores):
+    """Per ticker: signal flips per year (sign changes of the score) and days scored."""
+    signal = np.sign(scores.to_numpy())
+    prev = np.vstack([np.full((1, signal.shape[1]), np.nan), signal[:-1]])
+    both = ~(np.isnan(signal) | np.isnan(prev))
+    flips = ((signal != prev) & both).sum(axis=0)
+    days = both.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        per_year = flips / days * TRADING_DAYS
+    return pd.DataFrame({"flips_per_year": per_year, "days": days}, index=scores.columns)
+
+
+def backtest(closes, horizons=DEFAULT_HORIZONS, ma_window=MA_WINDOW, eps=None,
+             pe_cheap=PE_CHEAP, pe_expensive=PE_EXPENSIVE):
+    """
+    closes: date x ticker DataFrame (a Series is treated as one ticker); eps: optional
+    date x ticker EPS as it became known. Returns a dict with the combined daily `scores`,
+    `buckets` (rows per horizon and score), `hit_rates` per horizon and `turnover` per ticker.
+    """
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(closes.name or "ticker")
+    scores = trend_scores(closes, ma_window)
+    if eps is not None:
+        scores = scores + valuation_scores(closes, eps, pe_cheap, pe_expensive)
+
+    buckets, hits = [], {}
+    for h in horizons:
+        fwd = forward_returns(closes, h)
+        buckets.append(bucket_stats(scores, fwd).assign(horizon=h).set_index("horizon", append=True).swaplevel())
+        hits[h] = hit_rate(scores, fwd)
+
+    return {
+        "scores": scores,
+        "buckets": pd.concat(buckets) if buckets else pd.DataFrame(),
+        "hit_rates": pd.Series(hits, name="hit_rate").rename_axis("horizon"),
+        "turnover": turnover(scores),
+    }
+
+
+def main(argv=None):
+    from valuora.batch import read_universe
+    from valuora.data import fetch_closes, get_stock
+
+    parser = argparse.ArgumentParser(description="Backtest the price-based Valuora Verdict components")
+    parser.add_argument("tickers", nargs="*", help="Tickers to backtest (in addition to --universe)")
+    parser.add_argument("--universe", help="CSV with a 'ticker' column or text file with one ticker per line")
+    parser.add_argument("--horizons", type=int, nargs="+", default=list(DEFAULT_HORIZONS), help="Forward-return horizons in trading days")
+    parser.add_argument("--ma-window", type=int, default=MA_WINDOW, help="Trend moving-average window")
+    parser.add_argument("--pe", action="store_true", help="Include the P/E component (fetches filed EPS per ticker)")
+    parser.add_argument("--pe-cheap", type=float, default=PE_CHEAP)
+    parser.add_argument("--pe-expensive", type=float, default=PE_EXPENSIVE)
+    parser.add_argument("--out", help="Write the bucket table to this CSV")
+    args = parser.parse_args(argv)
+
+    tickers = [t.strip().upper() for t in args.tickers if t.strip()]
+    if args.universe:
+        tickers += [t for t in read_universe(args.universe) if t not in tickers]
+    if not tickers:
+        parser.error("no tickers given (pass tickers or --universe)")
+
+    closes = fetch_closes(tickers)
+    if closes.empty:
+        print("No price history for any ticker", file=sys.stderr)
+        return 1
+    eps = None
+    if args.pe:
+        eps = pd.DataFrame({t: eps_history(get_stock(t)[0]) for t in closes.columns})
+
+    result = backtest(closes, args.horizons, args.ma_window, eps, args.pe_cheap, args.pe_expensive)
+    with pd.option_context("display.float_format", "{:.4f}".format, "display.width", 120):
+        print(result["buckets"])
+        print()
+        print(result["hit_rates"])
+        print(f"\nSignal flips per year (median over {len(closes.columns)} tickers): {result['turnover']['flips_per_year'].median():.1f}")
+    if args.out:
+        result["buckets"].to_csv(args.out)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,245 @@
+"""
+Batch valuation CLI: runs the Valuation Analysis page for a whole ticker universe.
+
+For every ticker it computes P/E, EPS and PEG (get_valuation_data), the cash status and
+runway (classify_cash_position), the DCF intrinsic value with the DCF Model page defaults
+and the Valuora Verdict score. Tickers are fanned out over a process pool with a bounded
+number of in-flight jobs, and rows are streamed to CSV or Parquet as they complete.
+
+Usage:
+    python -m valuora.batch AAPL MSFT NVDA --out valuations.csv
+    python -m valuora.batch --universe universe.csv --out valuations.parquet --workers 8
+
+A universe file is either a CSV with a 'ticker' column or a text file with one ticker
+per line ('#' starts a comment).
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from valuora.data import fetch_history, fetch_stock_data
+from valuora.signals import generate_ai_verdict
+from valuora.valuation import (
+    DEFAULT_GROWTH,
+    DEFAULT_TERMINAL_GROWTH,
+    DEFAULT_WACC,
+    calculate_dcf_value,
+    classify_cash_position,
+    get_dcf_inputs,
+    get_valuation_data,
+)
+
+# Output columns, in order
+COLUMNS = [
+    "ticker", "name", "sector", "industry", "price",
+    "pe", "pe_source", "eps", "eps_source", "peg", "peg_source",
+    "cash_status", "runway_months", "monthly_burn",
+    "fcf", "total_debt", "total_cash", "intrinsic_value", "upside",
+    "verdict_score", "error",
+]
+TEXT_COLUMNS = {"ticker", "name", "sector", "industry", "pe_source", "eps_source", "peg_source", "cash_status", "error"}
+
+# Parquet row groups are flushed every N rows
+PARQUET_BATCH_ROWS = 200
+
+
+def read_universe(path):
+    """Reads tickers from a CSV with a 'ticker' column or a one-ticker-per-line text file."""
+    with open(path, newline="") as f:
+        first_line = f.readline()
+        f.seek(0)
+        if "," in first_line:
+            reader = csv.DictReader(f)
+            column = next((c for c in reader.fieldnames if c.strip().lower() in ("ticker", "symbol")), None)
+            if column is None:
+                raise ValueError(f"{path}: CSV universe needs a 'ticker' column")
+            tickers = [row[column] for row in reader]
+        else:
+            tickers = [line.split("#")[0] for line in f]
+
+    # Clean, upper-case and de-duplicate while keeping order
+    seen = set()
+    cleaned = []
+    for t in tickers:
+        t = t.strip().upper()
+        if t and t not in seen:
+            seen.add(t)
+            cleaned.append(t)
+    return cleaned
+
+
+def value_ticker(ticker, growth=DEFAULT_GROWTH, terminal_growth=DEFAULT_TERMINAL_GROWTH, wacc=DEFAULT_WACC):
+    """
+    Computes one output row. Never raises: failures are reported in the 'error' column
+    so one bad ticker does not take down the run.
+    """
+    row = dict.fromkeys(COLUMNS)
+    row["ticker"] = ticker
+    try:
+        stock, info = fetch_stock_data(ticker)
+        row["name"] = info.get("longName")
+        row["sector"] = info.get("sector")
+        row["industry"] = info.get("industry")
+        row["price"] = info.get("currentPrice")
+
+        # Valuation Analysis: P/E, EPS, PEG
+        val_data = get_valuation_data(stock, info)
+        for key in ("pe", "pe_source", "eps", "eps_source", "peg", "peg_source"):
+            row[key] = val_data[key]
+
+        # Diagnostic: Cash Stable / Cash Burning
+        status, runway, monthly_burn = classify_cash_position(stock)
+        row["cash_status"] = status
+        row["runway_months"] = runway
+        row["monthly_burn"] = monthly_burn
+
+        # DCF with the DCF Model page defaults
+        fcf, debt, cash = get_dcf_inputs(stock)
+        row["fcf"] = fcf
+        row["total_debt"] = debt
+        row["total_cash"] = cash
+        if fcf > 0:
+            intrinsic = calculate_dcf_value(fcf, growth, terminal_growth, wacc, debt, cash, info.get("sharesOutstanding", 1))
+            row["intrinsic_value"] = intrinsic
+            if row["price"]:
+                row["upside"] = (intrinsic - row["price"]) / row["price"]
+
+        # Verdict score (only needs ~50 days of history for the trend check)
+        _, score = generate_ai_verdict(info, stock.news, fetch_history(ticker, period="3mo"))
+        row["verdict_score"] = score
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    return row
+
+
+class CsvRowWriter:
+    """Writes rows to CSV, flushing after each one so partial runs are usable."""
+
+    def __init__(self, path):
+        self.f = open(path, "w", newline="")
+        self.writer = csv.DictWriter(self.f, fieldnames=COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, row):
+        self.writer.writerow(row)
+        self.f.flush()
+
+    def close(self):
+        self.f.close()
+
+
+class ParquetRowWriter:
+    """Buffers rows and writes them as Parquet row groups (requires pyarrow)."""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        self.schema = pa.schema([(c, pa.string() if c in TEXT_COLUMNS else pa.float64()) for c in COLUMNS])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.buffer = []
+
+    def write(self, row):
+        self.buffer.append({c: (row[c] if c in TEXT_COLUMNS or row[c] is None else float(row[c])) for c in COLUMNS})
+        if len(self.buffer) >= PARQUET_BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.writer.write_table(self.pa.Table.from_pylist(self.buffer, schema=self.schema))
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def open_writer(path):
+    if path.lower().endswith((".parquet", ".pq")):
+        return ParquetRowWriter(path)
+    return CsvRowWriter(path)
+
+
+def run_batch(tickers, writer, workers=None, max_in_flight=None, dcf_params=None, progress=None):
+    """
+    Values every ticker on a process pool and hands each row to writer.write() as it completes.
+    At most `max_in_flight` tickers are queued at once (default 2x workers), so memory stays
+    flat no matter how large the universe is.
+    Returns: (ok_count, error_count)
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    dcf_params = dcf_params or {}
+
+    ok = errors = 0
+    pending = set()
+    queue = iter(tickers)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            # Top up the window
+            for ticker in queue:
+                pending.add(pool.submit(value_ticker, ticker, **dcf_params))
+                if len(pending) >= max_in_flight:
+                    break
+
+            if not pending:
+                break
+
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                row = fut.result()
+                writer.write(row)
+                if row["error"]:
+                    errors += 1
+                else:
+                    ok += 1
+                if progress:
+                    progress(row, ok + errors)
+
+    return ok, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch valuation for a ticker list or universe file")
+    parser.add_argument("tickers", nargs="*", help="Tickers to value (in addition to --universe)")
+    parser.add_argument("--universe", help="CSV with a 'ticker' column or text file with one ticker per line")
+    parser.add_argument("--out", default="valuations.csv", help="Output path (.csv or .parquet)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="Max queued tickers (default: 2x workers)")
+    parser.add_argument("--growth", type=float, default=DEFAULT_GROWTH * 100, help="DCF growth rate %% (5 yr)")
+    parser.add_argument("--terminal", type=float, default=DEFAULT_TERMINAL_GROWTH * 100, help="DCF terminal growth %%")
+    parser.add_argument("--wacc", type=float, default=DEFAULT_WACC * 100, help="DCF discount rate (WACC) %%")
+    args = parser.parse_args(argv)
+
+    tickers = [t.strip().upper() for t in args.tickers if t.strip()]
+    if args.universe:
+        tickers += [t for t in read_universe(args.universe) if t not in tickers]
+    if not tickers:
+        parser.error("no tickers given (pass tickers or --universe)")
+
+    dcf_params = {"growth": args.growth / 100, "terminal_growth": args.terminal / 100, "wacc": args.wacc / 100}
+
+    total = len(tickers)
+    started = time.time()
+
+    def progress(row, n):
+        status = f"ERROR {row['error']}" if row["error"] else "ok"
+        print(f"[{n}/{total}] {row['ticker']}: {status}", file=sys.stderr)
+
+    writer = open_writer(args.out)
+    try:
+        ok, errors = run_batch(tickers, writer, args.workers, args.max_in_flight, dcf_params, progress)
+    finally:
+        writer.close()
+
+    print(f"Valued {ok}/{total} tickers ({errors} errors) in {time.time() - started:.1f}s -> {args.out}", file=sys.stderr)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
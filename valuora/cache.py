@@ -0,0 +1,369 @@
+"""
+In-process TTL cache for the core fetchers.
+
+This plays the role of st.cache_data / st.cache_resource for code that runs without
+Streamlit (the API server, batch jobs), and the Streamlit app shares it through the
+decorated fetchers in valuora.data and valuora.macro.
+
+    @ttl_cache(ttl=3600)
+    def fetch_something(ticker): ...
+
+    fetch_something.cache_clear()
+    fetch_something.cache_stats()   # {'hits': .., 'misses': .., 'evictions': .., 'size': .., 'shared_hits': ..}
+
+A fetcher that falls back after an upstream error returns uncached(fallback): the caller
+gets the fallback, and the next call tries upstream again.
+
+Functions decorated with shared=True also go through a host-wide store, so every worker
+process (Streamlit replicas, API, batch) on the machine shares one warm cache:
+
+    VALUORA_CACHE=sqlite                    # ~/.cache/valuora/cache.sqlite
+    VALUORA_CACHE=sqlite:/var/cache/valuora.sqlite
+
+Values are pickled into SQLite (WAL mode), and a per-key lock file makes concurrent
+processes wait for one upstream fetch instead of all making it. Without VALUORA_CACHE
+(or with VALUORA_CACHE=memory) the cache stays per-process.
+"""
+import contextlib
+import functools
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import fcntl
+except ImportError: # Windows: no cross-process fill lock, the store still works
+    fcntl = None
+
+# name -> wrapper, for cache-wide stats and clearing
+_REGISTRY = {}
+
+DEFAULT_SHARED_PATH = os.path.join(os.path.expanduser("~"), ".cache", "valuora", "cache.sqlite")
+
+# Purge expired rows roughly every this many writes
+PURGE_EVERY = 100
+
+_MISSING = object()
+
+
+def make_key(args, kwargs):
+    """Builds a hashable key, turning lists/dicts/sets in the arguments into tuples."""
+    def freeze(v):
+        if isinstance(v, (list, tuple)):
+            return tuple(freeze(x) for x in v)
+        if isinstance(v, dict):
+            return tuple(sorted((k, freeze(x)) for k, x in v.items()))
+        if isinstance(v, (set, frozenset)):
+            return tuple(sorted(freeze(x) for x in v))
+        return v
+    return (freeze(args), freeze(kwargs))
+
+
+class SQLiteCacheStore:
+    """Host-wide pickled key/value store with expiry, shared by every process using `path`."""
+
+    def __init__(self, path=DEFAULT_SHARED_PATH):
+        self.path = path
+        self.lock_dir = f"{path}.locks"
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._local = threading.local()
+        self._writes = 0
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, namespace TEXT NOT NULL, expires_at REAL NOT NULL, value BLOB NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_namespace ON entries (namespace)")
+        conn.commit()
+
+    def _conn(self):
+        # sqlite3 connections can't be shared across threads
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.path, timeout=30)
+        return conn
+
+    @staticmethod
+    def store_key(namespace, key):
+        return hashlib.sha256(f"{namespace}:{key!r}".encode()).hexdigest()
+
+    def get(self, namespace, key):
+        """Returns (value, expires_at), or None if missing/expired."""
+        row = self._conn().execute(
+            "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?",
+            (self.store_key(namespace, key), time.time()),
+        ).fetchone()
+        if row is None:
+            return None
+        return pickle.loads(row[0]), row[1]
+
+    def set(self, namespace, key, value, ttl):
+        expires_at = time.time() + ttl
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (key, namespace, expires_at, value) VALUES (?, ?, ?, ?)",
+            (self.store_key(namespace, key), namespace, expires_at, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)),
+        )
+        self._writes += 1
+        if self._writes % PURGE_EVERY == 0:
+            conn.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+        return expires_at
+
+    @contextlib.contextmanager
+    def fill_lock(self, namespace, key):
+        """Exclusive cross-process lock for filling one key."""
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.lock_dir, f"{self.store_key(namespace, key)[:32]}.lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def clear(self, namespace=None):
+        conn = self._conn()
+        if namespace is None:
+            conn.execute("DELETE FROM entries")
+        else:
+            conn.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+        conn.commit()
+
+
+_SHARED = {"store": None, "configured": False}
+_SHARED_LOCK = threading.Lock()
+
+
+def shared_store_from_env():
+    spec = os.environ.get("VALUORA_CACHE", "memory").strip()
+    if spec in ("", "memory"):
+        return None
+    if spec == "sqlite" or spec.startswith("sqlite:"):
+        path = spec.partition(":")[2] or DEFAULT_SHARED_PATH
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        return SQLiteCacheStore(path)
+    raise ValueError(f"Unknown VALUORA_CACHE '{spec}' (expected memory or sqlite[:path])")
+
+
+def get_shared_store():
+    """The host-wide store for shared=True caches (None when caching is per-process)."""
+    with _SHARED_LOCK:
+        if not _SHARED["configured"]:
+            _SHARED["store"] = shared_store_from_env()
+            _SHARED["configured"] = True
+        return _SHARED["store"]
+
+
+def set_shared_store(store):
+    """Overrides VALUORA_CACHE (None = per-process only)."""
+    with _SHARED_LOCK:
+        _SHARED["store"] = store
+        _SHARED["configured"] = True
+
+
+class _Uncached:
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+
+def uncached(value):
+    """Return this from a ttl_cache'd function to hand `value` to the caller without caching it."""
+    return _Uncached(value)
+
+
+def ttl_cache(ttl=3600, maxsize=256, shared=False):
+    """
+    Memoizes a function for `ttl` seconds, keeping at most `maxsize` entries (LRU).
+    Concurrent callers asking for the same missing key wait for one fetch instead of
+    all hitting the network. With shared=True, misses also check the host-wide store
+    (see get_shared_store) before calling `func`, and results are written back to it;
+    use it only for functions returning picklable data (DataFrames, dicts, lists).
+    """
+    def decorator(func):
+        entries = OrderedDict() # key -> (expires_at, value)
+        key_locks = {}
+        lock = threading.Lock()
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "shared_hits": 0}
+        namespace = f"{func.__module__}.{func.__qualname__}"
+
+        def call(args, kwargs):
+            """(expires_at, value) from func; expires_at is None for an uncached() result."""
+            value = func(*args, **kwargs)
+            if isinstance(value, _Uncached):
+                return None, value.value
+            return time.time() + ttl, value
+
+        def fill(key, args, kwargs):
+            """Returns (expires_at, value), from the shared store if possible."""
+            store = get_shared_store() if shared else None
+            if store is None:
+                with lock:
+                    stats["misses"] += 1
+                return call(args, kwargs)
+
+            called = False
+            value = _MISSING
+            try:
+                with store.fill_lock(namespace, key):
+                    found = store.get(namespace, key)
+                    if found is not None:
+                        with lock:
+                            stats["shared_hits"] += 1
+                        return found[1], found[0]
+                    with lock:
+                        stats["misses"] += 1
+                    called = True
+                    value = func(*args, **kwargs)
+                    if isinstance(value, _Uncached):
+                        return None, value.value
+                    try:
+                        return store.set(namespace, key, value, ttl), value
+                    except (pickle.PicklingError, TypeError, AttributeError):
+                        return time.time() + ttl, value # not shareable; keep it local
+            except (sqlite3.Error, OSError):
+                if called and value is _MISSING:
+                    # func itself failed (requests errors are OSErrors): not a store problem
+                    raise
+                if value is not _MISSING:
+                    # Computed, but the store failed writing it back / releasing the lock
+                    return time.time() + ttl, value
+                # Store unavailable (locked too long, disk full...): behave like a local cache
+                with lock:
+                    stats["misses"] += 1
+                return call(args, kwargs)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+
+            with lock:
+                entry = entries.get(key)
+                if entry and entry[0] > time.time():
+                    entries.move_to_end(key)
+                    stats["hits"] += 1
+                    return entry[1]
+                key_lock = key_locks.setdefault(key, threading.Lock())
+
+            with key_lock:
+                # Someone else may have filled it while we waited
+                with lock:
+                    entry = entries.get(key)
+                    if entry and entry[0] > time.time():
+                        entries.move_to_end(key)
+                        stats["hits"] += 1
+                        return entry[1]
+
+                expires_at, value = fill(key, args, kwargs)
+
+                with lock:
+                    if expires_at is not None:
+                        entries[key] = (expires_at, value)
+                        entries.move_to_end(key)
+                        while len(entries) > maxsize:
+                            entries.popitem(last=False)
+                            stats["evictions"] += 1
+                    key_locks.pop(key, None)
+            return value
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+            store = get_shared_store() if shared else None
+            if store is not None:
+                store.clear(namespace)
+
+        def cache_stats():
+            with lock:
+                return dict(stats, size=len(entries))
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_stats = cache_stats
+        _REGISTRY[namespace] = wrapper
+        return wrapper
+    return decorator
+
+
+def cache_stats():
+    """Stats for every ttl_cache'd function: {'module.func': {'hits': .., ...}}."""
+    return {name: fn.cache_stats() for name, fn in _REGISTRY.items()}
+
+
+def clear_all():
+    for fn in _REGISTRY.values():
+        fn.cache_clear()
+
+
+# --- Per-headline results (valuora.tagging, valuora.sentiment) ---
+class HeadlineCache:
+    """
+    Thread-safe LRU of one result per headline, keyed by a hash of its text, so batch
+    scorers only process the headlines they haven't seen:
+
+        keys, results, missing = cache.lookup(titles)   # results[i] is None for misses
+        cache.store([keys[i] for i in missing], fresh)
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._entries = OrderedDict() # headline digest -> result
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(title):
+        return hashlib.blake2b((title or "").encode("utf-8"), digest_size=12).digest()
+
+    def lookup(self, titles):
+        """(keys, results, missing): cached result per title (None when missing) and the missing indices."""
+        keys = [self.digest(t) for t in titles]
+        results = [None] * len(titles)
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                cached = self._entries.get(key)
+                if cached is not None:
+                    self._entries.move_to_end(key)
+                    results[i] = cached
+                else:
+                    missing.append(i)
+        return keys, results, missing
+
+    def store(self, keys, values):
+        with self._lock:
+            for key, value in zip(keys, values):
+                self._entries[key] = value
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def env_singleton(env_var, factory):
+    """
+    A getter for one process-wide factory(config) per value of `env_var`, where config is
+    the JSON file the variable points at (None when it is unset). Built on first use.
+    """
+    instances = {}
+    lock = threading.Lock()
+
+    def get():
+        path = os.environ.get(env_var)
+        with lock:
+            if path not in instances:
+                config = None
+                if path:
+                    with open(path) as f:
+                        config = json.load(f)
+                instances[path] = factory(config)
+            return instances[path]
+    return get
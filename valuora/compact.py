@@ -0,0 +1,140 @@
+"""
+Compact in-memory representation of price histories for the caches.
+
+A yfinance history (period="max") is float64 OHLC + Volume + Dividends + Stock Splits on
+a tz-aware DatetimeIndex: ~64 bytes per row. CompactHistory stores
+
+    prices       float32 (Open/High/Low/Close/Adj Close, ~7 significant digits)
+    Volume       uint32 (int64 only if it overflows), float32 if it has gaps
+    event cols   Dividends / Stock Splits / Capital Gains as sparse (row, value) pairs,
+                 dropped entirely when all zero
+    index        int32 local day numbers + tz name (+ run-length UTC offsets, a few per
+                 year of DST changes) for daily bars, int64 ns otherwise
+
+which is ~24 bytes per row. expand_history() rebuilds the original layout (float64
+prices, int64 volume, zero-filled event columns, tz-aware index), so callers never see
+the compact form.
+
+    compact = compact_history(stock.history(period="max"))
+    hist = expand_history(compact)
+"""
+import numpy as np
+import pandas as pd
+
+EVENT_COLUMNS = ("Dividends", "Stock Splits", "Capital Gains")
+VOLUME_COLUMN = "Volume"
+
+_DAY_NS = 86_400 * 10**9
+
+
+class CompactHistory:
+    __slots__ = ("columns", "index_name", "tz", "resolution", "index_unit", "index", "offsets", "dense", "events", "rows")
+
+    def __init__(self, columns, index_name, tz, resolution, index_unit, index, offsets, dense, events, rows):
+        self.columns = columns # original column order
+        self.index_name = index_name
+        self.tz = tz # tz name or None
+        self.resolution = resolution # datetime64 unit of the original index ("ns", "us", ...)
+        self.index_unit = index_unit # "D" (int32 days) or "ns" (int64 UTC)
+        self.index = index
+        self.offsets = offsets # (int32 run starts, int64 UTC-local ns) for "D" with a tz, else None
+        self.dense = dense # column -> ndarray
+        self.events = events # column -> (int32 rows, float64 values); all-zero columns map to None
+        self.rows = rows
+
+    @property
+    def nbytes(self):
+        total = self.index.nbytes + sum(a.nbytes for a in self.dense.values())
+        if self.offsets is not None:
+            total += self.offsets[0].nbytes + self.offsets[1].nbytes
+        total += sum(r.nbytes + v.nbytes for r, v in (e for e in self.events.values() if e is not None))
+        return total
+
+    def __len__(self):
+        return self.rows
+
+    def __repr__(self):
+        return f"<CompactHistory rows={self.rows} columns={len(self.columns)} nbytes={self.nbytes}>"
+
+
+def _pack_index(index):
+    """Returns (tz, unit, packed index, offsets)."""
+    tz = str(index.tz) if index.tz is not None else None
+    index = index.as_unit("ns")
+    local_ns = (index.tz_localize(None) if tz else index).asi8
+    if len(local_ns) and not (local_ns % _DAY_NS).any():
+        # Daily bars at local midnight: a day number is enough. The UTC offset only
+        # changes at DST transitions, so it is kept run-length encoded; rebuilding from
+        # it avoids a (slow) tz_localize on read.
+        offsets = None
+        if tz:
+            utc_minus_local = index.asi8 - local_ns
+            starts = np.concatenate(([0], np.flatnonzero(np.diff(utc_minus_local)) + 1))
+            offsets = (starts.astype(np.int32), utc_minus_local[starts])
+        return tz, "D", (local_ns // _DAY_NS).astype(np.int32), offsets
+    return tz, "ns", index.asi8.copy(), None
+
+
+def _unpack_index(compact):
+    if compact.index_unit == "D":
+        utc_ns = compact.index.astype(np.int64) * _DAY_NS
+        if compact.tz:
+            starts, values = compact.offsets
+            utc_ns += np.repeat(values, np.diff(np.append(starts, compact.rows)))
+    else:
+        utc_ns = compact.index
+    index = pd.DatetimeIndex(utc_ns, tz="UTC").tz_convert(compact.tz) if compact.tz else pd.DatetimeIndex(utc_ns)
+    return index.as_unit(compact.resolution).rename(compact.index_name)
+
+
+def _pack_volume(values):
+    if values.dtype.kind == "f" and np.isnan(values).any():
+        return values.astype(np.float32)
+    values = values.astype(np.int64)
+    if len(values) and values.min() >= 0 and values.max() <= np.iinfo(np.uint32).max:
+        return values.astype(np.uint32)
+    return values
+
+
+def compact_history(frame):
+    """
+    Packs a price-history DataFrame. Anything that isn't a DataFrame on a DatetimeIndex
+    (or has non-numeric columns) is returned unchanged, and expand_history passes it through.
+    """
+    if not isinstance(frame, pd.DataFrame) or not isinstance(frame.index, pd.DatetimeIndex):
+        return frame
+    if not all(pd.api.types.is_numeric_dtype(dtype) for dtype in frame.dtypes):
+        return frame
+
+    tz, unit, index, offsets = _pack_index(frame.index)
+    dense, events = {}, {}
+    for column in frame.columns:
+        values = frame[column].to_numpy()
+        if column in EVENT_COLUMNS:
+            rows = np.flatnonzero(values)
+            events[column] = (rows.astype(np.int32), values[rows].astype(np.float64)) if len(rows) else None
+        elif column == VOLUME_COLUMN:
+            dense[column] = _pack_volume(values)
+        else:
+            dense[column] = values.astype(np.float32)
+
+    return CompactHistory(list(frame.columns), frame.index.name, tz, frame.index.unit, unit, index, offsets, dense, events, len(frame))
+
+
+def expand_history(compact):
+    """Rebuilds the DataFrame compact_history() packed (float64 prices, int64 volume)."""
+    if not isinstance(compact, CompactHistory):
+        return compact
+
+    data = {}
+    for column in compact.columns:
+        if column in compact.events:
+            values = np.zeros(compact.rows)
+            if compact.events[column] is not None:
+                rows, event_values = compact.events[column]
+                values[rows] = event_values
+            data[column] = values
+        else:
+            values = compact.dense[column]
+            data[column] = values.astype(np.int64) if values.dtype.kind in "iu" else values.astype(np.float64)
+    return pd.DataFrame(data, index=_unpack_index(compact), copy=False)
@@ -0,0 +1,334 @@
+"""
+Market data fetchers: Yahoo Finance (with yahooquery failover), Yahoo and Google News,
+the peer comparison table and multi-ticker close panels.
+
+All network access goes through valuora.providers (live, record or replay). Fetched
+news items are also kept in the local headline archive (valuora.archive).
+"""
+import logging
+import time
+import xml.etree.ElementTree as ET
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import requests
+
+from valuora.archive import archive_items
+from valuora.cache import ttl_cache, uncached
+from valuora.compact import compact_history, expand_history
+from valuora.matrix import from_day_numbers, get_price_matrix, to_day_numbers
+from valuora.metrics import record_fetch_failure
+from valuora.peers import get_peer_index, peer_relevance
+from valuora.providers import get_provider
+from valuora.snapshots import get_snapshot
+from valuora.timing import span, timed
+
+logger = logging.getLogger(__name__)
+
+BROWSER_USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36'
+
+
+# --- ROBUST STOCK FETCHER ---
+def fetch_stock_data(ticker_symbol, on_failover=None):
+    """
+    Hybrid fetcher: Tries yfinance, fails over to yahooquery.
+    Returns: (stock, info). `on_failover(ticker_symbol)` is called before switching engines.
+    Raises whatever the underlying engines raise if both fail.
+    """
+    provider = get_provider()
+
+    session = requests.Session()
+    session.headers.update({'User-Agent': BROWSER_USER_AGENT})
+
+    # --- ATTEMPT 1: yfinance ---
+    # Note: yfinance > 0.2.x now requires curl_cffi session internally to bypass Cloudflare.
+    # Passing a raw requests.Session breaks it. It's safer to let yfinance handle its own session,
+    # but we can pass our standard session to yahooquery if needed.
+    with span("fetch", label="yfinance"):
+        stock = provider.ticker(ticker_symbol)
+        # Force a test download
+        hist = stock.history(period="1d")
+        info = stock.info if not hist.empty else None
+
+    if info is not None:
+        return stock, info
+
+    # --- ATTEMPT 2: yahooquery (The Fail-over) ---
+    if on_failover:
+        on_failover(ticker_symbol)
+    with span("fetch", label="yahooquery"):
+        yq_info = provider.all_modules(ticker_symbol, session=session)
+
+    # The yf.Ticker is still returned so statements/history keep the same structure
+    return stock, yq_info
+
+
+@ttl_cache(ttl=3600)
+def get_stock(ticker_symbol):
+    """Cached fetch_stock_data for headless callers (the st.cache_resource equivalent)."""
+    return fetch_stock_data(ticker_symbol)
+
+
+# --- PRICE HISTORY ---
+# yfinance periods used for incremental top-ups, with the calendar days each covers
+GAP_PERIODS = (("5d", 5), ("1mo", 28), ("3mo", 88), ("1y", 360), ("5y", 1800))
+
+
+def period_for_gap(days):
+    """Smallest yfinance period covering a gap of `days` calendar days."""
+    for period, covered in GAP_PERIODS:
+        if days <= covered:
+            return period
+    return "max"
+
+
+@ttl_cache(ttl=3600, shared=True)
+def _compact_history(ticker_symbol, period):
+    with span("fetch", label="yfinance"):
+        frame = get_provider().ticker(ticker_symbol).history(period=period)
+    return compact_history(frame)
+
+
+def fetch_history(ticker_symbol, period="max"):
+    """
+    Cached stock.history(period=...). The cache holds the compact form (valuora.compact);
+    callers get a regular float64 frame back.
+    """
+    return expand_history(_compact_history(ticker_symbol, period))
+
+
+def fetch_closes(tickers, start=None):
+    """
+    date x ticker closes from `start` (default: all history), on tz-naive exchange-local
+    dates (the macro store's calendar). Read from the price matrix where it has the ticker, otherwise from
+    the cached max history. Tickers that fail to fetch are logged and left out.
+    """
+    matrix = get_price_matrix()
+    columns = {}
+    for t in tickers:
+        try:
+            if matrix is not None and t in matrix:
+                closes = matrix.series(t, start=start)
+            else:
+                closes = fetch_history(t, period="max")['Close']
+                closes = closes.set_axis(from_day_numbers(to_day_numbers(closes.index)))
+                if start is not None:
+                    closes = closes[closes.index >= start]
+            if not closes.empty:
+                columns[t] = closes
+        except Exception as e:
+            logger.warning("Close history failed for %s: %s: %s", t, type(e).__name__, e)
+            record_fetch_failure("fetch_closes")
+    if not columns:
+        return pd.DataFrame()
+    return pd.DataFrame(columns).sort_index()
+
+
+# --- GOOGLE NEWS RSS FETCHER ---
+@ttl_cache(ttl=900, shared=True)
+def fetch_google_news_rss(ticker):
+    """
+    Fetches recent news from Google News RSS for the given ticker,
+    specifically searching for major financial outlets or general stock news.
+    """
+    try:
+        # Search query: "{ticker} stock" to get broad coverage including major outlets
+        url = f"https://news.google.com/rss/search?q={ticker}+stock&hl=en-US&gl=US&ceid=US:en"
+        with span("fetch", label="google_news"):
+            content = get_provider().http_get(url, timeout=5)
+
+        root = ET.fromstring(content)
+        items = []
+        for item in root.findall('.//item'):
+            title = item.find('title').text if item.find('title') is not None else 'No Title'
+            link = item.find('link').text if item.find('link') is not None else '#'
+            pub_date_str = item.find('pubDate').text if item.find('pubDate') is not None else ''
+            source = item.find('source').text if item.find('source') is not None else 'Google News'
+
+            # Parse Date
+            try:
+                # RFC 822 format used by RSS (e.g., "Wed, 02 Oct 2024 13:00:00 GMT")
+                pub_date = datetime.strptime(pub_date_str, '%a, %d %b %Y %H:%M:%S %Z')
+                timestamp = pub_date.timestamp()
+            except (TypeError, ValueError):
+                timestamp = time.time() # Fallback to now
+
+            items.append({
+                'title': title,
+                'link': link,
+                'publisher': source,
+                'providerPublishTime': timestamp,
+                'type': 'RSS'
+            })
+        archive_items(items, ticker, "google")
+        return items
+    except Exception as e:
+        # The news feed is optional; count and log it instead of failing the page
+        logger.warning("Google News RSS fetch failed for %r: %s: %s", ticker, type(e).__name__, e)
+        record_fetch_failure("fetch_google_news_rss")
+        return uncached([])
+
+
+# --- YAHOO NEWS ---
+@ttl_cache(ttl=900, shared=True)
+def fetch_stock_news(ticker_symbol):
+    """Yahoo Finance news items for the ticker ([] if the feed fails, not cached)."""
+    try:
+        with span("fetch", label="yfinance"):
+            news = get_provider().ticker(ticker_symbol).news or []
+    except Exception as e:
+        logger.warning("Yahoo news fetch failed for %r: %s: %s", ticker_symbol, type(e).__name__, e)
+        record_fetch_failure("fetch_stock_news")
+        return uncached([])
+    archive_items(news, ticker_symbol, "yahoo")
+    return news
+
+
+# --- COMPETITOR MAPPING ---
+def get_competitors(ticker, info):
+    """
+    Returns the industry and a list of 5 competitor tickers: the nearest peers from the
+    peer index (valuora.peers) when one is built, otherwise from a per-sector map.
+    Fallback to generic market indices if sector is unknown.
+    """
+    industry = info.get('industry', 'Unknown Industry')
+    sector = info.get('sector', 'Unknown Sector')
+
+    index = get_peer_index()
+    if index is not None:
+        peers = index.peers(ticker, k=5, info=info)
+        if peers:
+            return industry, [peer for peer, _ in peers]
+
+    # Simple hardcoded map for demonstration (expand as needed)
+    competitor_map = {
+        'Technology': ['MSFT', 'AAPL', 'NVDA', 'GOOGL', 'ORCL'],
+        'Financial Services': ['JPM', 'BAC', 'WFC', 'C', 'GS'],
+        'Healthcare': ['JNJ', 'PFE', 'LLY', 'MRK', 'ABBV'],
+        'Consumer Cyclical': ['AMZN', 'TSLA', 'HD', 'MCD', 'NKE'],
+        'Consumer Defensive': ['WMT', 'PG', 'KO', 'PEP', 'COST'],
+        'Energy': ['XOM', 'CVX', 'SHEL', 'TTE', 'BP'],
+        'Industrials': ['CAT', 'HON', 'UPS', 'GE', 'BA'],
+        'Communication Services': ['GOOG', 'META', 'NFLX', 'DIS', 'TMUS']
+    }
+
+    # Try sector match first
+    comps = competitor_map.get(sector, [])
+
+    # Fallback if sector map fails or empty
+    if not comps:
+        # Generic mixed bag if unknown
+        comps = ['SPY', 'QQQ', 'DIA', 'IWM', 'VTI']
+
+    # Ensure the main ticker isn't in the competitor list (replace if found)
+    if ticker in comps:
+        comps.remove(ticker)
+        # Add a filler if we removed one
+        if sector == 'Technology': comps.append('ADBE')
+        elif sector == 'Financial Services': comps.append('MS')
+        else: comps.append('VOO') # Generic ETF filler
+
+    return industry, comps[:5]
+
+
+# --- FETCH COMPARISON DATA ---
+# Metric columns of the comparison table, after 'Ticker'
+COMPARISON_COLUMNS = ["P/E", "PEG", "ROE", "EV/EBITDA", "P/S", "EV/Revenue", "Rev Growth", "1Y ROI", "5Y ROI"]
+
+
+def comparison_row(t, provider=None, matrix=None):
+    """
+    One row of the comparison table for ticker t, fetched live.
+    Returns: (row dict, info)
+    """
+    provider = provider or get_provider()
+    with span("fetch", label="yfinance"):
+        info = provider.ticker(t).info
+    if matrix is not None and t in matrix:
+        closes = matrix.series(t, start=matrix.last_date - pd.DateOffset(years=5))
+    else:
+        closes = fetch_history(t, period="5y")['Close']
+
+    # Metrics
+    pe = info.get('trailingPE')
+    peg = info.get('pegRatio')
+    roe = info.get('returnOnEquity')
+    ev_ebitda = info.get('enterpriseToEbitda')
+
+    # Growth Metrics
+    ps = info.get('priceToSalesTrailing12Months')
+    ev_rev = info.get('enterpriseToRevenue')
+    rev_growth = info.get('revenueGrowth')
+
+    # Returns (ROI)
+    roi_1y = None
+    roi_5y = None
+
+    if not closes.empty:
+        curr = closes.iloc[-1]
+        # 1 Year (approx 252 trading days)
+        if len(closes) > 252:
+            price_1y = closes.iloc[-252]
+            roi_1y = (curr - price_1y) / price_1y
+
+        # 5 Years (approx 1260 trading days)
+        if len(closes) > 1250: # Tolerance
+            price_5y = closes.iloc[0] # Start of 5y period
+            roi_5y = (curr - price_5y) / price_5y
+
+    row = {
+        "Ticker": t,
+        "P/E": pe if pe else np.nan,
+        "PEG": peg if peg else np.nan,
+        "ROE": roe if roe else np.nan,
+        "EV/EBITDA": ev_ebitda if ev_ebitda else np.nan,
+        "P/S": ps if ps else np.nan,
+        "EV/Revenue": ev_rev if ev_rev else np.nan,
+        "Rev Growth": rev_growth if rev_growth else np.nan,
+        "1Y ROI": roi_1y,
+        "5Y ROI": roi_5y
+    }
+    return row, info
+
+
+@ttl_cache(ttl=3600, shared=True)
+@timed("peers")
+def fetch_comparison_data(main_ticker, competitors):
+    """
+    Fetches P/E, PEG, 1Y Return, 5Y Return for main ticker and competitors.
+    Returns a DataFrame, with each row's peer relevance to the main ticker (1.0 for
+    every row when there is no peer index) in 'Relevance'.
+    Competitors in the nightly comparison snapshot (valuora.snapshots) are read from it;
+    only the main ticker and peers missing from it are fetched live.
+    """
+    provider = get_provider()
+    # Universe close matrix (valuora.matrix), when one is built, saves the 5y history fetches
+    matrix = get_price_matrix()
+    snapshot = get_snapshot()
+
+    tickers = [main_ticker] + competitors
+    data = []
+    main_info = {}
+
+    # Batch fetch might be faster for some things, but info/history is per ticker object usually in yfinance
+    # (unless using Tickers object which has limits in structure). Iteration is safer for 'info'.
+
+    for t in tickers:
+        if t != main_ticker and snapshot is not None and t in snapshot:
+            data.append(snapshot.row(t))
+            continue
+        try:
+            row, info = comparison_row(t, provider, matrix)
+            if t == main_ticker:
+                main_info = info
+            data.append(row)
+        except Exception as e:
+            # One bad peer shouldn't drop the whole table; count and log it instead
+            logger.warning("Comparison data failed for %s: %s: %s", t, type(e).__name__, e)
+            record_fetch_failure("fetch_comparison_data")
+
+    df = pd.DataFrame(data)
+    if not df.empty:
+        df["Relevance"] = peer_relevance(main_ticker, df["Ticker"].tolist(), main_info)
+    return df
@@ -0,0 +1,187 @@
+"""
+Near-duplicate headline clustering: MinHash signatures grouped through an LSH index.
+
+    labels = cluster_titles(titles)     # per title: index of the title leading its cluster
+    stories = dedupe(items)             # one canonical item per story, the rest under 'similar'
+
+The same story syndicated by several outlets ("Apple beats estimates as iPhone sales
+jump - Reuters", "Apple Beats Estimates As iPhone Sales Rise") lands in one cluster. Titles are compared as sets
+of words, with a trailing " - Publisher" dropped; two titles are linked when the
+estimated Jaccard similarity of their word sets is at least THRESHOLD.
+
+The suffix dropped is the item's own publisher when the title ends with it. Without a
+publisher, a trailing "<separator> up to four words" is only taken for one when the rest
+of the title is at least as long, so "U.S. - China trade talks resume" keeps its words.
+
+After tokenizing, the work is numpy over all titles at once: MinHash signatures, one
+sort per LSH band to find candidate pairs and a signature check of each candidate
+against its bucket's first title. A single pass over the checked pairs then forms the
+clusters. Cost grows linearly with the number of headlines.
+"""
+import re
+import zlib
+
+import numpy as np
+
+THRESHOLD = 0.6
+NUM_PERM = 96
+# 32 bands of 3 rows: pairs at THRESHOLD become candidates >99.9% of the time
+BANDS = 32
+SEED = 20240601
+
+_WORD = re.compile(r"\w+")
+# " - Reuters", " | MarketWatch": up to four words after a spaced separator at the end
+_SUFFIX = re.compile(r"\s+[-|–—]\s+(?:[^\s|–—-]+\s*){1,4}$")
+
+_rng = np.random.default_rng(SEED)
+_MUL = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) * np.uint64(2) + np.uint64(1) # odd multipliers
+_ADD = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+# Elements per chunk of the (permutations x words) hash matrix
+_CHUNK = 1 << 24
+
+
+def title_words(title, publisher=None):
+    """Lower-cased words of a headline without its publisher suffix (see the module docstring)."""
+    title = title or ""
+    if publisher:
+        stripped = re.sub(r"\s+[-|–—]\s+" + re.escape(str(publisher).strip()) + r"\s*$", "", title, flags=re.IGNORECASE)
+        if stripped != title and stripped.strip():
+            return _WORD.findall(stripped.lower())
+    words = _WORD.findall(title.lower())
+    match = _SUFFIX.search(title)
+    if match:
+        suffix = len(_WORD.findall(match.group()))
+        if 0 < suffix <= len(words) - suffix:
+            return words[:-suffix]
+    return words
+
+
+def signatures(titles, num_perm=NUM_PERM, publishers=None):
+    """(len(titles), num_perm) uint32 MinHash signatures of the titles' word sets."""
+    vocab = {}
+    ids, starts = [], []
+    publishers = publishers if publishers is not None else [None] * len(titles)
+    for i, (title, publisher) in enumerate(zip(titles, publishers)):
+        starts.append(len(ids))
+        words = set(title_words(title, publisher))
+        if not words:
+            # An empty title gets a word of its own, so it never matches anything
+            words = {f"\0{i}"}
+        ids.extend(vocab.setdefault(w, len(vocab)) for w in words)
+    if not ids:
+        return np.empty((0, num_perm), dtype=np.uint32)
+
+    # Each distinct word is hashed once per permutation (multiply-shift over a stable
+    # crc32, uint64 arithmetic wrapping mod 2**64); titles then take the minimum over
+    # their words' columns
+    base = np.fromiter((zlib.crc32(w.encode()) for w in vocab), dtype=np.uint64, count=len(vocab))
+    base = (base + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15)
+    word_hashes = ((_MUL[:num_perm, None] * base[None, :] + _ADD[:num_perm, None]) >> np.uint64(32)).astype(np.uint32)
+
+    ids = np.asarray(ids)
+    starts = np.asarray(starts)
+    sig = np.empty((num_perm, len(starts)), dtype=np.uint32)
+    step = max(1, _CHUNK // len(ids))
+    for lo in range(0, num_perm, step):
+        sig[lo:lo + step] = np.minimum.reduceat(word_hashes[lo:lo + step, ids], starts, axis=1)
+    return np.ascontiguousarray(sig.T)
+
+
+def candidate_pairs(sig, bands=BANDS):
+    """
+    (member, first) index pairs that share an LSH bucket: every title in a bucket is
+    paired with the bucket's first title, so each band adds at most len(sig) pairs.
+    """
+    n = len(sig)
+    rows = sig.shape[1] // bands
+    pairs = []
+    for b in range(bands):
+        key = np.zeros(n, dtype=np.uint64)
+        for col in sig[:, b * rows:(b + 1) * rows].T.astype(np.uint64):
+            key = (key ^ col) * np.uint64(0x100000001B3)
+        order = np.argsort(key, kind="stable")
+        sorted_key = key[order]
+        new_bucket = np.r_[True, sorted_key[1:] != sorted_key[:-1]]
+        first = order[np.flatnonzero(new_bucket)[np.cumsum(new_bucket) - 1]]
+        shared = order != first
+        pairs.append(order[shared].astype(np.int64) * n + first[shared])
+    pairs = np.sort(np.concatenate(pairs)) if pairs else np.empty(0, dtype=np.int64)
+    pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]] if len(pairs) else pairs
+    return pairs // n, pairs % n
+
+
+def star_clusters(sig, members, firsts, threshold=THRESHOLD):
+    """
+    Cluster label per title from verified (member, first) pairs, where first < member.
+    In index order, a title joins the cluster of its earliest similar title, provided it
+    is also similar to that cluster's lead; otherwise it leads its own. Every member is
+    similar to its lead, so clusters can't chain (A~B, B~C, ... merging unrelated
+    headlines) the way connected components do.
+    """
+    n = len(sig)
+    need = threshold * sig.shape[1]
+    order = np.lexsort((firsts, members))
+    members, firsts = members[order], firsts[order]
+    bounds = np.searchsorted(members, np.arange(n + 1))
+    labels = np.arange(n)
+    for i in np.unique(members).tolist():
+        for first in firsts[bounds[i]:bounds[i + 1]].tolist():
+            lead = labels[first] # `first` itself when it leads
+            if lead == first or np.count_nonzero(sig[i] == sig[lead]) >= need:
+                labels[i] = lead
+                break
+    return labels
+
+
+def cluster_titles(titles, threshold=THRESHOLD, num_perm=NUM_PERM, bands=BANDS, publishers=None):
+    """
+    Cluster label per title: the index of the title leading its near-duplicate group.
+    `publishers` (one per title, None where unknown) names the suffix to drop.
+
+    >>> cluster_titles([
+    ...     "U.S. - China trade talks resume",
+    ...     "U.S. - Mexico border deal signed",
+    ...     "Oil - prices surge on Hormuz",
+    ...     "Oil - tanker seized near Yemen",
+    ...     "Apple beats estimates as iPhone sales jump - Reuters",
+    ...     "Apple beats estimates as iPhone sales jump - CNBC",
+    ... ], publishers=[None, None, None, None, "Reuters", "CNBC"]).tolist()
+    [0, 1, 2, 3, 4, 4]
+    """
+    titles = list(titles)
+    if not titles:
+        return np.empty(0, dtype=np.intp)
+    sig = signatures(titles, num_perm, publishers)
+    a, b = candidate_pairs(sig, bands)
+    similar = np.count_nonzero(sig[a] == sig[b], axis=1) >= threshold * sig.shape[1]
+    return star_clusters(sig, a[similar], b[similar], threshold)
+
+
+def dedupe(items, threshold=THRESHOLD, time_key="providerPublishTime"):
+    """
+    One item per near-duplicate cluster, in order of each cluster's first appearance. The
+    canonical item is the earliest published (the outlet that broke the story); it is
+    returned as a copy with the other members under 'similar'.
+    """
+    if not items:
+        return []
+    labels = cluster_titles(
+        [item.get("title") for item in items], threshold,
+        publishers=[item.get("publisher") or item.get("source") for item in items],
+    )
+    clusters = {}
+    for i, label in enumerate(labels.tolist()):
+        clusters.setdefault(label, []).append(i)
+
+    stories = []
+    for members in clusters.values():
+        canonical = min(members, key=lambda i: (_published(items[i], time_key), i))
+        story = dict(items[canonical])
+        story["similar"] = [items[i] for i in members if i != canonical]
+        stories.append(story)
+    return stories
+
+
+def _published(item, time_key):
+    published = item.get(time_key)
+    return float("inf") if published is None else published
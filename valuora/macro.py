@@ -0,0 +1,260 @@
+"""
+Global macro indicators (commodities, yields, indices) and geopolitical summaries
+(valuora.summarize for the content, valuora.sentiment for the tone).
+
+Macro closes are kept in a local history store (MacroHistoryStore): the first refresh
+downloads the full history, later ones only the days since the last stored row, so any
+lookback (60d, 1y, 5y, max) is served without re-downloading.
+"""
+import json
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from valuora.cache import ttl_cache
+from valuora.data import period_for_gap
+from valuora.metrics import record_fetch_failure
+from valuora.providers import get_provider
+from valuora.sentiment import default_scorer, label
+from valuora.summarize import summarize_headlines
+from valuora.timing import span
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Display name -> Yahoo symbol
+MACRO_TICKERS = {
+    "Crude Oil (WTI)": "CL=F",
+    "Gold": "GC=F",
+    "Copper": "HG=F",
+    "10Y Treasury Yield": "^TNX",
+    "S&P 500": "^GSPC",
+    "NASDAQ": "^IXIC",
+    "Hang Seng": "^HSI"
+}
+
+# Chokepoint name -> Google News query
+CHOKEPOINTS = {
+    "Strait of Hormuz": "Strait of Hormuz Iran blockade",
+    "Suez Canal": "Suez Canal Red Sea shipping",
+    "Malacca Strait": "Malacca Strait shipping news"
+}
+
+# Default/Demo Values when Alpha Vantage is not configured
+DEMO_MACRO_DATA = {"oil": 92.50, "spx": 5100, "gold": 2150}
+
+
+def fetch_wti_price(av_key):
+    """
+    Latest WTI crude price from Alpha Vantage (the 'clean' heartbeat for oil).
+    Raises on network errors or rate limiting (the response has no 'data').
+    """
+    oil_url = f'https://www.alphavantage.co/query?function=WTI&interval=daily&apikey={av_key}'
+    with span("fetch", label="alpha_vantage"):
+        r = json.loads(get_provider().http_get(oil_url))
+        if 'data' not in r:
+            # Throttled responses come back as 200 with a 'Note'/'Information' message
+            raise RuntimeError(f"Alpha Vantage rate limit: {r.get('Note') or r.get('Information') or r}")
+    return float(r['data'][0]['value'])
+
+
+# --- MACRO HISTORY STORE ---
+# Lookback -> how far back from the last stored day (None = everything)
+LOOKBACKS = {
+    "60d": pd.Timedelta(days=60),
+    "1y": pd.DateOffset(years=1),
+    "5y": pd.DateOffset(years=5),
+    "max": None,
+}
+
+# The store is topped up at most this often (the background refresher forces it)
+STORE_MAX_AGE_S = 3600
+
+DEFAULT_MACRO_STORE = os.path.join(os.path.expanduser("~"), ".cache", "valuora", "macro_history.pkl")
+
+
+class MacroHistoryStore:
+    """Daily closes for MACRO_TICKERS (Yahoo symbols as columns) in one local pickle."""
+
+    def __init__(self, path):
+        self.path = path
+        self._loaded = (None, pd.DataFrame()) # (mtime, frame)
+
+    def load(self):
+        """The stored frame (re-read only when the file changed)."""
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return pd.DataFrame()
+        if self._loaded[0] != mtime:
+            self._loaded = (mtime, pd.read_pickle(self.path))
+        return self._loaded[1]
+
+    def age(self):
+        """Seconds since the last successful refresh (inf if never)."""
+        try:
+            return time.time() - os.stat(self.path).st_mtime
+        except OSError:
+            return float("inf")
+
+    @contextmanager
+    def _lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(f"{self.path}.lock", "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def refresh(self, max_age=STORE_MAX_AGE_S):
+        """
+        Downloads what's missing (everything on the first run, otherwise the smallest period
+        covering the days since the last stored row) unless refreshed within `max_age`.
+        Returns the number of new rows. Raises if the download fails.
+        """
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with self._lock():
+            if self.age() < max_age:
+                return 0
+            stored = self.load()
+            if stored.empty:
+                period = "max"
+            else:
+                period = period_for_gap((pd.Timestamp.today().normalize() - stored.index[-1].normalize()).days + 1)
+
+            with span("fetch", label="yfinance"):
+                new = get_provider().download(list(MACRO_TICKERS.values()), period=period)['Close']
+            if new.empty:
+                raise ValueError(f"macro download (period={period}) returned no data")
+
+            # Newer values win on overlapping days (today's close gets revised intraday)
+            merged = pd.concat([stored[~stored.index.isin(new.index)], new]).sort_index() if not stored.empty else new
+            added = len(merged) - len(stored)
+
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            merged.to_pickle(tmp)
+            os.replace(tmp, self.path)
+            return added
+
+    def history(self, lookback="60d"):
+        """Stored closes for `lookback` (see LOOKBACKS), with display-name columns."""
+        data = self.load()
+        if data.empty:
+            return data
+        start = LOOKBACKS[lookback]
+        if start is not None:
+            data = data[data.index > data.index[-1] - start]
+        return data.rename(columns={v: k for k, v in MACRO_TICKERS.items()})
+
+
+_STORES = {}
+
+
+def get_macro_store(path=None):
+    """Process-wide store at `path` (default: VALUORA_MACRO_STORE or ~/.cache/valuora)."""
+    path = path or os.environ.get("VALUORA_MACRO_STORE", DEFAULT_MACRO_STORE)
+    if path not in _STORES:
+        _STORES[path] = MacroHistoryStore(path)
+    return _STORES[path]
+
+
+def latest_prices(data):
+    """Last non-NaN value per macro series (None where there is none)."""
+    latest_data = {}
+    for name in MACRO_TICKERS.keys():
+        if name in data.columns:
+            latest_data[name] = data[name].dropna().iloc[-1] if not data[name].dropna().empty else None
+        else:
+            latest_data[name] = None
+    return latest_data
+
+
+@ttl_cache(ttl=3600, shared=True)
+def fetch_macro_context(lookback="60d"):
+    """
+    Historical data for key global macro indicators over `lookback` (60d, 1y, 5y, max),
+    returning both the latest prices and the historical DataFrame.
+    Tops up the local history store first; if that fails, serves what is stored.
+    """
+    store = get_macro_store()
+    try:
+        store.refresh()
+    except Exception as e:
+        logger.warning("Macro history refresh failed: %s: %s", type(e).__name__, e)
+        record_fetch_failure("fetch_macro_context")
+    data = store.history(lookback)
+    if data.empty:
+        return {}, pd.DataFrame()
+    return latest_prices(data), data
+
+
+def fetch_macro_snapshot(av_key=None):
+    """
+    Uncached macro fetch for background refreshers: tops up the history store, then returns
+    the 60-day history plus latest prices, with WTI overridden by Alpha Vantage when a key is set.
+    Returns {'latest': {...}, 'history': DataFrame, 'oil_source': 'alpha_vantage' | 'demo' | 'yahoo',
+    'av_status': None | 'online' | 'rate_limited'}.
+    If the top-up fails, the snapshot is built from the stored history (raises only when
+    there is none).
+    """
+    store = get_macro_store()
+    try:
+        store.refresh(max_age=0)
+    except Exception as e:
+        logger.warning("Macro history refresh failed: %s: %s", type(e).__name__, e)
+        record_fetch_failure("fetch_macro_snapshot")
+        if store.load().empty:
+            raise
+    hist_macro = store.history("60d")
+    current_prices = latest_prices(hist_macro) if not hist_macro.empty else {}
+
+    oil_source, av_status = "yahoo", None
+    if av_key:
+        try:
+            current_prices["Crude Oil (WTI)"] = fetch_wti_price(av_key)
+            oil_source, av_status = "alpha_vantage", "online"
+        except Exception:
+            av_status = "rate_limited"
+    if oil_source != "alpha_vantage":
+        # Same as the Command Center has always shown without Alpha Vantage
+        current_prices["Crude Oil (WTI)"] = DEMO_MACRO_DATA["oil"]
+        oil_source = "demo"
+
+    return {"latest": current_prices, "history": hist_macro, "oil_source": oil_source, "av_status": av_status}
+
+
+def get_ai_geopol_summary(location, news_items):
+    """
+    Extractive report on a location's headlines (valuora.summarize): the most representative
+    stories, recurring regions / commodities / names, and the lexicon sentiment (valuora.sentiment).
+    """
+    if not news_items:
+        return "No recent intelligence gathered for this sector."
+
+    titles = [n['title'] for n in news_items]
+    digest = summarize_headlines(titles, k=3, exclude=[location, CHOKEPOINTS.get(location, "")],
+                                 publishers=[n.get('publisher') for n in news_items])
+    scores = default_scorer().score_many(titles).tolist()
+    mean = sum(scores) / len(scores)
+    negative = sum(label(x) == "negative" for x in scores)
+    positive = sum(label(x) == "positive" for x in scores)
+
+    stories = f"{len(titles)} {'story' if len(titles) == 1 else 'stories'}"
+    summary = f"**Intelligence Report:** {stories} on {location}; headline sentiment is {label(mean)} "
+    summary += f"({mean:+.2f}: {negative} negative, {positive} positive)."
+    recurring = [f"{name.title() if kind == 'regions' else name} ({n})"
+                 for kind in ("regions", "commodities", "entities") for name, n in digest[kind][:3]]
+    if recurring:
+        summary += f" Recurring: {', '.join(recurring)}."
+    summary += "\n\n" + "\n".join(f"- {title}" for title in digest["headlines"])
+    return summary
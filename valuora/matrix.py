@@ -0,0 +1,323 @@
+"""
+Memory-mapped date x ticker close-price matrix for universe-wide analytics.
+
+On disk (one directory):
+    closes-<gen>.f32   float32 [dates x column capacity], row-major, NaN where there is no price
+    dates-<gen>.i32    int32 day numbers (days since 1970-01-01, exchange-local date), one per row
+    meta.json          generation, tickers (ticker -> column is their position), row count,
+                       column capacity
+
+Readers map the files read-only, so the Streamlit process and every batch worker share
+the same page cache instead of each holding a pandas copy. Writers take a file lock,
+append rows / tickers in place and publish by atomically replacing meta.json; readers
+pick up appends with refresh(). Only when the ticker count outgrows the column capacity,
+or a frame brings dates older than / between the stored ones, are the files rewritten,
+as a new generation so that readers still mapping the old one are unaffected.
+
+    python -m valuora.matrix build --universe universe.csv --root data/prices
+    python -m valuora.matrix update --root data/prices          # fetch only the missing days
+
+    m = PriceMatrix("data/prices")   # or get_price_matrix() with VALUORA_PRICE_MATRIX set
+    m.series("AAPL")              # pd.Series of closes
+    m.frame(["AAPL", "MSFT"])     # date x ticker DataFrame
+    m.values[:, m.column("AAPL")] # zero-copy float32 view
+"""
+import argparse
+import json
+import os
+import sys
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+META_FILE = "meta.json"
+LOCK_FILE = "lock"
+
+DEFAULT_COLUMN_CAPACITY = 1024
+DTYPE = np.float32
+
+_DAY_NS = 86_400 * 10**9
+
+
+def to_day_numbers(index):
+    """DatetimeIndex (tz-aware or naive) -> int32 exchange-local day numbers."""
+    index = pd.DatetimeIndex(index)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return (index.normalize().as_unit("ns").asi8 // _DAY_NS).astype(np.int32)
+
+
+def from_day_numbers(days):
+    return pd.DatetimeIndex(np.asarray(days, dtype=np.int64) * _DAY_NS).rename("Date")
+
+
+class PriceMatrix:
+    """Read side (and, via append(), write side) of a matrix directory."""
+
+    def __init__(self, root):
+        self.root = root
+        self.refresh()
+
+    def _path(self, name):
+        return os.path.join(self.root, name)
+
+    @classmethod
+    def create(cls, root, column_capacity=DEFAULT_COLUMN_CAPACITY):
+        os.makedirs(root, exist_ok=True)
+        if os.path.exists(os.path.join(root, META_FILE)):
+            return cls(root)
+        open(os.path.join(root, _closes_file(0)), "wb").close()
+        open(os.path.join(root, _dates_file(0)), "wb").close()
+        _write_meta(root, {"generation": 0, "tickers": [], "rows": 0, "column_capacity": column_capacity})
+        return cls(root)
+
+    def refresh(self):
+        """Re-reads meta.json and remaps the files (picks up appends from other processes)."""
+        with open(self._path(META_FILE)) as f:
+            meta = json.load(f)
+        self.generation = meta["generation"]
+        self.tickers = meta["tickers"]
+        self.rows = meta["rows"]
+        self.column_capacity = meta["column_capacity"]
+        self._columns = {t: i for i, t in enumerate(self.tickers)}
+        if self.rows:
+            self._closes = np.memmap(self._path(_closes_file(self.generation)), dtype=DTYPE, mode="r", shape=(self.rows, self.column_capacity))
+            self._days = np.memmap(self._path(_dates_file(self.generation)), dtype=np.int32, mode="r", shape=(self.rows,))
+        else:
+            self._closes = np.empty((0, self.column_capacity), dtype=DTYPE)
+            self._days = np.empty(0, dtype=np.int32)
+
+    # --- Read API ---
+    @property
+    def shape(self):
+        return self.rows, len(self.tickers)
+
+    @property
+    def values(self):
+        """Read-only float32 [dates x tickers] view of the mapped file (no copy)."""
+        return self._closes[:, :len(self.tickers)]
+
+    @property
+    def dates(self):
+        return from_day_numbers(self._days)
+
+    @property
+    def last_date(self):
+        return from_day_numbers(self._days[-1:])[0] if self.rows else None
+
+    def __contains__(self, ticker):
+        return ticker in self._columns
+
+    def column(self, ticker):
+        return self._columns[ticker]
+
+    def _row_range(self, start=None, end=None):
+        lo = int(np.searchsorted(self._days, to_day_numbers([start])[0])) if start is not None else 0
+        hi = int(np.searchsorted(self._days, to_day_numbers([end])[0], side="right")) if end is not None else self.rows
+        return lo, hi
+
+    def series(self, ticker, start=None, end=None, dropna=True):
+        """Closes for one ticker as a float64 Series (NaN rows dropped by default)."""
+        lo, hi = self._row_range(start, end)
+        s = pd.Series(self._closes[lo:hi, self._columns[ticker]].astype(np.float64), index=self.dates[lo:hi], name=ticker)
+        return s.dropna() if dropna else s
+
+    def frame(self, tickers=None, start=None, end=None):
+        """date x ticker float64 DataFrame for `tickers` (default: all). Unknown tickers are skipped."""
+        tickers = [t for t in (tickers or self.tickers) if t in self._columns]
+        lo, hi = self._row_range(start, end)
+        cols = [self._columns[t] for t in tickers]
+        return pd.DataFrame(self._closes[lo:hi][:, cols].astype(np.float64), index=self.dates[lo:hi], columns=tickers)
+
+    # --- Write API ---
+    @contextmanager
+    def _write_lock(self):
+        if fcntl is None:
+            yield
+            return
+        with open(self._path(LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def append(self, closes):
+        """
+        Merges a date x ticker frame of closes: new tickers get columns, new dates get
+        rows, and values on existing dates overwrite what is stored.
+        Returns (new_rows, new_tickers).
+        """
+        closes = closes.sort_index()
+        days = to_day_numbers(closes.index)
+        # Two timestamps on the same local day (e.g. an intraday tick) -> keep the last
+        keep = np.append(days[1:] != days[:-1], True) if len(days) else np.array([], dtype=bool)
+        closes, days = closes[keep], days[keep]
+
+        with self._write_lock():
+            self.refresh() # someone else may have appended since we opened
+            new_tickers = [t for t in closes.columns if t not in self._columns]
+            tickers = self.tickers + new_tickers
+            capacity = self.column_capacity
+            while len(tickers) > capacity:
+                capacity *= 2
+
+            new_days = np.setdiff1d(days, self._days)
+            in_order = not self.rows or not len(new_days) or new_days[0] > self._days[-1]
+            if in_order and capacity == self.column_capacity:
+                generation, all_days = self.generation, self._append_rows(new_days)
+            else:
+                generation, all_days = self._rewrite(np.union1d(self._days, new_days), capacity)
+            rows = len(all_days)
+
+            if rows and len(closes.columns):
+                closes_mm = np.memmap(self._path(_closes_file(generation)), dtype=DTYPE, mode="r+", shape=(rows, capacity))
+                row_idx = np.searchsorted(all_days, days)
+                col_of = {t: i for i, t in enumerate(tickers)}
+                for ticker in closes.columns:
+                    values = closes[ticker].to_numpy(dtype=np.float64)
+                    mask = ~np.isnan(values)
+                    closes_mm[row_idx[mask], col_of[ticker]] = values[mask]
+                closes_mm.flush()
+                del closes_mm
+
+            _write_meta(self.root, {"generation": generation, "tickers": tickers, "rows": rows, "column_capacity": capacity})
+            if generation != self.generation:
+                # Readers that already mapped the old files keep them until they refresh
+                for name in (_closes_file(self.generation), _dates_file(self.generation)):
+                    os.remove(self._path(name))
+            self.refresh()
+        return len(new_days), new_tickers
+
+    def _append_rows(self, new_days):
+        """
+        Extends the current generation in place with NaN rows for `new_days` (all after the
+        last row). Writes start at the published row count, dropping any rows an earlier
+        append wrote but never published (it crashed before meta.json), so dates and closes
+        stay aligned.
+        """
+        if len(new_days):
+            for name, data, row_bytes in (
+                (_dates_file(self.generation), new_days.astype(np.int32), np.dtype(np.int32).itemsize),
+                (_closes_file(self.generation), np.full((len(new_days), self.column_capacity), np.nan, dtype=DTYPE),
+                 self.column_capacity * np.dtype(DTYPE).itemsize),
+            ):
+                with open(self._path(name), "r+b") as f:
+                    f.truncate(self.rows * row_bytes)
+                    f.seek(self.rows * row_bytes)
+                    f.write(data.tobytes())
+        return np.concatenate([np.asarray(self._days), new_days.astype(np.int32)])
+
+    def _rewrite(self, all_days, capacity):
+        """Writes a new generation holding `all_days` x `capacity`, with the current values copied in."""
+        generation = self.generation + 1
+        wide = np.full((len(all_days), capacity), np.nan, dtype=DTYPE)
+        if self.rows:
+            wide[np.searchsorted(all_days, self._days), :self.column_capacity] = self._closes
+        wide.tofile(self._path(_closes_file(generation)))
+        all_days.astype(np.int32).tofile(self._path(_dates_file(generation)))
+        return generation, all_days
+
+
+def _closes_file(generation):
+    return f"closes-{generation}.f32"
+
+
+def _dates_file(generation):
+    return f"dates-{generation}.i32"
+
+
+def _write_meta(root, meta):
+    tmp = os.path.join(root, f"{META_FILE}.{os.getpid()}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, os.path.join(root, META_FILE))
+
+
+# A matrix older than this (last row vs today) isn't used in place of live history
+MAX_AGE_DAYS = 4
+
+_OPENED = {} # root -> (meta mtime, PriceMatrix)
+
+
+def get_price_matrix(root=None, max_age_days=MAX_AGE_DAYS):
+    """
+    The matrix at `root` (default: VALUORA_PRICE_MATRIX), reopened when another process
+    has published an update. None if it isn't configured, doesn't exist or is stale.
+    """
+    root = root or os.environ.get("VALUORA_PRICE_MATRIX")
+    if not root:
+        return None
+    try:
+        mtime = os.stat(os.path.join(root, META_FILE)).st_mtime_ns
+    except OSError:
+        return None
+    opened = _OPENED.get(root)
+    if opened is None or opened[0] != mtime:
+        opened = _OPENED[root] = (mtime, PriceMatrix(root))
+    matrix = opened[1]
+    if not matrix.rows or (pd.Timestamp.today().normalize() - matrix.last_date).days > max_age_days:
+        return None
+    return matrix
+
+
+# --- Building from the data fetchers ---
+def update_matrix(root, tickers=None, progress=None):
+    """
+    Fetches closes into the matrix: full history for tickers it doesn't have yet, and
+    only the missing tail (since the last stored date) for the rest.
+    """
+    from valuora.data import fetch_history, period_for_gap
+
+    matrix = PriceMatrix.create(root)
+    tickers = list(tickers or matrix.tickers)
+    today = pd.Timestamp.today().normalize()
+    gap = (today - matrix.last_date).days if matrix.rows else None
+
+    frames = {}
+    for i, ticker in enumerate(tickers):
+        period = period_for_gap(gap) if ticker in matrix and gap is not None else "max"
+        try:
+            hist = fetch_history(ticker, period=period)
+            if not hist.empty:
+                frames[ticker] = hist["Close"].set_axis(from_day_numbers(to_day_numbers(hist.index)))
+        except Exception as e:
+            print(f"[matrix] {ticker}: {type(e).__name__}: {e}", file=sys.stderr)
+        if progress:
+            progress(i + 1, len(tickers))
+
+    if frames:
+        matrix.append(pd.DataFrame(frames))
+    return matrix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build/update the memory-mapped close-price matrix")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("build", "update"):
+        p = sub.add_parser(name)
+        p.add_argument("tickers", nargs="*")
+        p.add_argument("--universe", help="CSV/text file of tickers (same format as valuora.batch)")
+        p.add_argument("--root", default=os.environ.get("VALUORA_PRICE_MATRIX", "data/prices"))
+    args = parser.parse_args(argv)
+
+    tickers = [t.strip().upper() for t in args.tickers]
+    if args.universe:
+        from valuora.batch import read_universe
+        tickers += read_universe(args.universe)
+    if args.command == "build" and not tickers:
+        parser.error("build needs tickers or --universe")
+
+    matrix = update_matrix(args.root, tickers or None)
+    print(f"{args.root}: {matrix.shape[0]} dates x {matrix.shape[1]} tickers (last {matrix.last_date})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+"""
+Process-level metrics in the Prometheus text exposition format.
+
+    valuora_upstream_request_seconds{provider}      histogram of upstream call latency
+    valuora_upstream_errors_total{provider,kind}    kind = error | throttle
+    valuora_fetch_failures_total{function}          failures swallowed by a fetcher's fallback
+    valuora_cache_{hits,shared_hits,misses,evictions}_total{cache}, valuora_cache_entries{cache}
+    valuora_active_sessions                         Streamlit sessions seen in the last 5 minutes
+
+Upstream latency comes from the fetch spans in valuora.timing (label = provider), so every
+call site that is already timed is exported without extra code. Cache numbers are read
+from valuora.cache at scrape time.
+
+Exporting (see start_from_env):
+    VALUORA_METRICS_PORT=9464     serve GET /metrics from a background thread
+    VALUORA_METRICS_FILE=path     rewrite a node_exporter textfile every 15s
+The API server (python -m valuora.api) also serves /metrics.
+"""
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from valuora import timing
+from valuora.cache import cache_stats
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# A session counts as active if it reran within this many seconds
+SESSION_IDLE_S = 300
+
+TEXTFILE_INTERVAL_S = 15
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=()):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in list(zip(names, values)) + list(extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(labels.get(n, "") for n in self.labelnames), 0)
+
+    def collect(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_labels(self.labelnames, key)} {_number(v)}" for key, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._series = {} # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def collect(self):
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, [('le', _number(bound))])} {count}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+UPSTREAM_LATENCY = Histogram("valuora_upstream_request_seconds", "Upstream request latency by provider.", ["provider"])
+UPSTREAM_ERRORS = Counter("valuora_upstream_errors_total", "Failed upstream requests (kind: error or throttle).", ["provider", "kind"])
+FETCH_FAILURES = Counter("valuora_fetch_failures_total", "Fetcher failures that fell back to an empty/partial result.", ["function"])
+
+_SESSIONS = {} # session id -> last seen (time.time())
+_SESSIONS_LOCK = threading.Lock()
+
+
+def classify_error(error):
+    """'throttle' for HTTP 429 / rate-limit errors (yfinance, Alpha Vantage notes), else 'error'."""
+    response = getattr(error, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return "throttle"
+    text = f"{type(error).__name__} {error}".lower()
+    if "ratelimit" in text or "rate limit" in text or "too many requests" in text:
+        return "throttle"
+    return "error"
+
+
+def _on_span(stage, label, seconds, error):
+    if stage != "fetch" or not label:
+        return
+    UPSTREAM_LATENCY.observe(seconds, provider=label)
+    if error is not None:
+        UPSTREAM_ERRORS.inc(provider=label, kind=classify_error(error))
+
+
+timing.add_listener(_on_span)
+
+
+def record_fetch_failure(function):
+    FETCH_FAILURES.inc(function=function)
+
+
+def touch_session(session_id):
+    """Marks a Streamlit session as active (call once per rerun)."""
+    now = time.time()
+    with _SESSIONS_LOCK:
+        _SESSIONS[session_id] = now
+        for sid, seen in list(_SESSIONS.items()):
+            if now - seen > SESSION_IDLE_S:
+                del _SESSIONS[sid]
+
+
+def active_sessions():
+    cutoff = time.time() - SESSION_IDLE_S
+    with _SESSIONS_LOCK:
+        return sum(1 for seen in _SESSIONS.values() if seen >= cutoff)
+
+
+def _cache_lines():
+    stats = cache_stats()
+    lines = []
+    for field, kind in (("hits", "counter"), ("shared_hits", "counter"), ("misses", "counter"), ("evictions", "counter"), ("size", "gauge")):
+        name = "valuora_cache_entries" if field == "size" else f"valuora_cache_{field}_total"
+        lines += [f"# HELP {name} ttl_cache {field} per cached function.", f"# TYPE {name} {kind}"]
+        lines += [f"{name}{_labels(['cache'], [cache])} {s[field]}" for cache, s in sorted(stats.items())]
+    return lines
+
+
+def render():
+    """All metrics as Prometheus exposition text."""
+    lines = []
+    for metric in (UPSTREAM_LATENCY, UPSTREAM_ERRORS, FETCH_FAILURES):
+        lines += metric.collect()
+    lines += _cache_lines()
+    lines += ["# HELP valuora_active_sessions Streamlit sessions active in the last 5 minutes.",
+              "# TYPE valuora_active_sessions gauge",
+              f"valuora_active_sessions {active_sessions()}"]
+    return "\n".join(lines) + "\n"
+
+
+def write_textfile(path):
+    """Atomically writes render() to `path` (node_exporter textfile collector format)."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render())
+    os.replace(tmp, path)
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        payload = render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_http_server(port, host="127.0.0.1"):
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="valuora-metrics", daemon=True).start()
+    return server
+
+
+def start_textfile_writer(path, interval=TEXTFILE_INTERVAL_S):
+    def loop():
+        while True:
+            try:
+                write_textfile(path)
+            except OSError:
+                pass
+            time.sleep(interval)
+    thread = threading.Thread(target=loop, name="valuora-metrics-textfile", daemon=True)
+    thread.start()
+    return thread
+
+
+_STARTED = []
+_START_LOCK = threading.Lock()
+
+
+def start_from_env():
+    """
+    Starts the exporters configured by VALUORA_METRICS_PORT / VALUORA_METRICS_FILE.
+    Safe to call on every Streamlit rerun: only the first call starts anything.
+    """
+    with _START_LOCK:
+        if not _STARTED:
+            _STARTED.extend(_start_exporters() or ["none"])
+    return list(_STARTED)
+
+
+def _start_exporters():
+    started = []
+    port = os.environ.get("VALUORA_METRICS_PORT")
+    if port:
+        start_http_server(int(port), os.environ.get("VALUORA_METRICS_HOST", "127.0.0.1"))
+        started.append(f"http:{port}")
+    path = os.environ.get("VALUORA_METRICS_FILE")
+    if path:
+        start_textfile_writer(path)
+        started.append(f"file:{path}")
+    return started
@@ -0,0 +1,455 @@
+"""
+Peer discovery: a nearest-neighbour index over a ticker universe, built from sector,
+industry, market cap, valuation multiples and daily-return correlation.
+
+    python -m valuora.peers build --universe universe.csv --out data/peers.npz
+    python -m valuora.peers build --universe tickers.txt --fetch --prices data/prices
+    python -m valuora.peers query AAPL -k 5
+
+    index = get_peer_index()            # VALUORA_PEER_INDEX, reopened when rebuilt
+    index.peers("AAPL", k=5)            # [("MSFT", 0.61), ("GOOGL", 0.55), ...]  (ticker, relevance)
+    index.peers("XYZ", info=info)       # not in the universe: matched on its info instead
+
+The distance between two tickers is the sum of
+    a feature distance   RMS difference of robust z-scores (log market cap, log multiples)
+                         over the features both have, market cap weighted up
+    a sector penalty     SECTOR_PENALTY unless both have the same known sector, and the
+                         same for industry
+    a correlation term   CORR_WEIGHT * (1 - correlation of daily returns over the last
+                         CORR_DAYS), the universe's mean correlation where either side
+                         has no prices
+and relevance is 1 / (1 + distance), so a ticker's relevance to itself is 1.
+
+The build computes every pair in blocks of rows (a few matrix products per block) and
+keeps each ticker's K nearest, so a lookup for a ticker in the universe is a dict hit
+and a slice. Tickers outside it, and relevance for pairs outside a top-K list, are
+computed on the spot against the stored features and standardized returns, a handful
+of vector ops over the universe.
+
+A universe CSV needs a 'ticker' column; sector, industry and the feature columns are
+read when present, under their yfinance info names (marketCap, trailingPE, ...) or the
+short names in FEATURES. --fetch fills in the rest from the data provider.
+"""
+import argparse
+import os
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Short name -> yfinance info key
+FEATURES = {
+    "market_cap": "marketCap",
+    "pe": "trailingPE",
+    "ps": "priceToSalesTrailing12Months",
+    "pb": "priceToBook",
+    "ev_ebitda": "enterpriseToEbitda",
+}
+# Squared-difference weight of each feature (size is the strongest peer signal)
+FEATURE_WEIGHTS = {"market_cap": 2.0, "pe": 1.0, "ps": 1.0, "pb": 1.0, "ev_ebitda": 1.0}
+# Feature distance of two tickers without a feature in common (that of two random z-scores)
+FEATURE_MISSING = np.sqrt(2.0)
+Z_CLIP = 4.0
+
+SECTOR_PENALTY = 1.5
+INDUSTRY_PENALTY = 1.0
+CORR_WEIGHT = 1.0
+CORR_DAYS = 252
+# Fewer overlapping return days than this and a pair's correlation counts as unknown
+MIN_OVERLAP = 60
+
+DEFAULT_K = 20
+# Rows of the pairwise distance matrix computed at a time during a build
+BLOCK_ROWS = 512
+
+
+def _transform(raw):
+    """log of the positive values (multiples and caps are scale-like), NaN elsewhere."""
+    raw = np.asarray(raw, dtype=float)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(raw > 0, np.log(np.where(raw > 0, raw, 1.0)), np.nan)
+
+
+def _robust_scale(values):
+    """(center, scale) per column: median and IQR / 1.349, ignoring NaN."""
+    center = np.full(values.shape[1], 0.0)
+    scale = np.full(values.shape[1], 1.0)
+    for j in range(values.shape[1]):
+        column = values[:, j][~np.isnan(values[:, j])]
+        if len(column):
+            q1, center[j], q3 = np.percentile(column, [25, 50, 75])
+            if q3 > q1:
+                scale[j] = (q3 - q1) / 1.349
+    return center, scale
+
+
+def _standardize_returns(closes):
+    """
+    (T, N) z-scored daily returns with missing days as 0, plus the (T, N) presence mask,
+    so that z_i . z_j / overlap approximates the pairwise correlation.
+    """
+    returns = closes.ffill().pct_change(fill_method=None).iloc[1:].to_numpy(dtype=float)
+    present = ~np.isnan(returns)
+    count = present.sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = np.nansum(returns, axis=0) / count
+        centered = np.where(present, returns - mean, 0.0)
+        std = np.sqrt((centered * centered).sum(axis=0) / count)
+        z = np.where(present & (std > 0), centered / std, 0.0)
+    present &= (std > 0)
+    return z.astype(np.float32), present
+
+
+class PeerIndex:
+    def __init__(self, tickers, sectors, industries, features, center, scale, returns, present,
+                 returns_column, neighbors, distances, mean_corr):
+        self.tickers = [str(t) for t in tickers]
+        self.row = {t: i for i, t in enumerate(self.tickers)}
+        self.sectors = np.asarray(sectors, dtype=str)
+        self.industries = np.asarray(industries, dtype=str)
+        self.features = np.asarray(features, dtype=np.float32) # weighted z-scores, NaN where missing
+        self.center = np.asarray(center, dtype=float)
+        self.scale = np.asarray(scale, dtype=float)
+        self.returns = np.asarray(returns, dtype=np.float32) # (T, M) z-scored returns
+        self.present = np.asarray(present, dtype=bool)
+        self.returns_column = np.asarray(returns_column, dtype=np.int64) # row -> column of returns, -1 if none
+        self.neighbors = np.asarray(neighbors, dtype=np.int32)
+        self.distances = np.asarray(distances, dtype=np.float32)
+        self.mean_corr = float(mean_corr)
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __contains__(self, ticker):
+        return ticker in self.row
+
+    @property
+    def k(self):
+        return self.neighbors.shape[1]
+
+    # --- Building ---
+    @classmethod
+    def build(cls, universe, closes=None, k=DEFAULT_K, block_rows=BLOCK_ROWS):
+        """
+        Index over a universe DataFrame (ticker, sector, industry and FEATURES columns, see
+        read_peer_universe) and an optional date x ticker closes frame for correlations.
+        """
+        universe = universe.drop_duplicates("ticker").reset_index(drop=True)
+        tickers = universe["ticker"].tolist()
+        n = len(tickers)
+        sectors = universe.get("sector", pd.Series([""] * n)).fillna("").astype(str).to_numpy()
+        industries = universe.get("industry", pd.Series([""] * n)).fillna("").astype(str).to_numpy()
+
+        raw = np.column_stack([
+            _transform(pd.to_numeric(universe[name], errors="coerce")) if name in universe else np.full(n, np.nan)
+            for name in FEATURES
+        ]) if n else np.empty((0, len(FEATURES)))
+        center, scale = _robust_scale(raw)
+
+        if closes is not None:
+            columns = [t for t in tickers if t in closes.columns]
+            returns, present = _standardize_returns(closes[columns].iloc[-(CORR_DAYS + 1):])
+            position = {t: i for i, t in enumerate(columns)}
+            returns_column = np.array([position.get(t, -1) for t in tickers], dtype=np.int64)
+        else:
+            returns, present = np.zeros((0, 0), dtype=np.float32), np.zeros((0, 0), dtype=bool)
+            returns_column = np.full(n, -1, dtype=np.int64)
+
+        index = cls(tickers, sectors, industries, _weighted_z(raw, center, scale), center, scale,
+                    returns, present, returns_column, np.empty((n, 0)), np.empty((n, 0)), 0.0)
+        index.mean_corr = index._mean_corr()
+
+        k = min(k, max(n - 1, 0))
+        neighbors = np.empty((n, k), dtype=np.int32)
+        distances = np.empty((n, k), dtype=np.float32)
+        everyone = np.arange(n)
+        for lo in range(0, n, block_rows):
+            rows = everyone[lo:lo + block_rows]
+            block = index._distances(rows, everyone)
+            block[np.arange(len(rows)), rows] = np.inf # not its own peer
+            nearest = np.argpartition(block, k - 1, axis=1)[:, :k] if k else np.empty((len(rows), 0), dtype=np.intp)
+            nearest_d = np.take_along_axis(block, nearest, axis=1)
+            order = np.argsort(nearest_d, axis=1, kind="stable")
+            neighbors[rows] = np.take_along_axis(nearest, order, axis=1)
+            distances[rows] = np.take_along_axis(nearest_d, order, axis=1)
+        index.neighbors, index.distances = neighbors, distances
+        return index
+
+    def _mean_corr(self, sample=2000):
+        """Mean pairwise return correlation, from a fixed sample of the tickers with prices."""
+        columns = np.flatnonzero(self.returns_column >= 0)[:sample]
+        if len(columns) < 2:
+            return 0.0
+        corr = self._corr(columns, columns)
+        off_diagonal = corr[~np.eye(len(columns), dtype=bool)]
+        off_diagonal = off_diagonal[~np.isnan(off_diagonal)]
+        return float(off_diagonal.mean()) if len(off_diagonal) else 0.0
+
+    # --- Distances ---
+    def _corr(self, rows, targets):
+        """(len(rows), len(targets)) return correlations, NaN where either side lacks MIN_OVERLAP days."""
+        out = np.full((len(rows), len(targets)), np.nan)
+        a, b = self.returns_column[rows], self.returns_column[targets]
+        has_a, has_b = np.flatnonzero(a >= 0), np.flatnonzero(b >= 0)
+        if not len(has_a) or not len(has_b):
+            return out
+        za, zb = self.returns[:, a[has_a]], self.returns[:, b[has_b]]
+        pa, pb = self.present[:, a[has_a]].astype(np.float32), self.present[:, b[has_b]].astype(np.float32)
+        overlap = pa.T @ pb
+        with np.errstate(invalid="ignore", divide="ignore"):
+            corr = np.where(overlap >= MIN_OVERLAP, (za.T @ zb) / overlap, np.nan)
+        out[np.ix_(has_a, has_b)] = np.clip(corr, -1.0, 1.0)
+        return out
+
+    def _distances(self, rows, targets):
+        """(len(rows), len(targets)) distances between tickers of the index."""
+        distance = _feature_distance(self.features[rows], self.features[targets])
+        distance += _label_penalty(self.sectors[rows], self.sectors[targets], SECTOR_PENALTY)
+        distance += _label_penalty(self.industries[rows], self.industries[targets], INDUSTRY_PENALTY)
+        corr = self._corr(rows, targets)
+        distance += CORR_WEIGHT * (1.0 - np.where(np.isnan(corr), self.mean_corr, corr))
+        return distance
+
+    def _query_distances(self, info, targets):
+        """Distances from a ticker described by its info dict (no prices) to index rows."""
+        raw = _transform([[info.get(key) if isinstance(info.get(key), (int, float)) else np.nan for key in FEATURES.values()]])
+        features = _weighted_z(raw, self.center, self.scale)
+        distance = _feature_distance(features, self.features[targets])
+        distance += _label_penalty(np.array([info.get("sector") or ""]), self.sectors[targets], SECTOR_PENALTY)
+        distance += _label_penalty(np.array([info.get("industry") or ""]), self.industries[targets], INDUSTRY_PENALTY)
+        distance += CORR_WEIGHT * (1.0 - self.mean_corr)
+        return distance[0]
+
+    # --- Lookups ---
+    def peers(self, ticker, k=5, info=None):
+        """
+        [(peer, relevance)] for the k nearest tickers, nearest first. A ticker outside the
+        universe is matched on `info` (sector, industry, marketCap, multiples); [] without it.
+        """
+        row = self.row.get(ticker)
+        if row is not None and k <= self.k:
+            neighbors, distances = self.neighbors[row, :k], self.distances[row, :k]
+        elif row is not None or info:
+            others = np.arange(len(self))
+            distances = self._distances([row], others)[0] if row is not None else self._query_distances(info, others)
+            if row is not None:
+                distances[row] = np.inf
+            k = min(k, len(self) - (row is not None))
+            neighbors = np.argpartition(distances, k - 1)[:k] if k > 0 else np.empty(0, dtype=np.intp)
+            neighbors = neighbors[np.argsort(distances[neighbors], kind="stable")]
+            distances = distances[neighbors]
+        else:
+            return []
+        return [(self.tickers[i], float(1.0 / (1.0 + d))) for i, d in zip(neighbors.tolist(), distances.tolist())]
+
+    def relevance(self, ticker, others, info=None):
+        """Relevance of each of `others` to `ticker` (1.0 for itself), NaN for tickers outside the index."""
+        targets = [self.row.get(t, -1) for t in others]
+        known = np.flatnonzero(np.asarray(targets) >= 0)
+        out = np.full(len(others), np.nan)
+        row = self.row.get(ticker)
+        if len(known) and (row is not None or info):
+            rows = np.asarray(targets)[known]
+            distances = self._distances([row], rows)[0] if row is not None else self._query_distances(info, rows)
+            out[known] = 1.0 / (1.0 + distances)
+        out[[i for i, t in enumerate(others) if t == ticker]] = 1.0
+        return out
+
+    # --- Storage ---
+    def save(self, path):
+        """Writes the index as one .npz, atomically (readers never see a partial file)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = f"{path}.tmp-{os.getpid()}.npz"
+        np.savez(
+            tmp,
+            tickers=np.asarray(self.tickers, dtype=str), sectors=self.sectors, industries=self.industries,
+            features=self.features, center=self.center, scale=self.scale,
+            returns=self.returns, present=self.present, returns_column=self.returns_column,
+            neighbors=self.neighbors, distances=self.distances, mean_corr=np.float64(self.mean_corr),
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(**{name: data[name] for name in data.files})
+
+
+def _weighted_z(raw, center, scale):
+    z = np.clip((raw - center) / scale, -Z_CLIP, Z_CLIP)
+    return (z * np.sqrt([FEATURE_WEIGHTS[name] for name in FEATURES])).astype(np.float32)
+
+
+def _feature_distance(a, b):
+    """
+    RMS weighted z-score difference over the features both sides have, for every (a, b)
+    row pair, via matrix products: sum (x - y)^2 = x^2.m_y + m_x.y^2 - 2 x.y over shared
+    features. Weights are folded into the z-scores, so the mean divides by the shared weight.
+    """
+    a, b = np.asarray(a, dtype=np.float64), np.asarray(b, dtype=np.float64)
+    weights = np.array([FEATURE_WEIGHTS[name] for name in FEATURES])
+    ma, mb = ~np.isnan(a), ~np.isnan(b)
+    a0, b0 = np.where(ma, a, 0.0), np.where(mb, b, 0.0)
+    sumsq = (a0 * a0) @ mb.T + ma @ (b0 * b0).T - 2.0 * (a0 @ b0.T)
+    shared = (ma * weights) @ mb.T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        distance = np.sqrt(np.maximum(sumsq, 0.0) / shared)
+    return np.where(shared > 0, distance, FEATURE_MISSING)
+
+
+def _label_penalty(a, b, penalty):
+    """penalty for every (a, b) pair unless both have the same non-empty label."""
+    same = (a[:, None] == b[None, :]) & (a[:, None] != "")
+    return np.where(same, 0.0, penalty)
+
+
+def read_peer_universe(path):
+    """
+    DataFrame of ticker, sector, industry and the FEATURES columns (NaN / '' where the
+    file doesn't have them) from a universe CSV, or from a one-ticker-per-line text file.
+    """
+    from valuora.batch import read_universe
+
+    with open(path, newline="") as f:
+        is_csv = "," in f.readline()
+    if not is_csv:
+        frame = pd.DataFrame({"ticker": read_universe(path)})
+    else:
+        frame = pd.read_csv(path)
+        lower = {c.strip().lower(): c for c in frame.columns}
+        renames = {}
+        for name, info_key in {"ticker": "symbol", "sector": "sector", "industry": "industry", **FEATURES}.items():
+            column = lower.get(name) or lower.get(info_key.lower())
+            if column is not None:
+                renames[column] = name
+        frame = frame.rename(columns=renames)
+        if "ticker" not in frame:
+            raise ValueError(f"{path}: CSV universe needs a 'ticker' column")
+        frame["ticker"] = frame["ticker"].astype(str).str.strip().str.upper()
+    for name in ("sector", "industry"):
+        if name not in frame:
+            frame[name] = ""
+    for name in FEATURES:
+        if name not in frame:
+            frame[name] = np.nan
+    return frame[["ticker", "sector", "industry", *FEATURES]]
+
+
+def fill_from_provider(universe, progress=None):
+    """Fills missing sector / industry / features from each ticker's provider info."""
+    from valuora.providers import get_provider
+
+    provider = get_provider()
+    universe = universe.copy()
+    columns = ["sector", "industry", *FEATURES]
+    info_keys = {"sector": "sector", "industry": "industry", **FEATURES}
+    missing = universe["sector"].fillna("").eq("") | universe[list(FEATURES)].isna().any(axis=1)
+    todo = universe.index[missing]
+    for i, idx in enumerate(todo):
+        ticker = universe.at[idx, "ticker"]
+        try:
+            info = provider.ticker(ticker).info
+        except Exception as e:
+            print(f"[peers] {ticker}: {type(e).__name__}: {e}", file=sys.stderr)
+            info = {}
+        for name in columns:
+            current = universe.at[idx, name]
+            if (current == "" or pd.isna(current)) and info.get(info_keys[name]) is not None:
+                universe.at[idx, name] = info[info_keys[name]]
+        if progress:
+            progress(i + 1, len(todo))
+    return universe
+
+
+_OPENED = {} # path -> (mtime, PeerIndex)
+_OPENED_LOCK = threading.Lock()
+
+
+def get_peer_index(path=None):
+    """The index at `path` (default: VALUORA_PEER_INDEX), reloaded when rebuilt. None if absent."""
+    path = path or os.environ.get("VALUORA_PEER_INDEX")
+    if not path:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _OPENED_LOCK:
+        opened = _OPENED.get(path)
+        if opened is None or opened[0] != mtime:
+            opened = _OPENED[path] = (mtime, PeerIndex.load(path))
+        return opened[1]
+
+
+def peer_relevance(ticker, tickers, info=None):
+    """Relevance of each of `tickers` to `ticker` from the peer index: all 1.0 without one."""
+    index = get_peer_index()
+    if index is None:
+        return np.ones(len(tickers))
+    relevance = index.relevance(ticker, tickers, info)
+    # Tickers outside the index weigh in like an average peer
+    known = relevance[~np.isnan(relevance)]
+    return np.where(np.isnan(relevance), known.mean() if len(known) else 1.0, relevance)
+
+
+def peer_averages(table, exclude=None, weight="Relevance"):
+    """
+    Relevance-weighted mean of every numeric column of a comparison table, skipping NaN.
+    The `exclude` ticker's row (the one being compared) gets no weight.
+    """
+    numeric = table.drop(columns=[weight], errors="ignore").select_dtypes("number")
+    weights = table[weight].to_numpy(dtype=float) if weight in table else np.ones(len(table))
+    if exclude is not None and "Ticker" in table:
+        weights = np.where(table["Ticker"].to_numpy() == exclude, 0.0, weights)
+    values = numeric.to_numpy(dtype=float)
+    present = ~np.isnan(values)
+    total = (present * weights[:, None]).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(present, values, 0.0).T @ weights / total
+    return pd.Series(np.where(total > 0, means, np.nan), index=numeric.columns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build / query the peer discovery index")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("--universe", required=True, help="CSV with ticker, sector, industry, marketCap, multiples (or a ticker list with --fetch)")
+    build.add_argument("--out", default=os.environ.get("VALUORA_PEER_INDEX", "data/peers.npz"))
+    build.add_argument("--prices", default=os.environ.get("VALUORA_PRICE_MATRIX"), help="valuora.matrix root for return correlations")
+    build.add_argument("--fetch", action="store_true", help="fill missing columns from the data provider")
+    build.add_argument("-k", type=int, default=DEFAULT_K, help="neighbours stored per ticker")
+    query = sub.add_parser("query")
+    query.add_argument("ticker")
+    query.add_argument("-k", type=int, default=5)
+    query.add_argument("--index", default=os.environ.get("VALUORA_PEER_INDEX", "data/peers.npz"))
+    args = parser.parse_args(argv)
+
+    if args.command == "query":
+        index = get_peer_index(args.index)
+        if index is None:
+            parser.error(f"no peer index at {args.index}")
+        for ticker, relevance in index.peers(args.ticker.upper(), k=args.k):
+            print(f"{ticker:<8} {relevance:.3f}")
+        return 0
+
+    universe = read_peer_universe(args.universe)
+    if args.fetch:
+        universe = fill_from_provider(universe)
+    closes = None
+    if args.prices:
+        from valuora.matrix import PriceMatrix
+
+        matrix = PriceMatrix(args.prices)
+        in_matrix = [t for t in universe["ticker"] if t in matrix]
+        if in_matrix and matrix.rows:
+            closes = matrix.frame(in_matrix, start=matrix.last_date - pd.DateOffset(days=int(CORR_DAYS * 1.5)))
+    index = PeerIndex.build(universe, closes, k=args.k)
+    index.save(args.out)
+    priced = int((index.returns_column >= 0).sum())
+    print(f"{args.out}: {len(index)} tickers, {index.k} neighbours each, {priced} with prices (mean corr {index.mean_corr:.2f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,207 @@
+"""
+Opt-in profiling of whole Streamlit reruns.
+
+Enabled per process with VALUORA_PROFILE, or per request with ?profile=... in the URL
+when VALUORA_PROFILE_ALLOW=1 (otherwise any visitor could turn it on):
+
+    cprofile   deterministic cProfile -> <page>/<timestamp>.pstats  (python -m pstats, snakeviz)
+    sample     stack sampler (1ms)     -> <page>/<timestamp>.speedscope.json  (speedscope.app)
+
+("1" / "true" mean cprofile.) Every profiled run also writes <timestamp>.json with the
+wall/CPU time and a tracemalloc summary (peak traced memory and the top allocation
+sites still held at the end of the run). Artifacts go under VALUORA_PROFILE_DIR
+(default: profiles/).
+
+    with profile_run("Valuation Analysis", "cprofile"):
+        main_dashboard()
+"""
+import cProfile
+import json
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+MODES = ("cprofile", "sample")
+DEFAULT_PROFILE_DIR = "profiles"
+
+SAMPLE_INTERVAL_S = 0.001
+TOP_N = 25
+
+_TRACEMALLOC_USERS = [0]
+_TRACEMALLOC_LOCK = threading.Lock()
+
+
+def requested_mode(query_value=None):
+    """
+    Profiling mode from ?profile=... (wins, when VALUORA_PROFILE_ALLOW is set) or
+    VALUORA_PROFILE; None when profiling is off.
+    """
+    if os.environ.get("VALUORA_PROFILE_ALLOW") not in ("1", "true", "yes"):
+        query_value = None
+    value = (query_value or os.environ.get("VALUORA_PROFILE") or "").strip().lower()
+    if value in ("1", "true", "yes"):
+        return "cprofile"
+    return value if value in MODES else None
+
+
+def _slug(text):
+    return re.sub(r"[^a-z0-9]+", "-", str(text).lower()).strip("-") or "run"
+
+
+class StackSampler:
+    """Samples one thread's Python stack on a background thread (speedscope 'sampled' profile)."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL_S):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.frames = [] # speedscope shared frame table
+        self._frame_index = {}
+        self.samples = []
+        self.weights = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="valuora-sampler", daemon=True)
+
+    def _frame_id(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        idx = self._frame_index.get(key)
+        if idx is None:
+            idx = self._frame_index[key] = len(self.frames)
+            self.frames.append({"name": code.co_name, "file": code.co_filename, "line": code.co_firstlineno})
+        return idx
+
+    def _run(self):
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            now = time.perf_counter()
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_id(frame.f_code))
+                frame = frame.f_back
+            self.samples.append(stack[::-1])
+            self.weights.append(now - last)
+            last = now
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def to_speedscope(self, name):
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "shared": {"frames": self.frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "seconds",
+                "startValue": 0,
+                "endValue": sum(self.weights),
+                "samples": self.samples,
+                "weights": self.weights,
+            }],
+            "name": name,
+            "exporter": "valuora.profiling",
+        }
+
+
+def _start_tracemalloc():
+    with _TRACEMALLOC_LOCK:
+        if _TRACEMALLOC_USERS[0] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _TRACEMALLOC_USERS[0] += 1
+        tracemalloc.reset_peak()
+
+
+def _stop_tracemalloc():
+    """Takes the allocation summary, then stops tracing if this was the last profiled run."""
+    with _TRACEMALLOC_LOCK:
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot().filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ])
+        _TRACEMALLOC_USERS[0] -= 1
+        if _TRACEMALLOC_USERS[0] == 0:
+            tracemalloc.stop()
+    top = [{"site": str(stat.traceback[0]), "size_kb": stat.size / 1024, "count": stat.count}
+           for stat in snapshot.statistics("lineno")[:TOP_N]]
+    return {"current_kb": current / 1024, "peak_kb": peak / 1024, "top_allocations": top}
+
+
+def _top_functions(stats):
+    rows = []
+    for (filename, line, func), (cc, nc, tt, ct, callers) in stats.stats.items():
+        rows.append({"function": f"{func} ({os.path.basename(filename)}:{line})", "calls": nc,
+                     "tottime_s": tt, "cumtime_s": ct})
+    rows.sort(key=lambda r: r["cumtime_s"], reverse=True)
+    return rows[:TOP_N]
+
+
+@contextmanager
+def profile_run(page, mode, out_dir=None, trace_memory=True):
+    """
+    Profiles the enclosed block when `mode` is 'cprofile' or 'sample'; a no-op when None.
+    Artifacts are written even if the block raises (st.stop() included).
+    """
+    if mode is None:
+        yield None
+        return
+
+    out_dir = os.path.join(out_dir or os.environ.get("VALUORA_PROFILE_DIR", DEFAULT_PROFILE_DIR), _slug(page))
+    os.makedirs(out_dir, exist_ok=True)
+    base = os.path.join(out_dir, datetime.now().strftime("%Y%m%d-%H%M%S-%f"))
+    result = {"page": page, "mode": mode, "summary": f"{base}.json"}
+
+    if trace_memory:
+        _start_tracemalloc()
+    profiler = sampler = None
+    if mode == "cprofile":
+        profiler = cProfile.Profile()
+    else:
+        sampler = StackSampler(threading.get_ident())
+        sampler.start()
+
+    wall0, cpu0 = time.perf_counter(), time.thread_time()
+    try:
+        if profiler:
+            profiler.enable()
+        yield result
+    finally:
+        if profiler:
+            profiler.disable()
+        if sampler:
+            sampler.stop()
+        summary = {
+            "page": page,
+            "mode": mode,
+            "timestamp": time.time(),
+            "wall_s": time.perf_counter() - wall0,
+            "cpu_s": time.thread_time() - cpu0,
+        }
+        if trace_memory:
+            summary["memory"] = _stop_tracemalloc()
+
+        if profiler:
+            result["artifact"] = f"{base}.pstats"
+            profiler.dump_stats(result["artifact"])
+            summary["top_functions"] = _top_functions(pstats.Stats(profiler))
+        else:
+            result["artifact"] = f"{base}.speedscope.json"
+            with open(result["artifact"], "w") as f:
+                json.dump(sampler.to_speedscope(page), f)
+            summary["samples"] = len(sampler.samples)
+
+        summary["artifact"] = result["artifact"]
+        with open(result["summary"], "w") as f:
+            json.dump(summary, f, indent=1)
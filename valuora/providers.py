@@ -0,0 +1,403 @@
+"""
+Data providers: every network call in valuora goes through one of these.
+
+    live    - yfinance / yahooquery / requests (default)
+    record  - live, but every response is also written to a fixture directory
+    replay  - serves responses from the fixture directory only (no network), with
+              optional injected latency so benchmarks see realistic timings
+
+Pick one with environment variables (read on first use):
+
+    VALUORA_PROVIDER=replay
+    VALUORA_FIXTURES=fixtures/            # default
+    VALUORA_REPLAY_LATENCY_MS=80          # per call, optional
+    VALUORA_REPLAY_JITTER_MS=20           # +/- uniform jitter, optional (seeded, deterministic)
+
+or in code with set_provider(ReplayProvider("fixtures/")).
+
+Record fixtures for a set of tickers (everything the app pages touch):
+    python -m valuora.providers record AAPL MSFT --with-peers --fixtures fixtures/
+
+Fixture layout:
+    tickers/<SYMBOL>/info.json, news.json, all_modules.json
+    tickers/<SYMBOL>/history-period=5y.pkl, income_stmt.pkl, cashflow.pkl, balance_sheet.pkl
+    download/<hash>.pkl        yf.download() results
+    http/<hash>.bin            raw HTTP bodies (RSS, Alpha Vantage)
+    http/index.json            hash -> URL, for humans (API keys are stripped)
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import pandas as pd
+import requests
+
+DEFAULT_FIXTURES_DIR = "fixtures"
+
+# yf.Ticker attributes that are recorded as DataFrames / JSON
+FRAME_ATTRS = ("income_stmt", "cashflow", "balance_sheet")
+JSON_ATTRS = ("info", "news")
+
+# Query parameters that never go into fixture keys or files
+SECRET_PARAMS = {"apikey", "api_key", "token"}
+
+
+class FixtureMissing(KeyError):
+    """Replay was asked for something that was never recorded."""
+
+
+def _hash(text):
+    return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+
+def _slug(kwargs):
+    return "-".join(f"{k}={re.sub(r'[^A-Za-z0-9._]', '_', str(v))}" for k, v in sorted(kwargs.items())) or "default"
+
+
+def strip_secrets(url):
+    """Drops API keys from a URL so fixtures are safe to commit and keys don't change lookups."""
+    parts = urlparse(url)
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k.lower() not in SECRET_PARAMS]
+    return urlunparse(parts._replace(query=urlencode(query)))
+
+
+# --- LIVE ---
+class LiveProvider:
+    name = "live"
+
+    def ticker(self, symbol):
+        import yfinance as yf
+        return yf.Ticker(symbol)
+
+    def download(self, symbols, **kwargs):
+        import yfinance as yf
+        return yf.download(symbols, **kwargs)
+
+    def all_modules(self, symbol, session=None):
+        """yahooquery failover: the full quoteSummary dict for one symbol."""
+        from yahooquery import Ticker as YQTicker
+        return YQTicker(symbol, session=session).all_modules[symbol]
+
+    def http_get(self, url, timeout=None):
+        """GET returning the raw body. Raises for HTTP errors."""
+        response = requests.get(url, timeout=timeout)
+        response.raise_for_status()
+        return response.content
+
+
+# --- FIXTURE STORAGE ---
+class FixtureStore:
+    """Reads/writes fixture files under one directory."""
+
+    def __init__(self, root):
+        self.root = root
+        self._lock = threading.Lock()
+
+    def _path(self, *parts):
+        return os.path.join(self.root, *parts)
+
+    def _ticker_path(self, symbol, name):
+        return self._path("tickers", re.sub(r"[^A-Za-z0-9.^=_-]", "_", symbol.upper()), name)
+
+    def _write(self, path, writer):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        writer(tmp)
+        os.replace(tmp, path)
+
+    def _read(self, path, reader):
+        if not os.path.exists(path):
+            raise FixtureMissing(os.path.relpath(path, self.root))
+        return reader(path)
+
+    # Ticker attributes
+    def save_attr(self, symbol, name, value):
+        if name in JSON_ATTRS or name == "all_modules":
+            def write(p):
+                with open(p, "w") as f:
+                    json.dump(value, f, default=str)
+            self._write(self._ticker_path(symbol, f"{name}.json"), write)
+        else:
+            self._write(self._ticker_path(symbol, f"{name}.pkl"), lambda p: pd.to_pickle(value, p))
+
+    def load_attr(self, symbol, name):
+        if name in JSON_ATTRS or name == "all_modules":
+            def read(p):
+                with open(p) as f:
+                    return json.load(f)
+            return self._read(self._ticker_path(symbol, f"{name}.json"), read)
+        return self._read(self._ticker_path(symbol, f"{name}.pkl"), pd.read_pickle)
+
+    # yf.download
+    def _download_key(self, symbols, kwargs):
+        symbols = [symbols] if isinstance(symbols, str) else list(symbols)
+        return _hash(json.dumps([sorted(symbols), sorted(kwargs.items())], default=str))
+
+    def save_download(self, symbols, kwargs, frame):
+        self._write(self._path("download", f"{self._download_key(symbols, kwargs)}.pkl"), lambda p: pd.to_pickle(frame, p))
+
+    def load_download(self, symbols, kwargs):
+        return self._read(self._path("download", f"{self._download_key(symbols, kwargs)}.pkl"), pd.read_pickle)
+
+    # Raw HTTP
+    def save_http(self, url, body):
+        url = strip_secrets(url)
+        key = _hash(url)
+
+        def write(p):
+            with open(p, "wb") as f:
+                f.write(body)
+        self._write(self._path("http", f"{key}.bin"), write)
+
+        with self._lock:
+            index_path = self._path("http", "index.json")
+            index = {}
+            if os.path.exists(index_path):
+                with open(index_path) as f:
+                    index = json.load(f)
+            index[key] = url
+
+            def write_index(p):
+                with open(p, "w") as f:
+                    json.dump(index, f, indent=1, sort_keys=True)
+            self._write(index_path, write_index)
+
+    def load_http(self, url):
+        def read(p):
+            with open(p, "rb") as f:
+                return f.read()
+        return self._read(self._path("http", f"{_hash(strip_secrets(url))}.bin"), read)
+
+
+# --- RECORD ---
+class RecordingTicker:
+    """Proxies a yf.Ticker and writes every recorded attribute / history call to the store."""
+
+    def __init__(self, symbol, inner, store):
+        self._symbol = symbol
+        self._inner = inner
+        self._store = store
+
+    def history(self, period=None, **kwargs):
+        if period is not None:
+            kwargs["period"] = period
+        frame = self._inner.history(**kwargs)
+        self._store.save_attr(self._symbol, f"history-{_slug(kwargs)}", frame)
+        return frame
+
+    def __getattr__(self, name):
+        value = getattr(self._inner, name)
+        if name in FRAME_ATTRS or name in JSON_ATTRS:
+            self._store.save_attr(self._symbol, name, value)
+        return value
+
+
+class RecordingProvider:
+    name = "record"
+
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, inner=None):
+        self.store = FixtureStore(fixtures_dir)
+        self.inner = inner or LiveProvider()
+
+    def ticker(self, symbol):
+        return RecordingTicker(symbol, self.inner.ticker(symbol), self.store)
+
+    def download(self, symbols, **kwargs):
+        frame = self.inner.download(symbols, **kwargs)
+        self.store.save_download(symbols, kwargs, frame)
+        return frame
+
+    def all_modules(self, symbol, session=None):
+        value = self.inner.all_modules(symbol, session=session)
+        self.store.save_attr(symbol, "all_modules", value)
+        return value
+
+    def http_get(self, url, timeout=None):
+        body = self.inner.http_get(url, timeout=timeout)
+        self.store.save_http(url, body)
+        return body
+
+
+# --- REPLAY ---
+class ReplayTicker:
+    """Looks like a yf.Ticker, backed by fixture files."""
+
+    def __init__(self, symbol, provider):
+        self.ticker = symbol
+        self._provider = provider
+
+    def history(self, period=None, **kwargs):
+        if period is not None:
+            kwargs["period"] = period
+        return self._provider._load(lambda s: s.load_attr(self.ticker, f"history-{_slug(kwargs)}"))
+
+    def __getattr__(self, name):
+        if name in FRAME_ATTRS or name in JSON_ATTRS:
+            return self._provider._load(lambda s: s.load_attr(self.ticker, name))
+        raise AttributeError(name)
+
+
+class ReplayProvider:
+    name = "replay"
+
+    def __init__(self, fixtures_dir=DEFAULT_FIXTURES_DIR, latency_ms=0, jitter_ms=0, seed=0):
+        if not os.path.isdir(fixtures_dir):
+            raise FileNotFoundError(f"fixture directory not found: {fixtures_dir}")
+        self.store = FixtureStore(fixtures_dir)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+
+    def _sleep(self):
+        if not self.latency_ms and not self.jitter_ms:
+            return
+        with self._rng_lock:
+            jitter = self._rng.uniform(-self.jitter_ms, self.jitter_ms) if self.jitter_ms else 0
+        time.sleep(max(0.0, self.latency_ms + jitter) / 1000)
+
+    def _load(self, loader):
+        self._sleep()
+        return loader(self.store)
+
+    def ticker(self, symbol):
+        return ReplayTicker(symbol, self)
+
+    def download(self, symbols, **kwargs):
+        return self._load(lambda s: s.load_download(symbols, kwargs))
+
+    def all_modules(self, symbol, session=None):
+        return self._load(lambda s: s.load_attr(symbol, "all_modules"))
+
+    def http_get(self, url, timeout=None):
+        return self._load(lambda s: s.load_http(url))
+
+
+# --- PROVIDER SELECTION ---
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def provider_from_env(environ=None):
+    environ = os.environ if environ is None else environ
+    kind = environ.get("VALUORA_PROVIDER", "live").lower()
+    fixtures_dir = environ.get("VALUORA_FIXTURES", DEFAULT_FIXTURES_DIR)
+    if kind == "live":
+        return LiveProvider()
+    if kind == "record":
+        return RecordingProvider(fixtures_dir)
+    if kind == "replay":
+        return ReplayProvider(
+            fixtures_dir,
+            latency_ms=float(environ.get("VALUORA_REPLAY_LATENCY_MS", 0)),
+            jitter_ms=float(environ.get("VALUORA_REPLAY_JITTER_MS", 0)),
+        )
+    raise ValueError(f"unknown VALUORA_PROVIDER '{kind}' (expected live, record or replay)")
+
+
+def get_provider():
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = provider_from_env()
+    return _provider
+
+
+def set_provider(provider):
+    """Swaps the active provider (pass None to re-read the environment on next use)."""
+    global _provider
+    with _provider_lock:
+        _provider = provider
+
+
+# --- RECORDING CLI ---
+# Every history() period the app and valuora request
+RECORD_HISTORY_PERIODS = ["1d", "3mo", "5y", "max"]
+
+
+def record_fixtures(tickers, fixtures_dir=DEFAULT_FIXTURES_DIR, with_peers=False, with_macro=True, rss_queries=(), av_key=None):
+    """
+    Runs the same fetches the app pages make for each ticker through a RecordingProvider,
+    so a later replay can serve every page offline.
+    """
+    from valuora.data import fetch_google_news_rss, get_competitors
+    from valuora.data import GAP_PERIODS
+    from valuora.macro import CHOKEPOINTS, MACRO_TICKERS, fetch_wti_price
+
+    provider = RecordingProvider(fixtures_dir)
+    previous = _provider
+    set_provider(provider)
+    try:
+        todo = list(tickers)
+        done = set()
+        while todo:
+            symbol = todo.pop(0)
+            if symbol in done:
+                continue
+            done.add(symbol)
+            print(f"recording {symbol}", file=sys.stderr)
+
+            stock = provider.ticker(symbol)
+            for period in RECORD_HISTORY_PERIODS:
+                stock.history(period=period)
+            info = stock.info
+            for attr in FRAME_ATTRS + ("news",):
+                try:
+                    getattr(stock, attr)
+                except Exception as e:
+                    print(f"  {symbol}.{attr} failed: {e}", file=sys.stderr)
+            fetch_google_news_rss.__wrapped__(symbol)
+
+            if with_peers and symbol in tickers:
+                _, peers = get_competitors(symbol, info)
+                todo.extend(p for p in peers if p not in done)
+
+        if with_macro:
+            print("recording macro", file=sys.stderr)
+            # Every download the macro history store can make: the full bootstrap and each top-up period
+            for period in ["max"] + [p for p, _ in GAP_PERIODS]:
+                provider.download(list(MACRO_TICKERS.values()), period=period)
+            for query in list(CHOKEPOINTS.values()) + list(rss_queries):
+                fetch_google_news_rss.__wrapped__(query)
+            if av_key:
+                try:
+                    fetch_wti_price(av_key)
+                except Exception as e:
+                    print(f"  Alpha Vantage WTI failed: {e}", file=sys.stderr)
+    finally:
+        set_provider(previous)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record fixtures for offline replay")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Record live responses for tickers")
+    rec.add_argument("tickers", nargs="+")
+    rec.add_argument("--fixtures", default=os.environ.get("VALUORA_FIXTURES", DEFAULT_FIXTURES_DIR))
+    rec.add_argument("--with-peers", action="store_true", help="Also record each ticker's comparison peers")
+    rec.add_argument("--no-macro", action="store_true", help="Skip macro series and chokepoint feeds")
+    rec.add_argument("--rss", action="append", default=[], help="Extra Google News queries to record")
+    args = parser.parse_args(argv)
+
+    record_fixtures(
+        [t.upper() for t in args.tickers],
+        args.fixtures,
+        with_peers=args.with_peers,
+        with_macro=not args.no_macro,
+        rss_queries=args.rss,
+        av_key=os.environ.get("ALPHA_VANTAGE_KEY"),
+    )
+    print(f"fixtures written to {args.fixtures}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
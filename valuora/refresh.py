@@ -0,0 +1,114 @@
+"""
+Stale-while-revalidate refresher: keeps the last good result of a fetch in memory and
+re-fetches it on a background thread before it expires, so readers never wait on the
+network (only the very first fetch of a process can block).
+
+    refresher = get_refresher("macro", fetch_macro_snapshot, interval=3300)
+    snap = refresher.get()        # Snapshot(value, fetched_at)
+    refresher.status()            # {'fetched_at': .., 'age_s': .., 'last_error': .., ...}
+
+Refreshers are process-wide (one thread per name), so Streamlit reruns and
+st.cache_resource.clear() don't start duplicate threads.
+"""
+import threading
+import time
+from collections import namedtuple
+
+Snapshot = namedtuple("Snapshot", ["value", "fetched_at"])
+
+# Wait before retrying a failed refresh (doubles up to the interval)
+RETRY_S = 60
+
+
+class BackgroundRefresher:
+    def __init__(self, fetch, interval, is_good=None, name="refresher", retry=RETRY_S):
+        """
+        fetch()        -> value; called on the background thread
+        interval       seconds between successful refreshes (set it below the data's TTL)
+        is_good(value) -> False for fallback/empty results, which don't replace the last good one
+        """
+        self.fetch = fetch
+        self.interval = interval
+        self.is_good = is_good or (lambda value: value is not None)
+        self.name = name
+        self.retry = retry
+        self._snapshot = None
+        self._last_error = None
+        self._last_attempt = None
+        self._attempted = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=f"valuora-{self.name}", daemon=True)
+                self._thread.start()
+        return self
+
+    def _refresh_once(self):
+        self._last_attempt = time.time()
+        try:
+            value = self.fetch()
+            if not self.is_good(value):
+                self._last_error = "fetch returned no usable data"
+                return False
+            self._snapshot = Snapshot(value, time.time())
+            self._last_error = None
+            return True
+        except Exception as e:
+            self._last_error = f"{type(e).__name__}: {e}"
+            return False
+        finally:
+            self._attempted.set()
+
+    def _run(self):
+        delay = self.retry
+        while True:
+            if self._refresh_once():
+                delay = self.retry
+                wait = self.interval
+            else:
+                wait = delay
+                delay = min(delay * 2, self.interval)
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def refresh_now(self):
+        """Asks the background thread to refresh immediately (doesn't wait for it)."""
+        self._wake.set()
+
+    def get(self, timeout=None):
+        """
+        The last good snapshot. Blocks only until the first fetch attempt of the process
+        completes (up to `timeout`); returns None if there is still nothing good to serve.
+        """
+        self.start()
+        if self._snapshot is None:
+            self._attempted.wait(timeout)
+        return self._snapshot
+
+    def status(self):
+        snap = self._snapshot
+        return {
+            "name": self.name,
+            "fetched_at": snap.fetched_at if snap else None,
+            "age_s": time.time() - snap.fetched_at if snap else None,
+            "next_refresh_s": max(0.0, snap.fetched_at + self.interval - time.time()) if snap else None,
+            "last_attempt": self._last_attempt,
+            "last_error": self._last_error,
+        }
+
+
+_REFRESHERS = {}
+_REFRESHERS_LOCK = threading.Lock()
+
+
+def get_refresher(name, fetch, interval, is_good=None):
+    """The process-wide refresher called `name`, created and started on first use."""
+    with _REFRESHERS_LOCK:
+        refresher = _REFRESHERS.get(name)
+        if refresher is None:
+            refresher = _REFRESHERS[name] = BackgroundRefresher(fetch, interval, is_good=is_good, name=name).start()
+        return refresher
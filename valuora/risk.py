@@ -0,0 +1,113 @@
+"""
+Historical-simulation risk for a weighted portfolio of tickers.
+
+    risk = portfolio_risk(closes, weights, confidence=0.95)
+    risk["var"][10], risk["cvar"][1], risk["max_drawdown"], risk["contributions"]
+
+Everything works on the date x ticker returns matrix at once. Names without a price on
+a day (not listed yet, halted) are left out of that day and the remaining weights are
+scaled up, so one recent IPO doesn't cut the whole history down to its own.
+Multi-day VaR uses overlapping N-day compounded returns, not sqrt(N) scaling.
+"""
+import numpy as np
+import pandas as pd
+
+TRADING_DAYS = 252
+HORIZONS = (1, 10)
+
+
+def normalize_weights(weights, tickers):
+    """{ticker: weight} -> array aligned to `tickers` summing to 1 (equal weights if all zero)."""
+    w = np.array([max(float(weights.get(t, 0.0) or 0.0), 0.0) for t in tickers])
+    if w.sum() <= 0:
+        w = np.ones(len(tickers))
+    return w / w.sum()
+
+
+def portfolio_returns(returns, w):
+    """Daily portfolio returns from a (T, K) returns array; weights renormalized over the names with data."""
+    observed = ~np.isnan(returns)
+    covered = observed @ w
+    with np.errstate(invalid="ignore", divide="ignore"):
+        port = np.where(observed, returns, 0.0) @ w / covered
+    return np.where(covered > 0, port, np.nan), covered
+
+
+def horizon_returns(port, horizon):
+    """Overlapping `horizon`-day compounded returns."""
+    if horizon == 1:
+        return port
+    log_cum = np.concatenate(([0.0], np.cumsum(np.log1p(port))))
+    return np.expm1(log_cum[horizon:] - log_cum[:-horizon])
+
+
+def var_cvar(returns, confidence):
+    """(VaR, CVaR) as positive loss fractions at `confidence` (e.g. 0.95)."""
+    if not len(returns):
+        return np.nan, np.nan
+    cutoff = np.quantile(returns, 1 - confidence)
+    return -cutoff, -returns[returns <= cutoff].mean()
+
+
+def volatility_contributions(returns, w):
+    """
+    Each name's share of annualized portfolio volatility (sums to the portfolio vol),
+    from the pairwise-complete covariance of daily returns.
+    """
+    observed = ~np.isnan(returns)
+    counts = observed.astype(np.float64)
+    means = np.nansum(returns, axis=0) / np.maximum(counts.sum(axis=0), 1)
+    centred = np.where(observed, returns - means, 0.0)
+    pairs = counts.T @ counts
+    with np.errstate(invalid="ignore", divide="ignore"):
+        cov = np.where(pairs > 1, centred.T @ centred / (pairs - 1), 0.0)
+    port_var = w @ cov @ w
+    if port_var <= 0:
+        return np.zeros(len(w)), 0.0
+    port_vol = np.sqrt(port_var)
+    return w * (cov @ w) / port_vol * np.sqrt(TRADING_DAYS), port_vol * np.sqrt(TRADING_DAYS)
+
+
+def portfolio_risk(closes, weights, confidence=0.95, horizons=HORIZONS):
+    """
+    closes: date x ticker DataFrame; weights: {ticker: weight} (any scale).
+    Returns a dict: var/cvar ({horizon: loss fraction}), volatility (annualized),
+    max_drawdown / current_drawdown (fractions), drawdown (Series), contributions
+    (DataFrame: weight, vol_contribution, pct_of_risk), days, start, end.
+    """
+    closes = closes.dropna(axis=1, how="all")
+    tickers = list(closes.columns)
+    w = normalize_weights(weights, tickers)
+    returns = closes.pct_change(fill_method=None).iloc[1:]
+    values = returns.to_numpy(dtype=np.float64)
+
+    port, covered = portfolio_returns(values, w)
+    keep = ~np.isnan(port)
+    port, index = port[keep], returns.index[keep]
+
+    var, cvar = {}, {}
+    for h in horizons:
+        var[h], cvar[h] = var_cvar(horizon_returns(port, h), confidence)
+
+    equity = np.cumprod(1 + port)
+    drawdown = equity / np.maximum.accumulate(equity) - 1 if len(equity) else equity
+
+    contrib, vol = volatility_contributions(values[keep], w)
+    contributions = pd.DataFrame({
+        "weight": w,
+        "vol_contribution": contrib,
+        "pct_of_risk": contrib / vol if vol else np.zeros(len(w)),
+    }, index=tickers)
+
+    return {
+        "var": var,
+        "cvar": cvar,
+        "volatility": vol,
+        "max_drawdown": float(drawdown.min()) if len(drawdown) else np.nan,
+        "current_drawdown": float(drawdown[-1]) if len(drawdown) else np.nan,
+        "drawdown": pd.Series(drawdown, index=index, name="Drawdown"),
+        "contributions": contributions,
+        "days": len(port),
+        "start": index[0] if len(index) else None,
+        "end": index[-1] if len(index) else None,
+    }
@@ -0,0 +1,136 @@
+"""
+Macro shock scenarios: how a set of tickers would move if oil, yields, indices... moved.
+
+    betas = estimate_betas(closes, macro_hist)      # tickers x factors (+ obs, r2)
+    moves = complete_shocks(scenarios, factor_moves(macro_hist))
+    impact = project(betas, moves)                  # tickers x scenarios, % move
+
+Factors are the macro series (valuora.macro.MACRO_TICKERS). Price factors move in %,
+yield factors in basis points. Betas come from one masked least-squares fit per ticker,
+solved as a batch (every ticker's normal equations at once, with the rows where that
+ticker has no price left out), and the projection is a single matrix product, so the
+cost barely grows with tickers x scenarios.
+
+A scenario only names the factors it shocks. complete_shocks() moves the others by their
+expected co-movement given the shocked ones (from the factor covariance); without it,
+"S&P 500 -15%" would also assume the NASDAQ stays flat.
+"""
+import numpy as np
+import pandas as pd
+
+from valuora.cache import ttl_cache
+from valuora.data import fetch_closes
+from valuora.macro import MACRO_TICKERS, get_macro_store
+
+FACTORS = list(MACRO_TICKERS)
+YIELD_FACTORS = {"10Y Treasury Yield"}
+
+# Fewer overlapping daily returns than this and a ticker's betas are left NaN
+MIN_OBS = 60
+
+DEFAULT_SCENARIOS = {
+    "Oil +30%": {"Crude Oil (WTI)": 30},
+    "10Y +100bp": {"10Y Treasury Yield": 100},
+    "S&P 500 -15%": {"S&P 500": -15},
+    "Hang Seng -20%": {"Hang Seng": -20},
+    "Stagflation": {"Crude Oil (WTI)": 30, "10Y Treasury Yield": 100, "S&P 500": -15},
+}
+
+
+def factor_unit(factor):
+    return "bp" if factor in YIELD_FACTORS else "%"
+
+
+def factor_moves(macro_hist):
+    """
+    Daily factor moves: fractional returns for prices, changes in bp for yields.
+    Holidays in one market read as no move.
+    """
+    levels = macro_hist.ffill()
+    moves = {}
+    for factor in levels.columns:
+        if factor in YIELD_FACTORS:
+            moves[factor] = levels[factor].diff() * 100 # ^TNX is quoted in percent
+        else:
+            moves[factor] = levels[factor].pct_change(fill_method=None)
+    return pd.DataFrame(moves).iloc[1:]
+
+
+def estimate_betas(closes, macro_hist, min_obs=MIN_OBS):
+    """
+    Regresses each ticker's daily returns on the factor moves (with an intercept) over the
+    dates both have. Returns (betas, stats): betas is tickers x factors (fractional return
+    per 1.0 of factor move), stats has the observation count and R^2 per ticker.
+    """
+    moves = factor_moves(macro_hist).dropna()
+    returns = closes.pct_change(fill_method=None).reindex(moves.index)
+    tickers, factors = list(returns.columns), list(moves.columns)
+
+    y = returns.to_numpy(dtype=np.float64)                                     # T x K
+    observed = ~np.isnan(y)
+    y = np.where(observed, y, 0.0)
+    x = np.column_stack([np.ones(len(moves)), moves.to_numpy(dtype=np.float64)])  # T x (F+1)
+    T, P = x.shape
+    mask = observed.astype(np.float64)
+
+    # Per-ticker normal equations, all at once: X'WX is (K, P, P), X'Wy is (K, P)
+    xtx = (mask.T @ (x[:, :, None] * x[:, None, :]).reshape(T, P * P)).reshape(-1, P, P)
+    xty = (y.T @ x)
+    coef = (np.linalg.pinv(xtx) @ xty[:, :, None])[:, :, 0]                     # K x P
+
+    obs = observed.sum(axis=0)
+    resid = (y - x @ coef.T) * mask
+    n = np.maximum(obs, 1)
+    y_mean = y.sum(axis=0) / n
+    ss_tot = ((y - y_mean) ** 2 * mask).sum(axis=0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        r2 = 1 - (resid ** 2).sum(axis=0) / ss_tot
+
+    coef[obs < min_obs] = np.nan
+    betas = pd.DataFrame(coef[:, 1:], index=tickers, columns=factors)
+    stats = pd.DataFrame({"obs": obs, "r2": np.where(obs < min_obs, np.nan, r2)}, index=tickers)
+    return betas, stats
+
+
+def complete_shocks(scenarios, moves=None):
+    """
+    scenarios: {name: {factor: shock in % or bp}} -> scenarios x factors DataFrame of
+    fractional moves. With `moves` (factor_moves history), unshocked factors get
+    E[other | shocked] under the historical factor covariance; without it they stay at 0.
+    """
+    shocked = pd.DataFrame([{f: s.get(f, np.nan) for f in FACTORS} for s in scenarios.values()],
+                           index=list(scenarios), columns=FACTORS, dtype=np.float64)
+    for factor in FACTORS:
+        if factor not in YIELD_FACTORS:
+            shocked[factor] /= 100
+
+    out = shocked.to_numpy(copy=True)
+    if moves is not None:
+        cov = moves.reindex(columns=FACTORS).dropna().cov().to_numpy()
+        for row in out:
+            given = ~np.isnan(row)
+            if given.any() and (~given).any():
+                row[~given] = cov[np.ix_(~given, given)] @ np.linalg.pinv(cov[np.ix_(given, given)]) @ row[given]
+    return pd.DataFrame(np.nan_to_num(out), index=shocked.index, columns=FACTORS)
+
+
+def project(betas, shocks):
+    """tickers x scenarios projected move in %: one (K x F) @ (F x S) product."""
+    shocks = shocks.reindex(columns=betas.columns, fill_value=0.0)
+    return pd.DataFrame(betas.to_numpy() @ shocks.to_numpy().T * 100, index=betas.index, columns=shocks.index)
+
+
+@ttl_cache(ttl=3600)
+def watchlist_betas(tickers, lookback="5y"):
+    """
+    Betas, stats and factor moves for `tickers` (a tuple) over `lookback` of the macro
+    history store.
+    """
+    macro_hist = get_macro_store().history(lookback)
+    if macro_hist.empty:
+        return pd.DataFrame(columns=FACTORS), pd.DataFrame(columns=["obs", "r2"]), pd.DataFrame(columns=FACTORS)
+    closes = fetch_closes(list(tickers), start=macro_hist.index[0])
+    if closes.empty:
+        return pd.DataFrame(columns=FACTORS), pd.DataFrame(columns=["obs", "r2"]), factor_moves(macro_hist)
+    betas, stats = estimate_betas(closes, macro_hist)
+    return betas, stats, factor_moves(macro_hist)
@@ -0,0 +1,170 @@
+"""
+Headline sentiment: a finance word lexicon with negation, scored locally (no network model).
+
+    scorer = default_scorer()
+    scorer.score("Apple beats estimates, shares surge")    # 0.83
+    scorer.score("Tanker traffic not disrupted")            # 0.45 (negated)
+    scorer.score_many(titles)                               # one pass over all uncached titles
+
+A headline's raw score is the sum of its words' lexicon weights; a weight flips sign when
+one of the NEGATION_WINDOW words before it is a negator ("not", "no", "never", "isn't", ...).
+The sum is squashed into [-1, 1] with s / sqrt(s^2 + ALPHA), so one strong word counts
+for a lot in a short headline but a pile of them can't run off the scale.
+
+Batches are scored as a sparse (headline x word) product: every word that hits the
+lexicon is one (row, weight) entry and np.bincount sums the rows. Scores are cached per
+headline hash (valuora.cache.HeadlineCache, as the tagger's are).
+
+LEXICON is the built-in word list; VALUORA_SENTIMENT_LEXICON can point at a JSON file of
+{word: weight} that replaces it (a trailing '*' matches any word with that stem).
+"""
+import re
+import threading
+
+import numpy as np
+
+from valuora.cache import HeadlineCache, env_singleton
+
+_POSITIVE = {
+    1.0: [
+        "gain*", "rise", "rises", "rising", "rose", "up", "higher", "grow*", "growth", "beat", "beats", "beating",
+        "strong", "stronger", "strength", "improve*", "upgrade*", "outperform*", "profit", "profits", "profitable",
+        "bullish", "optimism", "optimistic", "expand*", "expansion", "recover*", "rebound*", "boost*", "win",
+        "wins", "won", "approval", "approved", "approves", "deal", "partnership", "launch*", "innovation*",
+        "dividend", "buyback*", "resilient", "steady", "stabilize*", "easing", "eases", "ceasefire", "truce",
+        "reopen*", "resume*", "accord", "agreement", "progress", "upside", "positive", "confidence", "exceed*",
+        "tops", "topped",
+    ],
+    2.0: [
+        "surge*", "soar*", "jump", "jumps", "jumped", "rally", "rallies", "rallied", "record", "breakthrough*",
+        "skyrocket*", "blowout", "boom", "booms", "booming",
+    ],
+}
+_NEGATIVE = {
+    1.0: [
+        "fall", "falls", "falling", "fell", "drop", "drops", "dropped", "dropping", "decline*", "down", "lower", "loss", "losses", "lose",
+        "loses", "weak", "weaker", "weakness", "miss", "misses", "missed", "downgrade*", "underperform*",
+        "bearish", "concern*", "worry", "worries", "worried", "fear", "fears", "feared", "risk", "risks", "risky", "uncertain*",
+        "volatil*", "lawsuit*", "sued", "sues", "probe", "investigation*", "fined", "penalty", "delay*",
+        "shortage*", "disrupt*", "halt*", "suspend*", "layoff*", "slow*", "slump*", "tension*", "threat*",
+        "sanction*", "tariff*", "attack*", "blockade*", "seize*", "seized", "warn", "warns", "warned", "warning", "warnings", "recall*", "inflation",
+        "debt", "default*", "negative", "pressure", "closure", "conflict", "escalat*", "downturn", "headwind*",
+    ],
+    2.0: [
+        "plunge*", "crash*", "collapse*", "tumble*", "tank", "tanks", "tanked", "bankrupt*",
+        "bankruptcy", "fraud", "scandal", "crisis", "war", "recession", "sink*", "sank", "selloff", "sell-off",
+        "rout", "slash*", "plummet*", "explosion", "missile*",
+    ],
+}
+LEXICON = {
+    **{word: weight for weight, words in _POSITIVE.items() for word in words},
+    **{word: -weight for weight, words in _NEGATIVE.items() for word in words},
+}
+
+NEGATORS = frozenset(["not", "no", "never", "without", "neither", "nor", "hardly", "barely", "cannot", "none", "nothing"])
+NEGATION_WINDOW = 3
+ALPHA = 4.0
+# score() above / below these reads as positive / negative
+POSITIVE_CUTOFF = 0.15
+NEGATIVE_CUTOFF = -0.15
+CACHE_SIZE = 100_000
+# Distinct tokens whose lexicon weight is memoized (the memo is reset when it fills up)
+TOKEN_CACHE_SIZE = 200_000
+
+# Words and headline breaks ("\n" is a token of its own, so one regex pass splits a batch)
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-'][a-z0-9]+)*|\n")
+
+
+class SentimentScorer:
+    def __init__(self, lexicon=None, cache_size=CACHE_SIZE):
+        self.lexicon = dict(lexicon or LEXICON)
+        self._exact = {}
+        self._stems = {}
+        for word, weight in self.lexicon.items():
+            word = word.lower()
+            if word.endswith("*"):
+                self._stems[word[:-1]] = float(weight)
+            else:
+                self._exact[word] = float(weight)
+        self._stem_lengths = sorted({len(stem) for stem in self._stems}, reverse=True)
+        self._weights = {} # token -> weight (0.0 when not in the lexicon), filled as tokens are seen
+        self._weights_lock = threading.Lock()
+
+        self._cache = HeadlineCache(cache_size) # headline -> score
+
+    def _weight(self, token):
+        weight = self._exact.get(token)
+        if weight is not None:
+            return weight
+        for length in self._stem_lengths:
+            stem_weight = self._stems.get(token[:length])
+            if stem_weight is not None:
+                return stem_weight
+        return 0.0
+
+    def _token_weights(self, tokens):
+        """{token: weight} for a batch's distinct tokens, memoized up to TOKEN_CACHE_SIZE tokens."""
+        with self._weights_lock:
+            weights = {t: self._weights.get(t) for t in tokens}
+        unseen = [t for t, w in weights.items() if w is None]
+        for token in unseen:
+            weights[token] = self._weight(token)
+        if unseen and len(unseen) <= TOKEN_CACHE_SIZE:
+            with self._weights_lock:
+                if len(self._weights) + len(unseen) > TOKEN_CACHE_SIZE:
+                    self._weights.clear()
+                self._weights.update((t, weights[t]) for t in unseen)
+        return weights
+
+    def score(self, title):
+        """Sentiment of one headline in [-1, 1] (0 when no lexicon word appears)."""
+        return float(self.score_many([title])[0])
+
+    def score_many(self, titles):
+        """score() for a list of headlines, as an array. Uncached ones are scored in one batch."""
+        keys, cached, missing = self._cache.lookup(titles)
+        scores = np.array([0.0 if c is None else c for c in cached])
+        if not missing:
+            return scores
+
+        fresh = self._score_batch([(titles[i] or "").replace("\n", " ").replace("\u2019", "'") for i in missing])
+        scores[missing] = fresh
+        self._cache.store([keys[i] for i in missing], fresh.tolist())
+        return scores
+
+    def _score_batch(self, texts):
+        tokens = _TOKEN.findall("\n".join(texts).lower())
+        if not tokens:
+            return np.zeros(len(texts))
+        weights = self._token_weights(set(tokens))
+
+        breaks = np.fromiter((t == "\n" for t in tokens), dtype=bool, count=len(tokens))
+        rows = np.cumsum(breaks) # headline of each token
+        negator = np.fromiter((t in NEGATORS or t.endswith("n't") for t in tokens), dtype=bool, count=len(tokens))
+        weight = np.fromiter((weights.get(t, 0.0) for t in tokens), dtype=float, count=len(tokens))
+
+        # Position of the latest negator at or before each token, and of the latest headline
+        # break: a word is negated when a negator in its own headline is at most
+        # NEGATION_WINDOW words back
+        position = np.arange(len(tokens))
+        last_negator = np.maximum.accumulate(np.where(negator, position, -1))
+        last_break = np.maximum.accumulate(np.where(breaks, position, -1))
+        negated = (last_negator > last_break) & (position - last_negator <= NEGATION_WINDOW) & ~negator
+        weight = np.where(negated, -weight, weight)
+
+        hits = weight != 0
+        raw = np.bincount(rows[hits], weights=weight[hits], minlength=len(texts))
+        return raw / np.sqrt(raw * raw + ALPHA)
+
+
+def label(score):
+    """'positive', 'negative' or 'neutral' for a score()."""
+    if score >= POSITIVE_CUTOFF:
+        return "positive"
+    if score <= NEGATIVE_CUTOFF:
+        return "negative"
+    return "neutral"
+
+
+# Process-wide scorer for LEXICON (or the VALUORA_SENTIMENT_LEXICON file)
+default_scorer = env_singleton("VALUORA_SENTIMENT_LEXICON", lambda lexicon: SentimentScorer(lexicon or LEXICON))
@@ -0,0 +1,67 @@
+"""
+The Valuora Verdict: a rough bullish/bearish score from valuation, trend and headlines
+(lexicon sentiment from valuora.sentiment, political flags from valuora.tagging).
+
+The thresholds below are shared with valuora.backtest, which replays the price-based
+components through history.
+"""
+from valuora.sentiment import default_scorer, label
+from valuora.tagging import default_tagger
+
+# P/E below PE_CHEAP scores +1, above PE_EXPENSIVE -1
+PE_CHEAP = 15
+PE_EXPENSIVE = 50
+# Close above its MA_WINDOW-day moving average scores +1, otherwise -1
+MA_WINDOW = 50
+# Headlines scored for the news component (mean sentiment, -1 to +1)
+NEWS_HEADLINES = 10
+
+
+# --- Mock AI Analysis ---
+def generate_ai_verdict(info, news, history):
+    verdict = []
+    sentiment_score = 0 # Range roughly -3 to +3
+
+    # 1. Valuation Check
+    pe = info.get('trailingPE')
+    if pe is not None:
+        if pe < PE_CHEAP:
+            verdict.append(f"🟢 **Value Opportunity:** P/E of {pe:.2f} suggests it's cheap relative to earnings.")
+            sentiment_score += 1
+        elif pe > PE_EXPENSIVE:
+            verdict.append(f"🔥 **Hot / Expensive:** P/E of {pe:.2f} is very high. Priced for perfection.")
+            sentiment_score -= 1
+        else:
+            verdict.append(f"⚖️ **Fairly Valued:** P/E of {pe:.2f} is standard.")
+
+    # 2. Trend Check
+    if not history.empty:
+        current_price = history['Close'].iloc[-1]
+        ma = history['Close'].tail(MA_WINDOW).mean()
+        if current_price > ma:
+             verdict.append(f"🚀 **Momentum:** Trading ABOVE the {MA_WINDOW}-day moving average. Bulls are in control.")
+             sentiment_score += 1
+        else:
+             verdict.append(f"📉 **Downtrend:** Trading BELOW the {MA_WINDOW}-day moving average. Caution advised.")
+             sentiment_score -= 1
+
+    # 3. News Scan: headline sentiment (valuora.sentiment) plus political flags (valuora.tagging)
+    found_political = False
+
+    verdict.append("\n**🗞️ News Scanner:**")
+    if news:
+        titles = [a.get('title', '') for a in news[:NEWS_HEADLINES]]
+        scores = default_scorer().score_many(titles)
+        news_sentiment = float(scores.mean())
+        verdict.append(f"- 📰 **Headline Sentiment:** {news_sentiment:+.2f} ({label(news_sentiment)}) across {len(titles)} headlines.")
+        sentiment_score += news_sentiment
+
+        for title, tags in zip(titles[:5], default_tagger().tag_many(titles[:5])):
+            if "political" in tags:
+                verdict.append(f"- ⚠️ **Political Radar:** \"{title}\"")
+                found_political = True
+
+    if not found_political:
+        verdict.append("- 🛡️ **Clear Skies:** No major political red flags in top headlines.")
+
+    return verdict, sentiment_score
@@ -0,0 +1,219 @@
+"""
+Nightly comparison snapshots: the "Comparing to Industry" row of every ticker in a
+universe, plus sector and industry averages, materialized as dated Parquet files.
+
+    python -m valuora.snapshots build --universe universe.csv --root data/snapshots --workers 8
+    python -m valuora.snapshots list --root data/snapshots
+
+    snapshot = get_snapshot()           # latest under VALUORA_SNAPSHOTS, None if stale / absent
+    snapshot.row("MSFT")                # {'Ticker': 'MSFT', 'P/E': .., ..., '5Y ROI': ..}
+    snapshot.averages(sector="Technology")   # mean of each column over the sector, plus 'Count'
+
+On disk, one directory per build date:
+    <root>/<YYYY-MM-DD>/comparison.parquet   Ticker, Sector, Industry, the comparison columns
+    <root>/<YYYY-MM-DD>/averages.parquet     Level ('sector' / 'industry'), Name, Count, column means
+
+Each file is written under a temporary name and renamed into place, comparison.parquet
+last, so a date directory counts as complete once it has that file. Older dates are
+kept (--keep prunes them) so a bad night can be rolled back by deleting one directory.
+
+fetch_comparison_data reads peers from the latest snapshot and only fetches the main
+ticker live; the peers' multiples and returns move slowly enough that a day-old row is
+as good as a fresh one. A snapshot older than MAX_AGE_DAYS is ignored.
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+COMPARISON_FILE = "comparison.parquet"
+AVERAGES_FILE = "averages.parquet"
+# Nightly builds, so this covers a weekend and one failed night
+MAX_AGE_DAYS = 4
+DEFAULT_WORKERS = 8
+
+_DATE_DIR = re.compile(r"\d{4}-\d{2}-\d{2}$")
+
+
+class ComparisonSnapshot:
+    def __init__(self, root, date):
+        self.root = root
+        self.date = pd.Timestamp(date)
+        path = os.path.join(root, self.date.strftime("%Y-%m-%d"))
+        self.table = pd.read_parquet(os.path.join(path, COMPARISON_FILE)).set_index("Ticker")
+        averages = pd.read_parquet(os.path.join(path, AVERAGES_FILE))
+        self._averages = averages.set_index(["Level", "Name"])
+        self._columns = [c for c in self.table.columns if c not in ("Sector", "Industry")]
+
+    def __contains__(self, ticker):
+        return ticker in self.table.index
+
+    def __len__(self):
+        return len(self.table)
+
+    def row(self, ticker):
+        """The ticker's comparison row, in the shape fetch_comparison_data builds."""
+        values = self.table.loc[ticker, self._columns]
+        return {"Ticker": ticker, **{c: float(values[c]) for c in self._columns}}
+
+    def averages(self, sector=None, industry=None):
+        """Column means (and 'Count') over the industry, or the sector; None if it isn't in the snapshot."""
+        key = ("industry", industry) if industry else ("sector", sector)
+        if key not in self._averages.index:
+            return None
+        return self._averages.loc[key]
+
+
+def list_dates(root):
+    """Complete snapshot dates under root, oldest first."""
+    try:
+        names = os.listdir(root)
+    except OSError:
+        return []
+    return sorted(
+        pd.Timestamp(name) for name in names
+        if _DATE_DIR.match(name) and os.path.exists(os.path.join(root, name, COMPARISON_FILE))
+    )
+
+
+_OPENED = {} # (root, date) -> (mtime, ComparisonSnapshot)
+_OPENED_LOCK = threading.Lock()
+
+
+def get_snapshot(root=None, max_age_days=MAX_AGE_DAYS):
+    """
+    The latest snapshot under `root` (default: VALUORA_SNAPSHOTS), loaded once per build.
+    None if it isn't configured, there is none or the latest is stale.
+    """
+    root = root or os.environ.get("VALUORA_SNAPSHOTS")
+    if not root:
+        return None
+    dates = list_dates(root)
+    if not dates or (pd.Timestamp.today().normalize() - dates[-1]).days > max_age_days:
+        return None
+    date = dates[-1]
+    try:
+        mtime = os.stat(os.path.join(root, date.strftime("%Y-%m-%d"), COMPARISON_FILE)).st_mtime_ns
+    except OSError:
+        return None
+    with _OPENED_LOCK:
+        opened = _OPENED.get((root, date))
+        if opened is None or opened[0] != mtime:
+            opened = _OPENED[(root, date)] = (mtime, ComparisonSnapshot(root, date))
+        return opened[1]
+
+
+# --- Building ---
+def snapshot_rows(tickers, workers=DEFAULT_WORKERS, progress=None):
+    """
+    Comparison rows (with Sector / Industry) for every ticker, fetched on a thread pool
+    (the work is network-bound). Tickers that fail are reported and left out.
+    """
+    from valuora.data import comparison_row
+    from valuora.matrix import get_price_matrix
+    from valuora.providers import get_provider
+
+    provider = get_provider()
+    matrix = get_price_matrix()
+
+    def fetch(ticker):
+        try:
+            row, info = comparison_row(ticker, provider, matrix)
+        except Exception as e:
+            print(f"[snapshots] {ticker}: {type(e).__name__}: {e}", file=sys.stderr)
+            return None
+        return {**row, "Sector": info.get("sector") or "", "Industry": info.get("industry") or ""}
+
+    rows = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for i, row in enumerate(pool.map(fetch, tickers)):
+            if row is not None:
+                rows.append(row)
+            if progress:
+                progress(i + 1, len(tickers))
+    return rows
+
+
+def group_averages(table):
+    """Per-sector and per-industry Count and column means of a comparison table."""
+    from valuora.data import COMPARISON_COLUMNS
+
+    frames = []
+    for level, column in (("sector", "Sector"), ("industry", "Industry")):
+        named = table[table[column] != ""]
+        grouped = named.groupby(column)[COMPARISON_COLUMNS]
+        averages = grouped.mean()
+        averages.insert(0, "Count", grouped.size())
+        averages.insert(0, "Name", averages.index)
+        averages.insert(0, "Level", level)
+        frames.append(averages.reset_index(drop=True))
+    return pd.concat(frames, ignore_index=True)
+
+
+def write_snapshot(root, rows, date=None):
+    """Writes rows (and their group averages) as the snapshot for `date` (default: today)."""
+    from valuora.data import COMPARISON_COLUMNS
+
+    date = pd.Timestamp(date or pd.Timestamp.today()).normalize()
+    path = os.path.join(root, date.strftime("%Y-%m-%d"))
+    os.makedirs(path, exist_ok=True)
+
+    table = pd.DataFrame(rows, columns=["Ticker", "Sector", "Industry", *COMPARISON_COLUMNS])
+    table[COMPARISON_COLUMNS] = table[COMPARISON_COLUMNS].astype(np.float64)
+    for name, frame in ((AVERAGES_FILE, group_averages(table)), (COMPARISON_FILE, table)):
+        tmp = os.path.join(path, f".{name}.tmp-{os.getpid()}")
+        frame.to_parquet(tmp, index=False)
+        os.replace(tmp, os.path.join(path, name))
+    return path
+
+
+def prune(root, keep):
+    """Deletes all but the newest `keep` snapshot dates."""
+    for date in list_dates(root)[:-keep] if keep > 0 else []:
+        shutil.rmtree(os.path.join(root, date.strftime("%Y-%m-%d")), ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build / list the nightly comparison snapshots")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build")
+    build.add_argument("tickers", nargs="*")
+    build.add_argument("--universe", help="CSV/text file of tickers (same format as valuora.batch)")
+    build.add_argument("--root", default=os.environ.get("VALUORA_SNAPSHOTS", "data/snapshots"))
+    build.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    build.add_argument("--keep", type=int, default=30, help="snapshot dates to keep (0 keeps all)")
+    listing = sub.add_parser("list")
+    listing.add_argument("--root", default=os.environ.get("VALUORA_SNAPSHOTS", "data/snapshots"))
+    args = parser.parse_args(argv)
+
+    if args.command == "list":
+        for date in list_dates(args.root):
+            table = pd.read_parquet(os.path.join(args.root, date.strftime("%Y-%m-%d"), COMPARISON_FILE), columns=["Sector"])
+            print(f"{date:%Y-%m-%d}  {len(table)} tickers, {table['Sector'].nunique()} sectors")
+        return 0
+
+    tickers = [t.strip().upper() for t in args.tickers]
+    if args.universe:
+        from valuora.batch import read_universe
+        tickers += read_universe(args.universe)
+    if not tickers:
+        parser.error("build needs tickers or --universe")
+
+    rows = snapshot_rows(list(dict.fromkeys(tickers)), workers=args.workers)
+    if not rows:
+        print("[snapshots] no rows fetched; keeping the previous snapshot", file=sys.stderr)
+        return 1
+    path = write_snapshot(args.root, rows)
+    prune(args.root, args.keep)
+    print(f"{path}: {len(rows)} of {len(set(tickers))} tickers")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
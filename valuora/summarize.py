@@ -0,0 +1,177 @@
+"""
+Extractive headline summaries: the most representative headlines of a feed and the names,
+regions and commodities that keep coming up in it. Runs offline on the titles alone.
+
+    digest = summarize_headlines(titles, k=3, exclude=["Strait of Hormuz"], publishers=publishers)
+    digest["headlines"]     # k most central titles, near-repeats skipped
+    digest["regions"]       # [("red sea", 14), ("iran", 9), ...]  headlines mentioning each
+    digest["commodities"]   # [("oil", 21), ("lng", 4), ...]
+    digest["entities"]      # [("Houthi", 7), ("Maersk", 5), ...]  other recurring proper names
+
+Centrality is TF-IDF cosine similarity to the feed's centroid, so the headlines that share
+the most weighted words with the rest of the feed rank first. The (headline x word) matrix
+is kept as COO arrays and every product is an np.bincount over them, so one feed of any
+size is a handful of vectorized passes. Regions and commodities come from keyword lists
+compiled into a HeadlineTagger; other names are runs of capitalized words that appear in
+at least MIN_MENTIONS headlines.
+
+Results are cached per feed (the titles tuple is the cache key), so a rerun of the page
+with an unchanged feed costs nothing.
+"""
+import re
+from collections import Counter
+
+import numpy as np
+
+from valuora.cache import ttl_cache
+from valuora.dedup import title_words
+from valuora.tagging import HeadlineTagger
+
+GAZETTEER = {
+    "region": [
+        "iran", "iraq", "israel", "gaza", "lebanon", "yemen", "saudi arabia", "saudi", "qatar", "oman", "uae",
+        "egypt", "red sea", "gulf of aden", "persian gulf", "gulf", "arabian sea", "bab el-mandeb", "suez",
+        "hormuz", "malacca", "singapore", "indonesia", "malaysia", "china", "taiwan", "south china sea", "japan",
+        "korea", "india", "russia", "ukraine", "black sea", "europe", "eu", "united states", "us", "u.s.",
+        "panama", "africa", "cape of good hope", "middle east", "asia",
+    ],
+    "commodity": [
+        "oil", "crude", "brent", "wti", "gas", "lng", "lpg", "diesel", "fuel", "gasoline", "jet fuel", "coal",
+        "grain*", "wheat", "corn", "soybean*", "fertilizer*", "copper", "iron ore", "steel", "aluminum", "nickel",
+        "gold", "container*", "tanker*", "bulk carrier*", "chips", "semiconductor*", "rare earth*",
+    ],
+}
+
+STOPWORDS = frozenset("""
+a an the and or but if of to in on at by for with from as into over under after before about amid against
+is are was were be been being has have had do does did will would can could may might should must shall
+this that these those it its it's their they them he she his her we our you your i
+not no new says said say than then there here what which who whom how why when where while
+up down out off more most less least very just also still per vs via
+""".split())
+
+MIN_MENTIONS = 2
+REPEAT_SIMILARITY = 0.5 # a pick this similar to an earlier pick is skipped
+
+_CAPITALIZED = re.compile(r"[A-Z][\w&.'-]*")
+# A run of capitalized words, allowing "of" / "the" / "al" inside ("Strait of Hormuz", "Bab al-Mandab")
+_NAME = re.compile(r"[A-Z][\w&.'-]*(?:\s+(?:(?:of|the|al|el|de)\s+)?[A-Z][\w&.'-]*)*")
+
+_KEYWORDS = {word.rstrip("*") for words in GAZETTEER.values() for word in words}
+
+_gazetteer_tagger = None
+
+
+def _tagger():
+    global _gazetteer_tagger
+    if _gazetteer_tagger is None:
+        _gazetteer_tagger = HeadlineTagger(GAZETTEER)
+    return _gazetteer_tagger
+
+
+def _singular(word):
+    """'tankers' -> 'tanker' when the singular is a gazetteer keyword (stems match both)."""
+    return word[:-1] if word.endswith("s") and word[:-1] in _KEYWORDS else word
+
+
+def tfidf(titles, publishers=None):
+    """
+    Row-normalized TF-IDF of the titles' content words as COO arrays (rows, cols, values),
+    plus the vocabulary size. Each word counts once per title (headlines are short), and a
+    trailing publisher is left out the way dedup.title_words drops it.
+    """
+    vocab = {}
+    rows, cols = [], []
+    publishers = publishers if publishers is not None else [None] * len(titles)
+    for i, (title, publisher) in enumerate(zip(titles, publishers)):
+        for word in set(title_words(title, publisher)) - STOPWORDS:
+            if len(word) > 1:
+                rows.append(i)
+                cols.append(vocab.setdefault(word, len(vocab)))
+    rows = np.asarray(rows, dtype=np.intp)
+    cols = np.asarray(cols, dtype=np.intp)
+    df = np.bincount(cols, minlength=len(vocab))
+    idf = np.log((1 + len(titles)) / (1 + df)) + 1
+    values = idf[cols]
+    norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=len(titles)))
+    values = values / norms[rows]
+    return rows, cols, values, len(vocab)
+
+
+def central_headlines(titles, k=3, publishers=None):
+    """Indices of the k most central titles, skipping ones too close to a title already picked."""
+    if not titles:
+        return []
+    rows, cols, values, size = tfidf(titles, publishers)
+    if not size:
+        return list(range(min(k, len(titles))))
+    centroid = np.bincount(cols, weights=values, minlength=size) / len(titles)
+    centrality = np.bincount(rows, weights=values * centroid[cols], minlength=len(titles))
+
+    picked = []
+    similar_to_picked = np.zeros(len(titles))
+    for i in np.argsort(-centrality, kind="stable").tolist():
+        if len(picked) == k:
+            break
+        if similar_to_picked[i] >= REPEAT_SIMILARITY:
+            continue
+        picked.append(i)
+        # Cosine similarity of every title to the new pick, from the pick's dense row
+        row = np.zeros(size)
+        own = rows == i
+        row[cols[own]] = values[own]
+        similar_to_picked = np.maximum(similar_to_picked, np.bincount(rows, weights=values * row[cols], minlength=len(titles)))
+    return picked
+
+
+def recurring_names(titles, exclude=(), min_mentions=MIN_MENTIONS):
+    """
+    [(name, headlines mentioning it)] for runs of capitalized words, leaving out names that
+    are part of `exclude`. Title Case headlines are skipped, and a headline's first word only
+    counts when the feed never uses it in lower case ("Houthi rebels ...", not "Oil rises ...").
+    """
+    excluded = f" {' '.join(exclude).lower()} "
+    titles = [t for t in titles if t and not _title_case(t)]
+    lowercase = {w for t in titles for w in re.findall(r"\b[a-z][\w'-]*", t)} | STOPWORDS
+    counts = Counter()
+    for title in titles:
+        names = set()
+        for match in _NAME.finditer(title):
+            name = match.group(0).strip(".'-")
+            if match.start() == 0 and name.split()[0].lower() in lowercase:
+                name = name.partition(" ")[2]
+            if name and name.lower() not in STOPWORDS and f" {name.lower()} " not in excluded:
+                names.add(name)
+        counts.update(names)
+    return [(name, n) for name, n in counts.most_common() if n >= min_mentions]
+
+
+def _title_case(title):
+    words = title.split()
+    return sum(bool(_CAPITALIZED.match(w)) for w in words) > 0.6 * len(words)
+
+
+@ttl_cache(ttl=3600, maxsize=64)
+def summarize_headlines(titles, k=3, exclude=(), publishers=None):
+    """
+    {'headlines': k most representative titles, 'regions' / 'commodities' / 'entities':
+    [(name, headlines mentioning it)] seen in at least MIN_MENTIONS headlines, 'count'}.
+    Names in `exclude` (e.g. the feed's own query) are left out of the lists; `publishers`
+    (one per title) are the suffixes left out of the centrality scores.
+    """
+    titles = [t or "" for t in titles]
+    excluded = f" {' '.join(exclude).lower()} "
+
+    found = {"region": Counter(), "commodity": Counter()}
+    for tags in _tagger().tag_many(titles):
+        for kind, words in tags.items():
+            found[kind].update(w for w in {_singular(w) for w in words} if f" {w} " not in excluded)
+    gazetteer = {word for counts in found.values() for word in counts}
+
+    return {
+        "headlines": [titles[i] for i in central_headlines(titles, k, publishers)],
+        "regions": [(w, n) for w, n in found["region"].most_common() if n >= MIN_MENTIONS],
+        "commodities": [(w, n) for w, n in found["commodity"].most_common() if n >= MIN_MENTIONS],
+        "entities": [(name, n) for name, n in recurring_names(titles, exclude) if _singular(name.lower()) not in gazetteer],
+        "count": len(titles),
+    }
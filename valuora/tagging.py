@@ -0,0 +1,152 @@
+"""
+Headline tagger: keyword taxonomies compiled into a single word-boundary regex.
+
+    tagger = default_tagger()
+    tagger.tag("Senate panel weighs new chip tariffs")
+    # {'political': ['senate', 'tariffs'], 'supply_chain': ['chip', 'tariffs']}
+    tagger.tag_many(titles)   # one regex pass over all uncached titles
+
+Keywords match whole words, case-insensitively ("tax" doesn't fire on "taxi"); a
+trailing '*' matches any word starting with the stem ("tariff*": tariff, tariffs).
+Keep stems long enough not to start unrelated words ("chip*" would tag "Chipotle").
+Multi-word phrases are fine. Results are cached per headline hash, so rescanning
+an archive only pays for headlines it hasn't seen.
+
+TAXONOMIES is the built-in set; VALUORA_TAXONOMIES can point at a JSON file of
+{taxonomy: [keywords]} that replaces it.
+"""
+import re
+
+import numpy as np
+
+from valuora.cache import HeadlineCache, env_singleton
+
+TAXONOMIES = {
+    "political": [
+        "election*", "regulation*", "regulator*", "tariff*", "congress*", "senate", "biden", "trump",
+        "policy", "policies", "tax", "taxes", "taxation", "lawsuit*", "antitrust",
+    ],
+    "legal": [
+        "lawsuit*", "antitrust", "sued", "sues", "court", "judge", "settlement", "probe", "investigation",
+        "subpoena", "fine", "fined", "class action", "sec charges", "indictment",
+    ],
+    "supply_chain": [
+        "supply chain*", "shortage*", "chip", "chips", "chipmaker*", "chipmaking", "semiconductor*", "shipping", "freight", "port", "ports",
+        "tariff*", "export control*", "rare earth*", "inventory", "logistics",
+    ],
+    "chokepoint": [
+        "strait of hormuz", "hormuz", "suez", "red sea", "houthi*", "bab el-mandeb", "malacca",
+        "panama canal", "taiwan strait", "blockade*",
+    ],
+}
+
+CACHE_SIZE = 100_000
+
+
+class HeadlineTagger:
+    def __init__(self, taxonomies=None, cache_size=CACHE_SIZE):
+        self.taxonomies = {name: list(words) for name, words in (taxonomies or TAXONOMIES).items()}
+        self._exact = {} # keyword -> taxonomies
+        self._stems = {} # stem ('*' keywords) -> taxonomies
+        for name, words in self.taxonomies.items():
+            for word in words:
+                word = " ".join(word.lower().split())
+                if word.endswith("*"):
+                    self._stems.setdefault(word[:-1], set()).add(name)
+                else:
+                    self._exact.setdefault(word, set()).add(name)
+        self._stem_lengths = sorted({len(stem) for stem in self._stems}, reverse=True)
+
+        # A character trie of all keywords as one regex: at each position the engine follows
+        # a single branch per character instead of trying every keyword in turn
+        trie = {}
+        for word in self._exact:
+            _trie_insert(trie, word, "")
+        for stem in self._stems:
+            _trie_insert(trie, stem, r"\w*")
+        self.pattern = re.compile(r"\b" + _trie_regex(trie) + r"\b", re.IGNORECASE) if trie else None
+
+        self._cache = HeadlineCache(cache_size) # headline -> {taxonomy: (keywords, ...)}
+
+    def _taxonomies_for(self, word):
+        found = self._exact.get(word)
+        if found is not None:
+            return found
+        for length in self._stem_lengths:
+            names = self._stems.get(word[:length])
+            if names is not None:
+                return names
+        return ()
+
+    def _scan(self, text):
+        """All (start, end, matched text) hits in `text`."""
+        if self.pattern is None:
+            return []
+        return [(m.start(), m.end(), m.group(0)) for m in self.pattern.finditer(text)]
+
+    def _tags_from(self, matches):
+        tags = {}
+        for match in matches:
+            word = " ".join(match.lower().split())
+            for name in self._taxonomies_for(word):
+                words = tags.setdefault(name, [])
+                if word not in words:
+                    words.append(word)
+        return {name: tuple(words) for name, words in tags.items()}
+
+    def tag(self, title):
+        """{taxonomy: (matched keywords, ...)} for one headline ({} if nothing matches)."""
+        return self.tag_many([title])[0]
+
+    def tag_many(self, titles):
+        """tag() for a list of headlines. Uncached ones are scanned together in one regex pass."""
+        keys, results, missing = self._cache.lookup(titles)
+        if not missing:
+            return results
+
+        # One pass over the concatenated titles; each hit is mapped back by its offset.
+        # NUL separates them: not whitespace, so a phrase can't match across two titles
+        texts = [(titles[i] or "").replace("\0", " ") for i in missing]
+        starts = np.cumsum([0] + [len(t) + 1 for t in texts[:-1]])
+        hits = self._scan("\0".join(texts))
+        owners = np.searchsorted(starts, [start for start, _, _ in hits], side="right") - 1
+        per_title = [[] for _ in missing]
+        for owner, (_, _, text) in zip(owners.tolist(), hits):
+            per_title[owner].append(text)
+
+        fresh = [self._tags_from(matches) for matches in per_title]
+        for i, tags in zip(missing, fresh):
+            results[i] = tags
+        self._cache.store([keys[i] for i in missing], fresh)
+        return results
+
+    def has_tag(self, title, taxonomy):
+        return taxonomy in self.tag(title)
+
+
+_END = ""
+
+
+def _trie_insert(trie, word, suffix):
+    node = trie
+    for ch in word:
+        node = node.setdefault(ch, {})
+    # A word that is both exact and a stem keeps the wider (stem) ending
+    node[_END] = max(node.get(_END, ""), suffix, key=len)
+
+
+def _trie_regex(node):
+    """Regex for a trie node; spaces inside phrases match any run of whitespace."""
+    branches = []
+    for ch in sorted(k for k in node if k != _END):
+        branches.append((r"\s+" if ch == " " else re.escape(ch)) + _trie_regex(node[ch]))
+    if _END in node:
+        # Ending here is tried after the longer branches ("hormuz" inside "strait of hormuz" still wins as a whole)
+        branches.append(node[_END])
+    if len(branches) == 1:
+        return branches[0]
+    return "(?:" + "|".join(branches) + ")"
+
+
+# Process-wide tagger for TAXONOMIES (or the VALUORA_TAXONOMIES file)
+default_tagger = env_singleton("VALUORA_TAXONOMIES", lambda taxonomies: HeadlineTagger(taxonomies or TAXONOMIES))
@@ -0,0 +1,120 @@
+"""
+Lightweight per-stage timing spans with a rolling latency window.
+
+    with span("fetch", label="yfinance"):
+        hist = stock.history(period="1d")
+
+    @timed("valuation")
+    def get_valuation_data(stock, info): ...
+
+    timing_summary()   # [{'stage': 'fetch', 'label': 'yfinance', 'count': .., 'p50_ms': .., 'p95_ms': .., 'p99_ms': ..}, ...]
+
+Stages used across the app: fetch (label = provider), statements, valuation, peers,
+charts, render (label = section) and rerun (label = page: the whole page rerun, so it
+includes the other stages). Spans are process-wide, like valuora.cache, so the numbers
+cover every session served by this process.
+"""
+import functools
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Samples kept per (stage, label)
+WINDOW = 500
+
+STAGES = ("fetch", "statements", "valuation", "peers", "charts", "render", "rerun")
+
+_WINDOWS = {} # (stage, label) -> deque of seconds
+_LOCK = threading.Lock()
+
+# Called as listener(stage, label, seconds, error) after every span (see valuora.metrics)
+_LISTENERS = []
+
+
+def record(stage, seconds, label=None):
+    """Adds one duration sample for `stage` (optionally broken down by provider/page `label`)."""
+    with _LOCK:
+        window = _WINDOWS.get((stage, label))
+        if window is None:
+            window = _WINDOWS[(stage, label)] = deque(maxlen=WINDOW)
+        window.append(seconds)
+
+
+@contextmanager
+def span(stage, label=None):
+    """Times the enclosed block, recording it even if the block raises."""
+    t0 = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        seconds = time.perf_counter() - t0
+        record(stage, seconds, label)
+        for listener in _LISTENERS:
+            listener(stage, label, seconds, error)
+
+
+def add_listener(listener):
+    """Registers listener(stage, label, seconds, error), called after every span."""
+    if listener not in _LISTENERS:
+        _LISTENERS.append(listener)
+
+
+def timed(stage, label=None):
+    """Decorator form of span()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(stage, label):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def percentile(sorted_samples, q):
+    """Nearest-rank percentile of an already sorted list (q in 0..100)."""
+    if not sorted_samples:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_samples)))
+    return sorted_samples[rank - 1]
+
+
+def timing_summary(by_label=True):
+    """
+    p50/p95/p99 (in ms) per stage over the rolling window, stages in pipeline order.
+    With by_label=False the provider/page breakdown is merged into one row per stage.
+    """
+    with _LOCK:
+        snapshot = {key: list(window) for key, window in _WINDOWS.items()}
+
+    grouped = {}
+    for (stage, label), samples in snapshot.items():
+        key = (stage, label if by_label else None)
+        grouped.setdefault(key, []).extend(samples)
+
+    def order(key):
+        stage, label = key
+        return (STAGES.index(stage) if stage in STAGES else len(STAGES), stage, label or "")
+
+    rows = []
+    for stage, label in sorted(grouped, key=order):
+        samples = sorted(grouped[(stage, label)])
+        rows.append({
+            "stage": stage,
+            "label": label,
+            "count": len(samples),
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p95_ms": percentile(samples, 95) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+        })
+    return rows
+
+
+def reset():
+    with _LOCK:
+        _WINDOWS.clear()
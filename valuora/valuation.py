@@ -0,0 +1,210 @@
+"""
+Valuation models: DCF intrinsic value, P/E / EPS / PEG from the filings,
+and the Cash Stable / Cash Burning diagnostic.
+"""
+import numpy as np
+
+from valuora.timing import timed
+
+# DCF Model page defaults (as fractions)
+DEFAULT_GROWTH = 0.10
+DEFAULT_TERMINAL_GROWTH = 0.025
+DEFAULT_WACC = 0.09
+
+
+# --- DCF CALCULATOR ---
+@timed("valuation")
+def calculate_dcf_value(fcf_input, growth_rate, terminal_growth, discount_rate, debt_input, cash_input, shares):
+    """
+    Calculates Intrinsic Value based on DCF inputs.
+    Returns: intrinsic_share_price (float)
+    """
+    try:
+        if fcf_input <= 0:
+            return 0.0
+
+        future_fcf = []
+        for i in range(1, 6):
+            fcf = fcf_input * ((1 + growth_rate) ** i)
+            future_fcf.append(fcf)
+
+        terminal_val = future_fcf[-1] * (1 + terminal_growth) / (discount_rate - terminal_growth)
+
+        dcf_value = 0
+        for i, cash in enumerate(future_fcf):
+            dcf_value += cash / ((1 + discount_rate) ** (i + 1))
+
+        pv_terminal = terminal_val / ((1 + discount_rate) ** 5)
+
+        # Enterprise Value
+        enterprise_value = dcf_value + pv_terminal
+
+        # Equity Value = EV - Debt + Cash
+        equity_value = enterprise_value - debt_input + cash_input
+
+        if not shares: shares = 1
+
+        intrinsic_share_price = equity_value / shares
+        return intrinsic_share_price
+    except:
+        return 0.0
+
+
+@timed("statements")
+def get_dcf_inputs(stock):
+    """
+    Pulls the DCF starting point from the statements (the DCF Model page, the API and batch use it).
+    Returns: (latest_fcf, total_debt, total_cash), 0.0 for anything missing.
+    """
+    latest_fcf = 0.0
+    total_debt = 0.0
+    total_cash = 0.0
+
+    try:
+        cashflow = stock.cashflow
+        if not cashflow.empty:
+            if 'Free Cash Flow' in cashflow.index:
+                latest_fcf = float(cashflow.loc['Free Cash Flow'].iloc[0])
+            elif 'Total Cash From Operating Activities' in cashflow.index and 'Capital Expenditures' in cashflow.index:
+                latest_fcf = float(cashflow.loc['Total Cash From Operating Activities'].iloc[0] + cashflow.loc['Capital Expenditures'].iloc[0])
+    except: pass
+
+    try:
+        bs = stock.balance_sheet
+        if not bs.empty:
+            if 'Total Debt' in bs.index:
+                total_debt = float(bs.loc['Total Debt'].iloc[0])
+            elif 'Long Term Debt' in bs.index:
+                total_debt = float(bs.loc['Long Term Debt'].iloc[0])
+            if 'Cash And Cash Equivalents' in bs.index:
+                total_cash = float(bs.loc['Cash And Cash Equivalents'].iloc[0])
+    except: pass
+
+    return latest_fcf, total_debt, total_cash
+
+
+# --- ROBUST VALUATION FETCHER ---
+@timed("valuation")
+def get_valuation_data(stock, info):
+    """
+    Tries to get P/E, EPS, and PEG from 'The Books' (Income Statement) first,
+    falling back to Yahoo Finance 'Info' if needed.
+    """
+    data = {
+        'pe': None,
+        'pe_source': None,
+        'eps': None,
+        'eps_source': None,
+        'peg': None,
+        'peg_source': None,
+        'yahoo_pe': info.get('trailingPE'), # For crosscheck
+        'yahoo_eps': info.get('trailingEps') # For crosscheck
+    }
+
+    current_price = info.get('currentPrice')
+
+    # 1. Try fetching from Income Statement (The Books)
+    try:
+        inc = stock.income_stmt
+        eps_row = None
+        if not inc.empty:
+            if "Diluted EPS" in inc.index:
+                eps_row = inc.loc["Diluted EPS"]
+            elif "Basic EPS" in inc.index:
+                eps_row = inc.loc["Basic EPS"]
+
+        if eps_row is not None and not eps_row.empty:
+            # Latest EPS (TTM roughly approximated by latest annual or just latest annual)
+            # Note: Income stmt is usually annual. 'info' trailingEPS is TTM.
+            # Ideally we want TTM for P/E. But for "The Books" crosscheck we use what we have.
+            # Let's use the latest annual as the "Book Value" proxy for calculation if TTM isn't available in financials.
+            # Actually, calculating P/E based on latest Annual EPS is a common simple metric.
+
+            latest_annual_eps = float(eps_row.iloc[0])
+            data['eps'] = latest_annual_eps
+            data['eps_source'] = "Company Filings (Annual)"
+
+            if current_price:
+                data['pe'] = current_price / latest_annual_eps
+                data['pe_source'] = "Calculated from Filings"
+
+            # Calculate Growth for PEG (Up to 5 years / 5 periods)
+            # eps_row is ordered roughly [Latest, Y-1, Y-2, Y-3, Y-4]
+            # We need at least 2 data points for 1 growth period.
+            valid_growths = []
+
+            # Iterate up to 5 times (comparing i to i+1)
+            # e.g., i=0 (Latest) vs i=1 (Y-1) -> Growth 1
+            for i in range(min(5, len(eps_row) - 1)):
+                try:
+                    current_val = float(eps_row.iloc[i])
+                    prev_val = float(eps_row.iloc[i+1])
+
+                    # Check for NaNs
+                    if np.isnan(current_val) or np.isnan(prev_val):
+                        continue
+
+                    # Avoid division by zero or massive spikes from near-zero
+                    if prev_val != 0:
+                        g = (current_val / prev_val) - 1
+                        valid_growths.append(g)
+                except:
+                    pass
+
+            if valid_growths:
+                avg_growth = sum(valid_growths) / len(valid_growths)
+
+                # We need growth as a percentage (e.g., 0.10 -> 10) for the PEG formula (PEG = PE / Growth_Rate_Percent)
+                if avg_growth != 0 and data['pe']:
+                    data['peg'] = data['pe'] / (avg_growth * 100)
+                    years_used = len(valid_growths)
+                    data['peg_source'] = f"Calculated ({years_used}yr Avg Growth)"
+
+    except Exception as e:
+        pass
+
+    # 2. Fallbacks (Yahoo Finance)
+    if data['eps'] is None:
+        data['eps'] = info.get('trailingEps')
+        data['eps_source'] = "Yahoo Finance"
+
+    if data['pe'] is None:
+        data['pe'] = info.get('trailingPE')
+        data['pe_source'] = "Yahoo Finance"
+
+    if data['peg'] is None:
+        data['peg'] = info.get('pegRatio')
+        data['peg_source'] = "Yahoo Finance"
+
+    return data
+
+
+@timed("statements")
+def classify_cash_position(stock):
+    """
+    Diagnoses if a company is 'Cash Stable' or 'Cash Burning'.
+    Returns: status (str), runway (months), burn_rate (monthly)
+    """
+    try:
+        cf = stock.cashflow
+        bs = stock.balance_sheet
+
+        # 1. Get Latest Annual Free Cash Flow (FCF)
+        if not cf.empty and 'Free Cash Flow' in cf.index:
+            latest_fcf = cf.loc['Free Cash Flow'].iloc[0]
+        else:
+            latest_fcf = -1 # Fallback to burning if data missing
+
+        # 2. Get Total Cash on Hand
+        cash_on_hand = bs.loc['Cash And Cash Equivalents'].iloc[0] if 'Cash And Cash Equivalents' in bs.index else 0
+
+        # 3. Logic: If FCF is negative, it's a Cash Burner
+        if latest_fcf < 0:
+            monthly_burn = abs(latest_fcf) / 12
+            runway_months = cash_on_hand / monthly_burn if monthly_burn > 0 else 999
+            return "Cash Burning", runway_months, monthly_burn
+        else:
+            return "Cash Stable", None, 0
+
+    except:
+        return "Unknown", None, 0